@@ -1,4 +1,5 @@
 from classifier import classifier
+from label_matcher import load_label_matcher
 
 
 def classify_images(images_dir, petlabel_dic, model):
@@ -28,29 +29,20 @@ def classify_images(images_dir, petlabel_dic, model):
     """
     results_dic = {} 
     true = false = 0
+    label_matcher = load_label_matcher()
    
     # Classifies each pet_image
     for pet_image, pet_label in petlabel_dic.items():
         # Gets classification label using the given model
         classifier_label = classifier(images_dir+'/'+pet_image, model).lower().strip()
 
-        # Does the pet_label and the classified match? 
-        match_results = False
-        found_index = classifier_label.find(pet_label) 
-        
-        # TODOL THis neexs to be cleaner
-        # checks that it was found
-        if found_index >= 0:
-            # rules out false positives for a single term
-            if found_index == 0 and len(pet_label) == len(classifier_label):
-                match_results = True
-                true += 1
-            # rules out false positives for multiple terms
-            elif (found_index == 0 or classifier_label[found_index-1] == " ") and ((found_index+len(pet_label) == len(classifier_label)) or ((classifier_label[found_index+len(pet_label):found_index+len(pet_label)+1]) in (' ', ','))):
-                match_results = True
-                true += 1
-            else:
-                false += 1
+        # Does the pet_label and the classified match? (whole words only)
+        match_results = label_matcher.matches_label(pet_label, classifier_label)
+        if match_results:
+            true += 1
+        # found but within another word (a false positive of find())
+        elif pet_label in classifier_label:
+            false += 1
         
         # Crreates the results directory 
         if pet_image not in results_dic:
@@ -58,5 +50,5 @@ def classify_images(images_dir, petlabel_dic, model):
         else: 
             print('** Warning: Pet Image, ' + pet_image + ' already exisits')
     
-    print("False:"+false+" True:"+true)
+    print("False:"+str(false)+" True:"+str(true))
     return results_dic
\ No newline at end of file
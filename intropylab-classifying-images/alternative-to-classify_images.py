@@ -4,7 +4,7 @@
 #                                                                             
 # PROGRAMMER: Jennifer S.
 # DATE CREATED: 04/19/2018                                  
-# REVISED DATE: 
+# REVISED DATE: October 18, 2026 - matching done by label_matcher.py
 # PURPOSE: Alternative Programming of classify_images function using in 
 #          operation to simply function
 #
@@ -20,6 +20,9 @@ from os import listdir
 # Imports classifier function for using CNN to classify images 
 from classifier import classifier 
 
+# Imports the matcher of pet image labels & classifier labels
+from label_matcher import load_label_matcher
+
 # Main program function defined below
 def main():
     # Sets path to folder that contains the pet images
@@ -112,6 +115,7 @@ def classify_images(images_dir, petlabel_dic, model):
     # Creates dictionary that will have all the results key = filename
     # value = list [Pet Label, Classifier Label, Match(1=yes,0=no)]
     results_dic = dict()
+    label_matcher = load_label_matcher('terms')
 
     # Process all files in the petlabels_dic - use images_dir to give fullpath
     for key in petlabel_dic:
@@ -126,49 +130,17 @@ def classify_images(images_dir, petlabel_dic, model):
        model_label = model_label.lower()
        model_label = model_label.strip()
       
-       # Put separate terms that 'may' compose the classifier label into a list so
-       # that each term is an item in the list.
-       model_label_list = model_label.split(", ")
-       
        # defines truth as pet image label 
        truth = petlabel_dic[key]
        
-       # If the pet image label is found within the classifier label list of terms 
-       # as an exact match to on of the terms in the list - then they are added to 
-       # results_dic as an exact match
-       if truth in model_label_list:
-           results_dic[key] = [truth, model_label, 1]
-            
-       # For those that aren't an exact term match to a term - checks if the pet_label
-       # is part of the term like: "poodle" matching to "standard poodle" OR 
-       # "cat" matching to "tabby cat" 
-       else:
-           # Sets found to False - IF pet image label is FOUND as part of a term within
-           # the list of classifier label terms then will be set to True
-           found = False
-           
-           # For loop to iterate through each term from model_label_list - splitting the
-           # the term into words where truth is compare to each word to see if there is
-           # a match - if so they are added to results_dic as a match and found = True
-           # and searching through the for loop is terminated using the break
-           for term in model_label_list:
-
-               # splits the term into a word list using split()
-               word_list = term.split(" ")
-
-               # if the pet image label hasn't been found AND it exists in the word list
-               # like 'poodle' in ['standard', 'poodle'] or 'cat' in ['tabby', 'cat']
-               # then found = True, the results are added to results_dic and break is
-               # used to break out of the for loop since a match was found
-               if (not found) and truth in word_list:
-                   found = True
-                   results_dic[key] = [truth, model_label, 1]
-                   break 
-
-           # If pet image label isn't found within the terms that exist in the list of labels
-           # the classifier function produces then set match = 0 (not a match)
-           if not found:
-               results_dic[key] = [truth, model_label, 0]
+       # If the pet image label is one of the terms of the classifier label
+       # (the terms are separated by ', ') OR one of the words of a term, like
+       # "poodle" matching to "standard poodle" OR "cat" matching to 
+       # "tabby cat", they are added to results_dic as a match (1), otherwise
+       # as not a match (0). The terms & words of each ImageNet label are 
+       # only split once, see label_matcher.py
+       match = int(label_matcher.matches_label(truth, model_label))
+       results_dic[key] = [truth, model_label, match]
                                   
     # Return results dictionary
     return(results_dic)
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/benchmark_classifier.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Reproducible throughput/latency benchmark of the classifier. For
+#          every combination of image set, model architecture, backend (eager
+#          or compiled TorchScript graphs, see graph_cache.py), batch size,
+#          thread count and decode thread count it measures images/sec, the per-image latency
+#          distribution, peak resident memory (RSS) and cold-start time (from
+#          launching the process until the model is ready). Each combination runs in
+#          a fresh Python process so that cold start & peak RSS aren't
+#          affected by earlier runs. Results are written to a JSON file that
+#          can be compared with an earlier run (--baseline) to catch
+#          performance regressions.
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python benchmark_classifier.py --dir <directory with images>
+#             --synthetic <count:widthxheight,...> --arch <model>
+#             --batch-sizes <sizes> --threads <counts> 
+#             --decode-threads <counts> --backends <backends>
+#             --output <json file>
+#   Example calls:
+#    python benchmark_classifier.py --arch all --batch-sizes 1,8,32 --threads 1,4
+#    python benchmark_classifier.py --arch resnet --decode-threads 0,2,4
+#    python benchmark_classifier.py --arch all --backends eager,torchscript
+#    python benchmark_classifier.py --synthetic 64:640x480,16:4000x3000 --dir ''
+#    python benchmark_classifier.py --output new.json --baseline old.json
+##
+
+# Imports python modules
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+from time import perf_counter
+
+# Line a worker process prints once its model is ready - the parent times
+# the cold start from launching the process until it reads this line
+READY_LINE = 'ready'
+
+# Seed used to generate the synthetic images so every run uses the same ones
+SYNTHETIC_SEED = 1234
+
+# Default folder the synthetic images are written to (and reused from)
+DEFAULT_SYNTHETIC_DIR = 'benchmark_images/'
+
+# Throughput drop (as a fraction) that is reported as a regression
+DEFAULT_TOLERANCE = 0.10
+
+
+# Main program function defined below
+def main():
+    # Creates & retrieves Command Line Arugments
+    in_arg = get_input_args()
+
+    # Runs a single benchmark configuration, read from stdin, in this
+    # process (used internally by the parent process below)
+    if in_arg.worker:
+        print(json.dumps(run_worker(json.load(sys.stdin))))
+        return
+
+    # Image sets to benchmark, key = name of the image set
+    image_sets = dict()
+    if in_arg.dir:
+        image_sets[in_arg.dir] = list_images(in_arg.dir)
+    for spec in parse_list(in_arg.synthetic):
+        image_sets['synthetic-' + spec] = make_synthetic_images(
+            spec, in_arg.synthetic_dir)
+
+    # Exports the compiled graphs first, so the cold start of the
+    # torchscript runs is the time to load them (not to export them)
+    archs = get_archs(in_arg.arch)
+    backends = parse_list(in_arg.backends)
+    if 'torchscript' in backends:
+        subprocess.check_call([sys.executable, 'graph_cache.py', '--arch',
+                               ','.join(archs)],
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    # Runs every configuration in a fresh process
+    results = list()
+    for (image_set, img_paths), arch, backend, batch_size, threads, \
+            decode_threads in itertools.product(
+                image_sets.items(), archs, backends,
+                [int(size) for size in parse_list(in_arg.batch_sizes)],
+                [int(count) for count in parse_list(in_arg.threads)],
+                [int(count) for count in parse_list(in_arg.decode_threads)]):
+        config = {'image_set': image_set, 'img_paths': img_paths,
+                  'arch': arch, 'backend': backend, 'batch_size': batch_size,
+                  'threads': threads, 'decode_threads': decode_threads,
+                  'repeat': in_arg.repeat, 'fast_decode': in_arg.fast_decode}
+        result = run_config(config)
+        print_result(result)
+        results.append(result)
+
+    # Saves the results in a stable (diffable) format
+    report = {'machine': get_machine_info(), 'results': results}
+    with open(in_arg.output, 'w') as outfile:
+        json.dump(report, outfile, indent=2, sort_keys=True)
+    print("\nResults saved to", in_arg.output)
+
+    # Compares with an earlier run if requested
+    if in_arg.baseline:
+        with open(in_arg.baseline) as infile:
+            baseline = json.load(infile)
+        n_regressions = compare_reports(baseline, report, in_arg.tolerance)
+        if n_regressions:
+            sys.exit(1)
+
+
+# Functions defined below
+def get_input_args():
+    """
+    Retrieves and parses the command line arguments created and defined using
+    the argparse module. This function returns these arguments as an
+    ArgumentParser object.
+    Parameters:
+     None - simply using argparse module to create & store command line arguments
+    Returns:
+     parse_args() -data structure that stores the command line arguments object
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dir', type=str, default='pet_images/',
+                        help="folder of real images to benchmark ('' for none)")
+    parser.add_argument('--synthetic', type=str, default='',
+                        help='synthetic image sets as count:widthxheight, '
+                             'separated by commas')
+    parser.add_argument('--synthetic-dir', type=str,
+                        default=DEFAULT_SYNTHETIC_DIR,
+                        help='folder the synthetic images are written to')
+    parser.add_argument('--arch', type=str, default='all',
+                        help='chosen model(s), separated by commas or all')
+    parser.add_argument('--batch-sizes', type=str, default='1,8,32',
+                        help='batch sizes to benchmark, separated by commas')
+    parser.add_argument('--threads', type=str, default='0',
+                        help='torch thread counts to benchmark, separated by '
+                             'commas (0 = PyTorch default)')
+    parser.add_argument('--decode-threads', type=str, default='0',
+                        help='image decode thread counts to benchmark, '
+                             'separated by commas (0 = decode on the main '
+                             'thread)')
+    parser.add_argument('--backends', type=str, default='eager',
+                        help='backends to benchmark, separated by commas: '
+                             'eager torchscript')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of timed passes over each image set')
+    parser.add_argument('--fast-decode', action='store_true',
+                        help='decode JPEGs at reduced resolution')
+    parser.add_argument('--output', type=str, default='benchmark.json',
+                        help='JSON file the results are saved to')
+    parser.add_argument('--baseline', type=str, default='',
+                        help='earlier results JSON file to compare against')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='throughput drop reported as a regression')
+    parser.add_argument('--worker', action='store_true',
+                        help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def parse_list(value):
+    """
+    Splits a comma separated command line argument into a list of strings.
+    """
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def get_archs(arch):
+    """
+    Returns the list of model architectures for the --arch argument, without
+    importing torch into the parent process.
+    """
+    all_archs = ['resnet', 'alexnet', 'vgg']
+    return all_archs if arch == 'all' else parse_list(arch)
+
+
+def list_images(image_dir):
+    """
+    Returns the sorted paths of the image files in image_dir (skipping
+    hidden files like .DS_Store).
+    """
+    return [os.path.join(image_dir, filename)
+            for filename in sorted(os.listdir(image_dir))
+            if filename[0] != '.']
+
+
+def make_synthetic_images(spec, synthetic_dir):
+    """
+    Creates (or reuses) a reproducible set of random-noise JPEG images.
+    Parameters:
+     spec - image set as count:widthxheight, e.g. 64:640x480 (string)
+     synthetic_dir - folder the images are written to (string)
+    Returns:
+     img_paths - List of paths to the images (list)
+    """
+    from PIL import Image
+
+    count, size = spec.split(':')
+    width, height = [int(value) for value in size.lower().split('x')]
+    os.makedirs(synthetic_dir, exist_ok=True)
+
+    img_paths = list()
+    for idx in range(int(count)):
+        img_path = os.path.join(synthetic_dir, 'synthetic_%dx%d_%04d.jpg'
+                                % (width, height, idx))
+
+        # Only writes images that don't already exist - each image depends
+        # only on its size & index, so existing files are identical
+        if not os.path.exists(img_path):
+            rng = random.Random('%d-%d-%d-%d' % (SYNTHETIC_SEED, width,
+                                                 height, idx))
+            pixels = rng.randbytes(width * height * 3)
+            Image.frombytes('RGB', (width, height), pixels).save(img_path,
+                                                                 quality=90)
+        img_paths.append(img_path)
+    return img_paths
+
+
+def get_machine_info():
+    """
+    Returns a description of the machine the benchmark ran on.
+    """
+    return {'hostname': platform.node(), 'platform': platform.platform(),
+            'processor': platform.processor(), 'cpu_count': os.cpu_count(),
+            'python': platform.python_version()}
+
+
+def run_config(config):
+    """
+    Runs one benchmark configuration in a fresh Python process. The
+    configuration is sent on the process's stdin, as its list of images can
+    be longer than a command line argument may be.
+    Parameters:
+     config - Dictionary describing the configuration (see main()) (dict)
+    Returns:
+     result - Dictionary with the configuration & its measurements (dict)
+    """
+    start = perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--worker'],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        cwd=os.path.dirname(os.path.abspath(__file__)))
+    process.stdin.write(json.dumps(config).encode())
+    process.stdin.close()
+
+    # Cold start = launching the process (interpreter startup & imports
+    # included) until the worker reports its model is ready
+    cold_start = None
+    lines = list()
+    for line in process.stdout:
+        if cold_start is None and line.strip() == READY_LINE.encode():
+            cold_start = perf_counter() - start
+        else:
+            lines.append(line)
+    process.stdout.close()
+    if process.wait():
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+
+    # The result is the last line printed by the worker
+    result = json.loads(lines[-1].decode())
+    result['cold_start_sec'] = cold_start
+    return result
+
+
+def run_worker(config):
+    """
+    Benchmarks one configuration in this (fresh) process, printing
+    READY_LINE once the model is loaded.
+    Parameters:
+     config - Dictionary describing the configuration (see main()) (dict)
+    Returns:
+     result - Dictionary with the configuration & its measurements (dict)
+    """
+    import torch
+    if config['threads'] > 0:
+        torch.set_num_threads(config['threads'])
+
+    from classifier import get_model, set_backend, classify_batch
+    from stage_timer import StageTimer
+    set_backend(config['backend'])
+
+    # Tells the parent the model is loaded & ready (see run_config())
+    get_model(config['arch'])
+    print(READY_LINE, flush=True)
+
+    # Warms up (first batches are slower) before the timed passes
+    img_paths = config['img_paths']
+    classify_batch(img_paths[:config['batch_size']], config['arch'],
+                   config['batch_size'], fast_decode=config['fast_decode'],
+                   decode_threads=config['decode_threads'])
+
+    # Timed passes over the whole image set
+    timer = StageTimer()
+    start = perf_counter()
+    for _ in range(config['repeat']):
+        classify_batch(img_paths, config['arch'], config['batch_size'],
+                       fast_decode=config['fast_decode'], timer=timer,
+                       decode_threads=config['decode_threads'])
+    elapsed = perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        peak_rss *= 1024
+
+    result = {key: config[key] for key in config if key != 'img_paths'}
+    result.update({'n_images': len(img_paths),
+                   'torch_threads': torch.get_num_threads(),
+                   'images_per_sec': len(img_paths) * config['repeat'] / elapsed,
+                   'latency_ms': {key: seconds * 1000.0 for key, seconds in
+                                  timer.latency_percentiles().items()},
+                   'stage_seconds': timer.stage_times,
+                   'peak_rss_mb': peak_rss / float(1 << 20)})
+    return result
+
+
+def get_result_key(result):
+    """
+    Returns the key identifying the configuration of a benchmark result.
+    """
+    # Results saved before decode threads & backends were benchmarked 
+    # decoded on the main thread & ran eager models
+    return (result['image_set'], result['arch'], result['batch_size'],
+            result['threads'], result.get('decode_threads', 0),
+            result.get('backend', 'eager'))
+
+
+def print_result(result):
+    """
+    Prints a one line summary of a benchmark result.
+    """
+    print("%-28s %-8s %-11s batch %3d threads %2d decode %2d: %7.1f img/s  "
+          "p50 %7.1f ms  p95 %7.1f ms  peak RSS %7.1f MB  cold start %5.2f s"
+          % (result['image_set'][:28], result['arch'], result['backend'],
+             result['batch_size'], result['threads'], result['decode_threads'],
+             result['images_per_sec'],
+             result['latency_ms']['p50'], result['latency_ms']['p95'],
+             result['peak_rss_mb'], result['cold_start_sec']))
+
+
+def compare_reports(baseline, report, tolerance):
+    """
+    Prints the change in throughput & p95 latency of every configuration that
+    is in both reports, flagging throughput drops larger than tolerance.
+    Parameters:
+     baseline - earlier benchmark report (dict)
+     report - current benchmark report (dict)
+     tolerance - throughput drop (as a fraction) flagged as a regression (float)
+    Returns:
+     n_regressions - number of configurations flagged as regressions (int)
+    """
+    baseline_results = {get_result_key(result): result
+                        for result in baseline['results']}
+    n_regressions = 0
+
+    print("\n*** Comparison with baseline ***")
+    for result in report['results']:
+        key = get_result_key(result)
+        if key not in baseline_results:
+            continue
+        old = baseline_results[key]
+        change = (result['images_per_sec'] / old['images_per_sec']) - 1.0
+        regression = change < -tolerance
+        n_regressions += regression
+        print("%-28s %-8s %-11s batch %3d threads %2d decode %2d: img/s "
+              "%+6.1f%%  p95 %+7.1f ms%s"
+              % (key[0][:28], key[1], key[5], key[2], key[3], key[4],
+                 change * 100.0,
+                 result['latency_ms']['p95'] - old['latency_ms']['p95'],
+                 '  ** REGRESSION **' if regression else ''))
+
+    print("\n%d regression(s) found" % n_regressions)
+    return n_regressions
+
+
+# Call to main function to run the program
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@
 # PROGRAMMER: Melanie Burns
 # DATE CREATED: April 30, 2018
 # REVISED DATE: May 20, 2018 Finished the lab
+# REVISED DATE: October 18, 2026 Removed sleep() from the runtime, added
+#               stage timings
 # PURPOSE: Check images & report results: read them in, predict their
 #          content (classifier), compare prediction to actual value labels
 #          and output results
@@ -18,12 +20,23 @@
 
 # Imports python modules
 import argparse
-from time import time, sleep
-from os import listdir
+from time import time, perf_counter
 
 # Imports classifier function for using CNN to classify images 
 from classifier import classifier 
 
+# Imports the timer that records how long each stage of the program takes
+from stage_timer import StageTimer
+
+# Imports the compiled table of which labels are dogs
+from dog_table import load_dog_table
+
+# Imports the matcher of pet image labels & classifier labels
+from label_matcher import load_label_matcher
+
+# Imports the lazy walker of image folders & the pet label parser
+from image_walker import walk_images
+
 # Main program function defined below
 def main():
     # collecting start time
@@ -31,36 +44,45 @@ def main():
     
     # line arguments
     in_args = get_input_args()
+
+    # records the time spent in each stage below
+    timer = StageTimer()
     
     # creating a dictionary with key=filename and value=file label to be used
     # to check the accuracy of the classifier function
-    answers_dic = get_pet_labels(image_dir=in_args.dir)
+    with timer.stage('label parsing'):
+        answers_dic = get_pet_labels(image_dir=in_args.dir)
     
     # create the classifier 
     # labels with the classifier function uisng in_arg.arch, comparing the 
     # labels, and creating a dictionary of results (result_dic)
-    result_dic = classify_images(images_dir=in_args.dir, 
-                                 petlabel_dic=answers_dic,
-                                 model=in_args.arch)
+    with timer.stage('classification'):
+        result_dic = classify_images(images_dir=in_args.dir, 
+                                     petlabel_dic=answers_dic,
+                                     model=in_args.arch, timer=timer)
     
     # adjust the results
     # dictionary(result_dic) to determine if classifier correctly classified
     # images as 'a dog' or 'not a dog'. This demonstrates if the model can
     # correctly classify dog images as dogs (regardless of breed)
-    adjust_results4_isadog(result_dic, dogfile=in_args.dogfile)
+    with timer.stage('dog adjustment'):
+        adjust_results4_isadog(result_dic, dogfile=in_args.dogfile)
 
     # TODO: 6. Define calculates_results_stats() function to calculate
     # results of run and puts statistics in a results statistics
     # dictionary (results_stats_dic)
-    results_stats_dic = calculates_results_stats(result_dic)
+    with timer.stage('stats'):
+        results_stats_dic = calculates_results_stats(result_dic)
 
     # TODO: 7. Define print_results() function to print summary results, 
     # incorrect classifications of dogs and breeds if requested.
     print_results(result_dic, results_stats_dic, model=in_args.arch,    
                   print_incorrect_dogs=True, print_incorrect_breeds=True)
 
+    # prints where the time went
+    timer.print_summary()
+
     # by collecting end time
-    sleep(20)
     end_time = time()
 
     # seconds & prints it in hh:mm:ss format
@@ -124,14 +146,10 @@ def get_pet_labels(image_dir):
     """
     petlabels_dic = {}
     
-    # retrieves the file_names and converts to labels
-    for file_name in listdir(image_dir):
-        # loswers the filename and then splits on '_' 
-        word_list_pet_image = file_name.lower().split('_')
-        
-        # creates pet name labell, joins on spaces, and cleans it
-        # This splices all words EXCEPT the num sequense and the filetype
-        pet_label = ' '.join(word_list_pet_image[:-1]).strip()
+    # retrieves the image file_names (also in subfolders) and converts them
+    # to labels - lowers the filename, joins all words EXCEPT the num 
+    # sequence and the filetype on spaces, and cleans it
+    for file_name, pet_label in walk_images(image_dir, rule='prefix'):
         
         # places filenames and labels in the dic to return
         if file_name not in petlabels_dic:
@@ -142,7 +160,7 @@ def get_pet_labels(image_dir):
     return petlabels_dic
       
  
-def classify_images(images_dir, petlabel_dic, model):
+def classify_images(images_dir, petlabel_dic, model, timer=None):
     """
     Creates classifier labels with classifier function, compares labels, and 
     creates a dictionary containing both labels and comparison of them to be
@@ -160,6 +178,8 @@ def classify_images(images_dir, petlabel_dic, model):
                      label is lowercase with space between each word in label 
       model - pretrained CNN whose architecture is indicated by this parameter,
               values must be: resnet alexnet vgg (string)
+      timer - optional StageTimer that records how long each image took to 
+              classify (StageTimer)
      Returns:
       results_dic - Dictionary with key as image filename and value as a List 
              (index)idx 0 = pet image label (string)
@@ -168,25 +188,22 @@ def classify_images(images_dir, petlabel_dic, model):
                     classifer labels and 0 = no match between labels
     """
     results_dic = {} 
+    label_matcher = load_label_matcher()
    
     # Classifies each pet_image
     for pet_image, pet_label in petlabel_dic.items():
         # Gets classification label using the given model
-        classifier_label = classifier(images_dir+'/'+pet_image, model).lower().strip()
+        image_start = perf_counter()
+        classifier_label, class_id = classifier(images_dir+'/'+pet_image, model,
+                                                return_class_id=True)
+        classifier_label = classifier_label.lower().strip()
+        if timer is not None:
+            timer.add_image_latencies([perf_counter() - image_start])
 
-        # Does the pet_label and the classified match? 
-        match_results = 0
-        found_index = classifier_label.find(pet_label) 
-        
-        # TODO this needs to be cleaner
-        # checks that it was found
-        if found_index >= 0:
-            # rules out false positives for a single term
-            if found_index == 0 and len(pet_label) == len(classifier_label):
-                match_results = 1
-            # rules out false positives for multiple terms
-            elif (found_index == 0 or classifier_label[found_index-1] == " ") and ((found_index+len(pet_label) == len(classifier_label)) or ((classifier_label[found_index+len(pet_label):found_index+len(pet_label)+1]) in (' ', ','))):
-                match_results = 1
+        # Does the pet_label and the classified match? The pet label has to
+        # be found as whole word(s) in the classifier label, see 
+        # label_matcher.py
+        match_results = int(label_matcher.matches(pet_label, class_id))
         
         # Crreates the results directory 
         if pet_image not in results_dic:
@@ -226,32 +243,20 @@ def adjust_results4_isadog(results_dic, dogfile):
            None - results_dic is mutable data type so no return needed.
     """           
     
-    # Reads in valid dog names
-    dog_names_set = set()
-    with open(dogfile) as dogfile_lines:
-        for line in dogfile_lines:
-            dog_names = line.split(',')
-            for dog_name in dog_names:
-                dog_name = dog_name.strip()
-                dog_names_set.add(dog_name)
-    
-    # Test is a dog
-    for key, results in results_dic.items():
-        image_is_a_dog = 0
-        classifier_is_a_dog = 0
-        
-        # Pet Image label 'is a' dog
-        if results[0] in dog_names_set:
-           image_is_a_dog = 1
-            
-        # Classifier label 'is a' dog
-        for class_label_name in results[1].split(','):
-            if class_label_name.strip() in dog_names_set:
-                classifier_is_a_dog = 1
-                break
+    # Compiles the valid dog names once (each line split on commas) into a
+    # table of which ImageNet class ids are dogs 
+    dog_table = load_dog_table(dogfile, split_terms=True)
+
+    # Test is a dog - all the pet labels & classifier labels in one go
+    keys = list(results_dic)
+    pet_dogs = dog_table.pet_labels_are_dogs([results_dic[key][0] for key in keys])
+    classifier_dogs = dog_table.classifier_labels_are_dogs(
+                          [results_dic[key][1] for key in keys])
         
-        # extends the results list
-        results_dic[key].extend((image_is_a_dog, classifier_is_a_dog))
+    # extends the results lists
+    for key, image_is_a_dog, classifier_is_a_dog in zip(keys, pet_dogs.tolist(),
+                                                        classifier_dogs.tolist()):
+        results_dic[key].extend((int(image_is_a_dog), int(classifier_is_a_dog)))
 
 
 def calculates_results_stats(results_dic):
@@ -32,11 +32,13 @@
 # Imports python modules
 import argparse
 from time import time, sleep
-from os import listdir
 
 # Imports classifier function for using CNN to classify images 
 from classifier import classifier 
 
+# Imports the lazy walker of image folders
+from image_walker import walk_image_files
+
 # Imports print functions that check the lab
 from print_functions_for_lab_checks import *
 
@@ -144,8 +146,8 @@ def get_pet_labels(image_dir):
      petlabels_dic - Dictionary storing image filename (as key) and Pet Image
                      Labels (as value)  
     """
-    # Creates list of files in directory
-    in_files = listdir(image_dir)
+    # Creates list of the image files in directory (and its subfolders)
+    in_files = list(walk_image_files(image_dir))
     
     # Processes each of the files to create a dictionary where the key
     # is the filename and the value is the picture label (below).
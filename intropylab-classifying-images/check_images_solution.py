@@ -15,15 +15,68 @@
 #             --dogfile <file that contains dognames>
 #   Example call:
 #    python check_images_solution.py --dir pet_images/ --arch vgg --dogfile dognames.txt
+#   Several models can be run in one call (images are only read in once):
+#    python check_images_solution.py --dir pet_images/ --arch resnet,alexnet,vgg
+#    python check_images_solution.py --dir pet_images/ --arch all
+#   Results can be streamed a batch at a time (for very large folders):
+#    python check_images_solution.py --dir pet_images/ --arch all --stream
+#   Several runs sharing a host can each be limited to their share of cores:
+#    python check_images_solution.py --dir pet_images/ --arch vgg --threads 2
+#   A cascade of models calibrated by model_cascade.py can be used instead:
+#    python check_images_solution.py --dir pet_images/ --cascade
+#   Breeds can be identified with the final layer restricted to the dogs:
+#    python check_images_solution.py --dir pet_images/ --arch vgg --vocabulary dogs
+#   The forward passes can be profiled layer by layer:
+#    python check_images_solution.py --dir pet_images/ --arch all --profile
 ##
 
 # Imports python modules
 import argparse
+import sys
 from time import time, sleep
-from os import listdir
+from os import path, cpu_count
 
-# Imports classifier function for using CNN to classify images 
-from classifier import classifier 
+import numpy as np
+
+# Imports classifier functions for using CNN to classify images 
+from classifier import (classify_batch_ids_multi, classify_packed_ids_multi,
+                        model_builders, set_weights_dir, set_precision,
+                        set_backend, set_vocabulary, set_profiler,
+                        label_index, DEFAULT_BATCH_SIZE,
+                        PRECISIONS, BACKENDS)
+
+# Imports the reader of packed (already cropped) image files
+from pack_images import PackedImages
+
+# Imports the lazy walker of image folders & the pet label parser
+from image_walker import walk_images, load_label_parser
+
+# Imports the classifying with a pool of worker processes
+from worker_pool import classify_ids_workers, classify_packed_ids_workers
+
+# Imports the control of torch's thread pools & the batch size auto-tuning
+from thread_tuning import set_threads, autotune
+
+# Imports the layer level profiler of the forward passes
+from layer_profiler import LayerProfiler
+
+# Imports the on-disk cache of classifier predictions
+from prediction_cache import PredictionCache, DEFAULT_CACHE_FILENAME
+
+# Imports the timer that records how long each stage of the program takes
+from stage_timer import StageTimer
+
+# Imports the compiled table of which labels are dogs
+from dog_table import load_dog_table
+
+# Imports the matcher of pet image labels & classifier labels
+from label_matcher import load_label_matcher
+
+# Imports the columnar container of the results of a model
+from results_store import ResultsStore
+
+# Imports the mergeable counts behind the results statistics
+from partial_stats import PartialStats
 
 # Imports print functions that check the lab
 from print_functions_for_lab_checks import *
@@ -39,45 +92,144 @@ def main():
     # Function that checks command line arguments using in_arg 
     check_command_line_arguments(in_arg)
 
-    
-    # Creates Pet Image Labels by creating a dictionary 
-    answers_dic = get_pet_labels(in_arg.dir)
-
-    # Function that checks Pet Images Dictionary- answers_dic    
-    check_creating_pet_image_labels(answers_dic)
+    # Records the time spent in each stage below & on each image
+    timer = StageTimer()
 
     
-    # Creates Classifier Labels with classifier function, Compares Labels, 
-    # and creates a results dictionary 
-    result_dic = classify_images(in_arg.dir, answers_dic, in_arg.arch)
+    # Models to run & where their weights & cached predictions come from
+    archs = get_archs(in_arg.arch)
+    if in_arg.weights:
+        set_weights_dir(in_arg.weights)
+    set_precision(in_arg.precision, in_arg.calibration_dir or in_arg.dir)
+    set_backend(in_arg.backend, in_arg.graph_dir)
+
+    # Restricts the predictions to the dog breeds (or another label file's
+    # classes) if requested - 'dogs' is the --dogfile
+    if in_arg.vocabulary:
+        set_vocabulary(in_arg.dogfile if in_arg.vocabulary == 'dogs' 
+                       else in_arg.vocabulary)
+
+    # Classifies with the calibrated cascade of models instead if requested
+    # (imported here as model_cascade.py imports this program's stages)
+    cascade = None
+    if in_arg.cascade is not None:
+        from model_cascade import load_cascade, classify_images_cascade
+        try:
+            cascade = load_cascade(in_arg.cascade)
+        except (ValueError, FileNotFoundError) as error:
+            # Reported like the other checks of the arguments
+            sys.exit("check_images_solution.py: error: --cascade: " +
+                     str(error))
+        archs = cascade['models']
+
+    # Limits the torch threads of this process (or of each worker process) &
+    # replaces the batch size & thread count with the fastest ones on this 
+    # host if requested (probed on the first run, then cached)
+    set_threads(in_arg.threads, in_arg.interop_threads)
+    if in_arg.autotune:
+        tuned = autotune(archs, in_arg.dir, in_arg.threads or
+                         max(1, (cpu_count() or 1) // max(1, in_arg.workers)))
+        in_arg.batch_size = tuned['batch_size']
+        set_threads(tuned['threads'])
+        print("Auto-tuned: batch size", tuned['batch_size'], "threads",
+              tuned['threads'])
+    cache = get_prediction_cache(in_arg.cache, in_arg.dir)
+
+    # Profiles every forward pass (layer by layer) if requested
+    profiler = None
+    if in_arg.profile is not None:
+        profiler = LayerProfiler()
+        set_profiler(profiler)
+
+    # Streams the images through all the stages a batch at a time, printing
+    # each batch's results as soon as it's done (see stream_pipeline.py)
+    if in_arg.stream:
+        # Imported here as stream_pipeline.py imports this program's stages
+        from stream_pipeline import run_stream
+        run_stream(in_arg.dir, archs, in_arg.dogfile, in_arg.batch_size,
+                   cache, in_arg.fast_decode, timer, in_arg.decode_threads)
+        if in_arg.timings is not None:
+            timer.print_summary()
+
+    # Otherwise runs each stage over all the images before the next one
+    else:
+        # Opens the packed file of already cropped images if one was given
+        packed = PackedImages(in_arg.packed) if in_arg.packed else None
 
-    # Function that checks Results Dictionary - result_dic    
-    check_classifying_images(result_dic)    
+        # Creates Pet Image Labels by creating a dictionary 
+        with timer.stage('label parsing'):
+            answers_dic = get_pet_labels(in_arg.dir, 
+                                         packed.filenames if packed else None)
+
+        # Function that checks Pet Images Dictionary- answers_dic    
+        check_creating_pet_image_labels(answers_dic)
 
     
-    # Adjusts the results dictionary to determine if classifier correctly 
-    # classified images as 'a dog' or 'not a dog'. This demonstrates if 
-    # model can correctly classify dog images as dogs (regardless of breed)
-    adjust_results4_isadog(result_dic, in_arg.dogfile)
+        # Creates Classifier Labels with classifier function, Compares Labels, 
+        # and creates a results dictionary for each of the requested models
+        # - or one for the answers of the cascade
+        if cascade is not None:
+            result_dics = {'cascade': classify_images_cascade(
+                               in_arg.dir, answers_dic, cascade,
+                               in_arg.batch_size, in_arg.fast_decode, timer,
+                               in_arg.decode_threads)}
+            archs = ['cascade']
+        else:
+            result_dics = classify_images_multi(in_arg.dir, answers_dic, archs,
+                                                in_arg.batch_size, cache,
+                                                in_arg.fast_decode, timer,
+                                                packed, in_arg.decode_threads,
+                                                in_arg.workers)
 
-    # Function that checks Results Dictionary for is-a-dog adjustment- result_dic  
-    check_classifying_labels_as_dogs(result_dic)
+        # Checks, adjusts, calculates & prints the results of each model
+        for arch in archs:
+            result_dic = result_dics[arch]
 
-    
-    # Calculates results of run and puts statistics in results_stats_dic
-    results_stats_dic = calculates_results_stats(result_dic)
+            # Function that checks Results Dictionary - result_dic    
+            check_classifying_images(result_dic)    
 
-    # Function that checks Results Stats Dictionary - results_stats_dic  
-    check_calculating_results(result_dic, results_stats_dic)
+        
+            # Adjusts the results dictionary to determine if classifier correctly 
+            # classified images as 'a dog' or 'not a dog'. This demonstrates if 
+            # model can correctly classify dog images as dogs (regardless of breed)
+            with timer.stage('dog adjustment'):
+                adjust_results4_isadog(result_dic, in_arg.dogfile)
 
+            # Function that checks Results Dictionary for is-a-dog adjustment- result_dic  
+            check_classifying_labels_as_dogs(result_dic)
 
-    # Prints summary results, incorrect classifications of dogs
-    # and breeds if requested
-    print_results(result_dic, results_stats_dic, in_arg.arch, True, True)
+        
+            # Calculates results of run and puts statistics in results_stats_dic
+            with timer.stage('stats'):
+                results_stats_dic = calculates_results_stats(result_dic)
+
+            # Function that checks Results Stats Dictionary - results_stats_dic  
+            check_calculating_results(result_dic, results_stats_dic)
+
+
+            # Prints summary results, incorrect classifications of dogs
+            # and breeds if requested - and after the last model the stage 
+            # timings if requested
+            print_timer = None
+            if in_arg.timings is not None and arch == archs[-1]:
+                print_timer = timer
+            print_results(result_dic, results_stats_dic, arch, True, True,
+                          print_timer)
+
+    # Saves the stage timings if a file was given
+    if in_arg.timings:
+        timer.save(in_arg.timings)
+
+    # Prints & saves the layer profile (and the traces of the slowest 
+    # forward passes) if requested
+    if profiler is not None:
+        set_profiler(None)
+        print(profiler.format_table())
+        print("Profile saved to", ', '.join(profiler.save(in_arg.profile)))
     
     # Measure total program runtime by collecting end time
     end_time = time()
-    
+
     # Computes overall runtime in seconds & prints it in hh:mm:ss format
     tot_time = end_time - start_time
     print("\n** Total Elapsed Runtime:",
@@ -100,33 +252,203 @@ def get_input_args():
     # Creates parse 
     parser = argparse.ArgumentParser()
 
-    # Creates 3 command line arguments args.dir for path to images files,
+    # Creates 22 command line arguments args.dir for path to images files,
     # args.arch which CNN model to use for classification, args.labels path to
-    # text file with names of dogs.
+    # text file with names of dogs, args.batch_size number of images the CNN
+    # classifies at once, args.cache path to the prediction cache file,
+    # args.fast_decode whether JPEGs are decoded at reduced resolution,
+    # args.timings whether (& where) to report the stage timings, 
+    # args.weights local directory of pretrained weights, args.packed path
+    # to a packed file of already cropped images, args.stream whether the
+    # images are streamed through the stages a batch at a time, 
+    # args.decode_threads number of threads decoding images ahead, 
+    # args.workers number of worker processes classifying the images, 
+    # args.precision precision the models run at, args.calibration_dir 
+    # folder of images the int8 quantization is calibrated on, args.backend
+    # whether the models run as compiled graphs, args.graph_dir folder of the
+    # compiled graph files, args.threads & args.interop_threads number of 
+    # threads torch uses within & across operations, args.autotune whether
+    # the fastest batch size & thread count on this host are used, 
+    # args.cascade file of the calibrated cascade of models to classify with,
+    # args.vocabulary the classes the predictions are restricted to, 
+    # args.profile folder the layer profile of the forward passes is saved to.
     parser.add_argument('--dir', type=str, default='pet_images/', 
                         help='path to folder of images')
     parser.add_argument('--arch', type=str, default='vgg', 
-                        help='chosen model')
+                        help='chosen model, several models separated by '
+                             'commas or all')
     parser.add_argument('--dogfile', type=str, default='dognames.txt',
                         help='text file that has dognames')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='number of images classified per forward pass')
+    parser.add_argument('--cache', type=str, nargs='?', const='',
+                        help='reuse & save predictions in this cache file '
+                             '(default file in the image folder if no file '
+                             'is given)')
+    parser.add_argument('--fast-decode', action='store_true',
+                        help='decode JPEGs at reduced resolution before '
+                             'resizing')
+    parser.add_argument('--timings', type=str, nargs='?', const='',
+                        help='print the time spent in each stage & per-image '
+                             'latency percentiles, and save them to this '
+                             'JSON file if one is given')
+    parser.add_argument('--weights', type=str, default='',
+                        help='local weights directory to load the pretrained '
+                             'weights from (see weight_store.py)')
+    parser.add_argument('--packed', type=str, default='',
+                        help='packed file of cropped images to classify '
+                             'instead of the images in --dir (see '
+                             'pack_images.py)')
+    parser.add_argument('--decode-threads', type=int, default=0,
+                        help='number of threads that decode images ahead of '
+                             'the forward pass (0 = decode on the main '
+                             'thread)')
+    parser.add_argument('--stream', action='store_true',
+                        help='stream the images through all the stages a '
+                             'batch at a time, printing results as each '
+                             'batch finishes (skips the lab checks)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='number of worker processes classifying the '
+                             'images, each with its own copy of the models '
+                             '(0 = classify in this process)')
+    parser.add_argument('--precision', type=str, default='fp32',
+                        choices=PRECISIONS,
+                        help='precision the models run at - int8 quantizes '
+                             'them for faster CPU inference (see quantize.py)')
+    parser.add_argument('--calibration-dir', type=str, default='',
+                        help='folder of images the int8 quantization is '
+                             'calibrated on (default: --dir)')
+    parser.add_argument('--backend', type=str, default='eager',
+                        choices=BACKENDS,
+                        help='torchscript runs the models as compiled graphs, '
+                             'exported to --graph-dir on first use (see '
+                             'graph_cache.py)')
+    parser.add_argument('--graph-dir', type=str, default='',
+                        help='folder of the compiled graph files (default: '
+                             'compiled_models/)')
+    parser.add_argument('--threads', type=int, default=0,
+                        help='number of threads torch uses within an '
+                             'operation, per worker with --workers (0 = '
+                             'PyTorch default, all the cores) - lower it when '
+                             'several runs share the host')
+    parser.add_argument('--interop-threads', type=int, default=0,
+                        help='number of threads torch runs independent '
+                             'operations on (0 = PyTorch default)')
+    parser.add_argument('--autotune', action='store_true',
+                        help='use the fastest batch size & thread count (up '
+                             'to --threads) for the models on this host, '
+                             'probed on first use & cached in '
+                             'thread_tuning.json (see thread_tuning.py)')
+    parser.add_argument('--cascade', type=str, nargs='?', const='cascade.json',
+                        help='classify with a cascade of models calibrated '
+                             'by model_cascade.py - cheapest model first, '
+                             'passing on the images it is unsure of - read '
+                             'from this file (default: cascade.json); '
+                             'replaces --arch')
+    parser.add_argument('--vocabulary', type=str, default='',
+                        help='only predict these classes: dogs (the breeds '
+                             'of --dogfile) or a label file in the same '
+                             'format - the final layer of the models only '
+                             'computes their logits (see restricted_head.py)')
+    parser.add_argument('--profile', type=str, nargs='?', const='profile/',
+                        help='profile the forward passes layer by layer, '
+                             'printing the time, FLOPs & memory of each '
+                             'layer & operator and saving them with Chrome '
+                             'traces of the slowest passes to this folder '
+                             '(default: profile/, see layer_profiler.py)')
 
     # returns parsed argument collection
-    return parser.parse_args()
+    in_arg = parser.parse_args()
+    if in_arg.stream and in_arg.packed:
+        parser.error('--stream reads the images in --dir, it can\'t be '
+                     'combined with --packed')
+    if in_arg.stream and in_arg.workers:
+        parser.error('--stream classifies in this process, it can\'t be '
+                     'combined with --workers')
+    if in_arg.cascade is not None and (in_arg.stream or in_arg.packed or 
+                                       in_arg.workers or 
+                                       in_arg.cache is not None):
+        parser.error('--cascade reads & classifies the images in --dir in '
+                     'this process, it can\'t be combined with --stream, '
+                     '--packed, --workers or --cache')
+    if in_arg.profile is not None and in_arg.workers:
+        parser.error('--profile profiles the forward passes of this process, '
+                     'it can\'t be combined with --workers')
+    return in_arg
+
+
+def get_prediction_cache(cache_arg, image_dir):
+    """
+    Opens the prediction cache requested by the --cache command line argument.
+    Parameters:
+     cache_arg - value of the --cache command line argument, None when not 
+                 given and '' when given without a filename (string)
+     image_dir - The (full) path to the folder of images (string)
+    Returns:
+     cache - PredictionCache to use, or None if no cache was requested
+    """
+    if cache_arg is None:
+        return None
+
+    # Without a filename the cache file lives next to the images
+    if cache_arg == '':
+        cache_arg = path.join(image_dir, DEFAULT_CACHE_FILENAME)
+    return PredictionCache(cache_arg)
 
 
-def get_pet_labels(image_dir):
+def get_archs(arch):
+    """
+    Converts the --arch command line argument into the list of CNN model 
+    architectures to run. The argument can be a single model name, several 
+    model names separated by commas, or 'all' for every model.
+    Parameters:
+     arch - value of the --arch command line argument (string)
+    Returns:
+     archs - List of model architectures to run, in the order given (list)
+    """
+    # 'all' runs every model that classifier.py can build
+    if arch == 'all':
+        return list(model_builders)
+
+    # Splits on commas, skipping blanks & repeated model names
+    archs = list()
+    for name in arch.split(','):
+        name = name.strip()
+        if name and name not in archs:
+            archs.append(name)
+
+    # Stops early with a clear error rather than after classifying images
+    for name in archs:
+        if name not in model_builders:
+            raise SystemExit("Unknown model architecture '{0}', values must "
+                             "be: {1} or all".format(name, 
+                                                     ' '.join(model_builders)))
+    return archs
+
+
+def get_pet_labels(image_dir, in_files=None):
     """
     Creates a dictionary of pet labels based upon the filenames of the image 
     files. This is used to check the accuracy of the image classifier model.
+    The images in the subfolders of image_dir are included too, with their
+    path relative to image_dir as key.
     Parameters:
      image_dir - The (full) path to the folder of images that are to be
                  classified by pretrained CNN models (string)
+     in_files - optional List of the image filenames to use instead of 
+                listing image_dir, e.g. the filenames of a packed file (list)
     Returns:
      petlabels_dic - Dictionary storing image filename (as key) and Pet Image
                      Labels (as value)  
     """
-    # Creates list of files in directory
-    in_files = listdir(image_dir)
+    # Walks the image files in the directory (skipping hidden files like 
+    # .DS_Store of Mac OSX & files that aren't images) and extracts the pet 
+    # label of each from the words of its filename
+    if in_files is None:
+        labelled_files = walk_images(image_dir)
+    else:
+        labelled_files = ((filename, get_pet_label(filename))
+                          for filename in in_files if filename[0] != ".")
     
     # Processes each of the files to create a dictionary where the key
     # is the filename and the value is the picture label (below).
@@ -134,56 +456,45 @@ def get_pet_labels(image_dir):
     # Creates empty dictionary for the labels
     petlabels_dic = dict()
    
-    # Processes through each file in the directory, extracting only the words
-    # of the file that contain the pet image label
-    for idx in range(0, len(in_files), 1):
-       
-       # Skips file if starts with . (like .DS_Store of Mac OSX) because it 
-       # isn't an pet image file
-       if in_files[idx][0] != ".":
-           
-           # Uses split to extract words of filename into list image_name 
-           image_name = in_files[idx].split("_")
-       
-           # Creates temporary label variable to hold pet label name extracted 
-           pet_label = ""
+    for filename, pet_label in labelled_files:
            
-           # Processes each of the character strings(words) split by '_' in 
-           # list image_name by processing each word - only adding to pet_label
-           # if word is all letters - then process by putting blanks between 
-           # these words and putting them in all lowercase letters
-           for word in image_name:
-               
-               # Only add to pet_label if word is all letters add blank at end
-               if word.isalpha():
-                   pet_label += word.lower() + " "
-                   
-           # strips off trailing whitespace
-           pet_label = pet_label.strip()
-           
-           # If filename doesn't already exist in dictionary add it and it's
-           # pet label - otherwise print an error message because indicates 
-           # duplicate files (filenames)
-           if in_files[idx] not in petlabels_dic:
-              petlabels_dic[in_files[idx]] = pet_label
+        # If filename doesn't already exist in dictionary add it and it's
+        # pet label - otherwise print an error message because indicates 
+        # duplicate files (filenames)
+        if filename not in petlabels_dic:
+            petlabels_dic[filename] = pet_label
               
-           else:
-               print("Warning: Duplicate files exist in directory", 
-                     in_files[idx])
+        else:
+            print("Warning: Duplicate files exist in directory", filename)
  
     # returns dictionary of labels
     return(petlabels_dic)
 
 
-def classify_images(images_dir, petlabel_dic, model):
+def get_pet_label(filename):
+    """
+    Extracts the pet image label from an image filename, e.g. 
+    'Boston_terrier_02259.jpg' -> 'boston terrier'.
+    Parameters:
+     filename - pet image filename (string)
+    Returns:
+     pet_label - lowercase pet image label (string)
+    """
+    # Joins the words of the filename (split by '_') that are all letters, 
+    # with blanks between them & in all lowercase letters (see image_walker.py)
+    return load_label_parser().parse(filename)
+
+
+def classify_images(images_dir, petlabel_dic, model,
+                    batch_size=DEFAULT_BATCH_SIZE, cache=None, 
+                    fast_decode=False, timer=None, decode_threads=0):
     """
     Creates classifier labels with classifier function, compares labels, and 
     creates a dictionary containing both labels and comparison of them to be
     returned.
-     PLEASE NOTE: This function uses the classifier() function defined in 
-     classifier.py within this function. The proper use of this function is
-     in test_classifier.py Please refer to this program prior to using the 
-     classifier() function to classify images in this function 
+     PLEASE NOTE: This function uses the classify_batch() function defined in
+     classifier.py within this function, which classifies the images in 
+     batches rather than calling classifier() one image at a time. 
      Parameters: 
       images_dir - The (full) path to the folder of images that are to be
                    classified by pretrained CNN models (string)
@@ -193,6 +504,16 @@ def classify_images(images_dir, petlabel_dic, model):
                      label is lowercase with space between each word in label 
       model - pretrained CNN whose architecture is indicated by this parameter,
               values must be: resnet alexnet vgg (string)
+      batch_size - number of images classified together in each forward pass
+                   of the model (int)
+      cache - optional PredictionCache, images with a cached prediction aren't
+              classified again (PredictionCache)
+      fast_decode - True decodes JPEGs at reduced resolution before resizing
+                    them (bool)
+      timer - optional StageTimer that records the time spent in each stage
+              of classifying the images (StageTimer)
+      decode_threads - number of threads decoding images ahead of the 
+                       forward pass, 0 decodes them on the main thread (int)
      Returns:
       results_dic - Dictionary with key as image filename and value as a List 
              (index)idx 0 = pet image label (string)
@@ -200,56 +521,105 @@ def classify_images(images_dir, petlabel_dic, model):
                     idx 2 = 1/0 (int)   where 1 = match between pet image and 
                     classifer labels and 0 = no match between labels
     """
-    # Creates dictionary that will have all the results key = filename
-    # value = list [Pet Label, Classifier Label, Match(1=yes,0=no)]
-    results_dic = dict()
-
-    # Process all files in the petlabels_dic - use images_dir to give fullpath
-    for key in petlabel_dic:
-       
-       # Runs classifier function to classify the images classifier function 
-       # inputs: path + filename  and  model, returns model_label 
-       # as classifier label
-       model_label = classifier(images_dir+key, model)
-       
-       # Processes the results so they can be compared with pet image labels
-       # set labels to lowercase (lower) and stripping off whitespace(strip)
-       model_label = model_label.lower()
-       model_label = model_label.strip()
-       
-       # defines truth as pet image label and trys to find it using find() 
-       # string function to find it within classifier label(model_label).
-       truth = petlabel_dic[key]
-       found = model_label.find(truth)
-       
-       # If found (0 or greater) then make sure true answer wasn't found within
-       # another word and thus not really found, if truely found then add to 
-       # results dictionary and set match=1(yes) otherwise as match=0(no)
-       if found >= 0:
-           if ( (found == 0 and len(truth)==len(model_label)) or
-                (  ( (found == 0) or (model_label[found - 1] == " ") )  and
-                   ( (found + len(truth) == len(model_label)) or   
-                      (model_label[found + len(truth): found+len(truth)+1] in 
-                     (","," ") ) 
-                   )      
-                )
-              ):
-               # found label as stand-alone term (not within label)
-               if key not in results_dic:
-                   results_dic[key] = [truth, model_label, 1]
-                   
-           # found within a word/term not a label existing on its own 
-           else:
-               if key not in results_dic:
-                   results_dic[key] = [truth, model_label, 0]
-                   
-       # if not found set results dictionary with match=0(no)
-       else:
-           if key not in results_dic:
-               results_dic[key] = [truth, model_label, 0]
-               
-    # Return results dictionary
-    return(results_dic)
+    return classify_images_multi(images_dir, petlabel_dic, [model], 
+                                 batch_size, cache, fast_decode, timer,
+                                 None, decode_threads)[model]
+
+
+def classify_images_multi(images_dir, petlabel_dic, models, 
+                          batch_size=DEFAULT_BATCH_SIZE, cache=None,
+                          fast_decode=False, timer=None, packed=None,
+                          decode_threads=0, workers=0):
+    """
+    Same as classify_images() but for several model architectures at once. 
+    Each image is only read in & preprocessed once and then classified by 
+    every model in models.
+     Parameters: 
+      images_dir - The (full) path to the folder of images that are to be
+                   classified by pretrained CNN models (string)
+      petlabel_dic - Dictionary that contains the pet image(true) labels
+                     (see classify_images())
+      models - List of pretrained CNN architectures to use, values must be:
+               resnet alexnet vgg (list)
+      batch_size - number of images classified together in each forward pass
+                   of the model (int)
+      cache - optional PredictionCache (see classify_images())
+      fast_decode - True decodes JPEGs at reduced resolution (bool)
+      timer - optional StageTimer (see classify_images())
+      packed - optional PackedImages whose crops are classified instead of
+               reading the images from images_dir (PackedImages)
+      decode_threads - number of decode threads (see classify_images())
+      workers - number of worker processes classifying the images (see
+                worker_pool.py), 0 classifies them in this process (int)
+     Returns:
+      results_dics - Dictionary with key as model architecture and value as
+                     that model's results_dic (see classify_images())
+    """
+    # Runs classify_batch_ids_multi function to classify all the images in 
+    # batches inputs: list of path + filename  and  models, returns for each
+    # model the predicted class ids in the same order as the filenames
+    filenames = list(petlabel_dic)
+    if packed is None and workers > 0:
+        model_ids_dic = classify_ids_workers([images_dir+key for key in filenames],
+                                             models, workers, batch_size, cache,
+                                             fast_decode, timer, decode_threads)
+    elif packed is None:
+        model_ids_dic = classify_batch_ids_multi([images_dir+key for key in filenames], 
+                                                 models, batch_size, cache,
+                                                 fast_decode, timer,
+                                                 decode_threads)
+
+    # Classifies the packed crops (in packed order) & puts the class ids in 
+    # the same order as the filenames
+    else:
+        if workers > 0:
+            packed_ids_dic = classify_packed_ids_workers(packed, models, workers,
+                                                         batch_size, timer)
+        else:
+            packed_ids_dic = classify_packed_ids_multi(packed, models, batch_size,
+                                                       timer)
+        model_ids_dic = {model: [packed_ids_dic[model][packed.index[key]]
+                                 for key in filenames] 
+                         for model in models}
+
+    # Compares each model's classifier labels with the pet image labels
+    if timer is None:
+        timer = StageTimer()
+    results_dics = dict()
+    for model in models:
+        with timer.stage('label matching'):
+            results_dics[model] = compare_labels(petlabel_dic, filenames, 
+                                                 model_ids_dic[model])
+    return results_dics
+
+
+def compare_labels(petlabel_dic, filenames, class_ids):
+    """
+    Compares the classifier labels with the pet image labels and creates a 
+    dictionary containing both labels and comparison of them to be returned.
+     Parameters: 
+      petlabel_dic - Dictionary that contains the pet image(true) labels
+                     (see classify_images())
+      filenames - List of pet image filenames (keys of petlabel_dic) (list)
+      class_ids - List of predicted ImageNet class ids, one for each filename
+                  in filenames and in the same order (list)
+     Returns:
+      results_dic - ResultsStore that reads like a Dictionary with key as 
+                    image filename and value as a List (see 
+                    classify_images())
+    """
+    # Matches all the pet image labels (truth) with the classifier labels at
+    # once - a match is when the pet image label is found within the 
+    # classifier label as a stand-alone term (not within another word), 
+    # see label_matcher.py
+    truths = [petlabel_dic[key] for key in filenames]
+    matches = load_label_matcher().match_ids(truths, class_ids)
+
+    # Creates the results - key = filename, value = [Pet Label, Classifier
+    # Label, Match(1=yes,0=no)] - stored column by column, with the lowercase
+    # & stripped classifier label (model_label) of each class id
+    model_labels = [label_index.normalized[class_id] for class_id in class_ids]
+    return ResultsStore(filenames, truths, model_labels, matches, class_ids)
 
 
 def adjust_results4_isadog(results_dic, dogsfile):
@@ -280,65 +650,40 @@ def adjust_results4_isadog(results_dic, dogsfile):
     Returns:
            None - results_dic is mutable data type so no return needed.
     """           
-    # Creates dognames dictionary for quick matching to results_dic labels from
-    # real answer & classifier's answer
-    dognames_dic = dict()
-
-    # Reads in dognames from file, 1 name per line & automatically closes file
-    with open(dogsfile, "r") as infile:
-        # Reads in dognames from first line in file
-        line = infile.readline()
-
-        # Processes each line in file until reaching EOF (end-of-file) by 
-        # processing line and adding dognames to dognames_dic with while loop
-        while line != "":
-
-            # Process line by striping newline from line
-            line = line.rstrip()
-
-            # adds dogname to dogsnames_dic if it doesn't already exist in dic
-            if line not in dognames_dic:
-                dognames_dic[line] = 1
-            else:
-                print("**Warning: Duplicate dognames", line)            
-
-            # Reads in next line in file to be processed with while loop
-            # if this line isn't empty (EOF)
-            line = infile.readline()
-    
-    
+    # Compiles the dognames file into a table of which ImageNet class ids are
+    # dogs - only done on the first call, later calls reuse the table.
+    # Labels are dogs if they match a whole line of the dognames file
+    dog_table = load_dog_table(dogsfile)
+
     # Add to whether pet labels & classifier labels are dogs by appending
     # two items to end of value(List) in results_dic. 
     # List Index 3 = whether(1) or not(0) Pet Image Label is a dog AND 
     # List Index 4 = whether(1) or not(0) Classifier Label is a dog
-    # How - iterate through results_dic if labels are found in dognames_dic
-    # then label "is a dog" index3/4=1 otherwise index3/4=0 "not a dog"
-    for key in results_dic:
-
-        # Pet Image Label IS of Dog (e.g. found in dognames_dic)
-        if results_dic[key][0] in dognames_dic:
-            
-            # Classifier Label IS image of Dog (e.g. found in dognames_dic)
-            # appends (1, 1) because both labels are dogs
-            if results_dic[key][1] in dognames_dic:
-                results_dic[key].extend((1, 1))
-                
-            # Classifier Label IS NOT image of dog (e.g. NOT in dognames_dic)
-            # appends (1,0) because only pet label is a dog
-            else:
-                results_dic[key].extend((1, 0))
-            
-        # Pet Image Label IS NOT a Dog image (e.g. NOT found in dognames_dic)
-        else:
-            # Classifier Label IS image of Dog (e.g. found in dognames_dic)
-            # appends (0, 1)because only Classifier labe is a dog
-            if results_dic[key][1] in dognames_dic:
-                results_dic[key].extend((0, 1))
-                
-            # Classifier Label IS NOT image of Dog (e.g. NOT in dognames_dic)
-            # appends (0, 0) because both labels aren't dogs
-            else:
-                results_dic[key].extend((0, 0))
+    # How - looks up all the pet labels at once in the dognames set and all
+    # the classifier labels at once (by class id) in the dog table
+    if isinstance(results_dic, ResultsStore):
+        # Each distinct pet label is only looked up once & the classifier 
+        # labels are looked up by class id
+        pet_dogs = dog_table.pet_labels_are_dogs(
+                       results_dic.strings)[results_dic.pet_label_codes]
+        classifier_dogs = dog_table.classes_are_dogs(
+                              np.maximum(results_dic.class_ids, 0))
+        unknown = results_dic.class_ids < 0
+        if unknown.any():
+            classifier_dogs[unknown] = dog_table.classifier_labels_are_dogs(
+                [results_dic.strings[code] for code in
+                 results_dic.classifier_label_codes[unknown].tolist()])
+        results_dic.set_dog_flags(pet_dogs, classifier_dogs)
+        return
+
+    keys = list(results_dic)
+    pet_dogs = dog_table.pet_labels_are_dogs([results_dic[key][0] for key in keys])
+    classifier_dogs = dog_table.classifier_labels_are_dogs(
+                          [results_dic[key][1] for key in keys])
+
+    for key, pet_dog, classifier_dog in zip(keys, pet_dogs.tolist(), 
+                                            classifier_dogs.tolist()):
+        results_dic[key].extend((int(pet_dog), int(classifier_dog)))
 
 
 def calculates_results_stats(results_dic):
@@ -365,79 +710,16 @@ def calculates_results_stats(results_dic):
                      name (starting with 'pct' for percentage or 'n' for count)
                      and the value is the statistic's value 
     """
-    # creates empty dictionary for results_stats
-    results_stats=dict()
-    
-    # Sets all counters to initial values of zero so that they can 
-    # be incremented while processing through the images in results_dic 
-    results_stats['n_dogs_img'] = 0
-    results_stats['n_match'] = 0
-    results_stats['n_correct_dogs'] = 0
-    results_stats['n_correct_notdogs'] = 0
-    results_stats['n_correct_breed'] = 0       
-    
-    # process through the results dictionary
-    for key in results_dic:
-        # Labels Match Exactly
-        if results_dic[key][2] == 1:
-            results_stats['n_match'] += 1
-            
-        # Pet Image Label is a Dog AND Labels match- counts Correct Breed
-        if sum(results_dic[key][2:]) == 3:
-                results_stats['n_correct_breed'] += 1
-        
-        # Pet Image Label is a Dog - counts number of dog images
-        if results_dic[key][3] == 1:
-            results_stats['n_dogs_img'] += 1
-            
-            # Classifier classifies image as Dog (& pet image is a dog)
-            # counts number of correct dog classifications
-            if results_dic[key][4] == 1:
-                results_stats['n_correct_dogs'] += 1
-                
-        # Pet Image Label is NOT a Dog
-        else:
-            # Classifier classifies image as NOT a Dog(& pet image isn't a dog)
-            # counts number of correct NOT dog clasifications.
-            if results_dic[key][4] == 0:
-                results_stats['n_correct_notdogs'] += 1
-
-    # Calculates run statistics (counts & percentages) below that are calculated
-    # using counters from above.
-    
-    # calculates number of total images
-    results_stats['n_images'] = len(results_dic)
-
-    # calculates number of not-a-dog images using - images & dog images counts
-    results_stats['n_notdogs_img'] = (results_stats['n_images'] - 
-                                      results_stats['n_dogs_img']) 
-
-    # Calculates % correct for matches
-    results_stats['pct_match'] = (results_stats['n_match'] / 
-                                  results_stats['n_images'])*100.0
-    
-    # Calculates % correct dogs
-    results_stats['pct_correct_dogs'] = (results_stats['n_correct_dogs'] / 
-                                         results_stats['n_dogs_img'])*100.0    
-
-    # Calculates % correct breed of dog
-    results_stats['pct_correct_breed'] = (results_stats['n_correct_breed'] / 
-                                          results_stats['n_dogs_img'])*100.0
-
-    # Calculates % correct not-a-dog images
-    # Uses conditional statement for when no 'not a dog' images were submitted 
-    if results_stats['n_notdogs_img'] > 0:
-        results_stats['pct_correct_notdogs'] = (results_stats['n_correct_notdogs'] /
-                                                results_stats['n_notdogs_img'])*100.0
-    else:
-        results_stats['pct_correct_notdogs'] = 0.0
-        
-    # returns results_stast dictionary 
-    return results_stats
+    # Counts the matches, dogs, correct dogs, not-dogs & breeds of all the
+    # images at once (vectorized) and calculates the percentages from these
+    # counts - see partial_stats.py, whose PartialStats can also add up the
+    # counts of several shards of images or of results arriving over time
+    return PartialStats().add_results(results_dic).to_results_stats()
 
 
 def print_results(results_dic, results_stats, model, 
-                  print_incorrect_dogs = False, print_incorrect_breed = False):
+                  print_incorrect_dogs = False, print_incorrect_breed = False,
+                  timer = None):
     """
     Prints summary results on the classification and then prints incorrectly 
     classified dogs and incorrectly classified dog breeds if user indicates 
@@ -463,6 +745,9 @@ def print_results(results_dic, results_stats, model,
                              False doesn't print anything(default) (bool)  
       print_incorrect_breed - True prints incorrectly classified dog breeds and 
                               False doesn't print anything(default) (bool) 
+      timer - StageTimer whose stage timings & per-image latency percentiles
+              are printed at the end, None (default) doesn't print timings 
+              (StageTimer)
     Returns:
            None - simply printing results.
     """    
@@ -489,13 +774,16 @@ def print_results(results_dic, results_stats, model,
         print("\nINCORRECT Dog/NOT Dog Assignments:")
 
         # process through results dict, printing incorrectly classified dogs
-        for key in results_dic:
-
-            # Pet Image Label is a Dog - Classified as NOT-A-DOG -OR- 
-            # Pet Image Label is NOT-a-Dog - Classified as a-DOG
-            if sum(results_dic[key][3:]) == 1:
-                print("Real: %-26s   Classifier: %-30s" % (results_dic[key][0],
-                                                          results_dic[key][1]))
+        # Pet Image Label is a Dog - Classified as NOT-A-DOG -OR- 
+        # Pet Image Label is NOT-a-Dog - Classified as a-DOG
+        if isinstance(results_dic, ResultsStore):
+            incorrect = results_dic.rows(results_dic.pet_is_dog !=
+                                         results_dic.classifier_is_dog)
+        else:
+            incorrect = [(key, results_dic[key]) for key in results_dic
+                         if sum(results_dic[key][3:]) == 1]
+        for key, result in incorrect:
+            print("Real: %-26s   Classifier: %-30s" % (result[0], result[1]))
 
     # IF print_incorrect_breed == True AND there were dogs whose breeds 
     # were incorrectly classified - print out these cases                    
@@ -505,13 +793,21 @@ def print_results(results_dic, results_stats, model,
         print("\nINCORRECT Dog Breed Assignment:")
 
         # process through results dict, printing incorrectly classified breeds
-        for key in results_dic:
-
-            # Pet Image Label is-a-Dog, classified as-a-dog but is WRONG breed
-            if ( sum(results_dic[key][3:]) == 2 and
-                results_dic[key][2] == 0 ):
-                print("Real: %-26s   Classifier: %-30s" % (results_dic[key][0],
-                                                          results_dic[key][1]))
+        # Pet Image Label is-a-Dog, classified as-a-dog but is WRONG breed
+        if isinstance(results_dic, ResultsStore):
+            incorrect = results_dic.rows((results_dic.pet_is_dog == 1) &
+                                         (results_dic.classifier_is_dog == 1) &
+                                         (results_dic.match == 0))
+        else:
+            incorrect = [(key, results_dic[key]) for key in results_dic
+                         if ( sum(results_dic[key][3:]) == 2 and
+                              results_dic[key][2] == 0 )]
+        for key, result in incorrect:
+            print("Real: %-26s   Classifier: %-30s" % (result[0], result[1]))
+
+    # Prints where the run's time went if a timer was given
+    if timer is not None:
+        timer.print_summary()
                 
                 
                 
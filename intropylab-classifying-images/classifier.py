@@ -1,34 +1,880 @@
-import ast
+import os
+import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from time import perf_counter
+import numpy as np
 from PIL import Image
+import torch
 import torchvision.transforms as transforms
 from torch.autograd import Variable
 import torchvision.models as models
 from torch import __version__
 
-resnet18 = models.resnet18(pretrained=True)
-alexnet = models.alexnet(pretrained=True)
-vgg16 = models.vgg16(pretrained=True)
+from stage_timer import StageTimer
+from label_index import load_label_index, IMAGENET_LABELS_FILE
+from image_walker import walk_image_files
+from quantize import quantize_model, PRECISIONS
+import graph_cache
+from graph_cache import BACKENDS
+import restricted_head
+import weight_store
 
-models = {'resnet': resnet18, 'alexnet': alexnet, 'vgg': vgg16}
+# Maps each supported model name to the torchvision function that builds it.
+# Models are only built (and their pretrained weights loaded) the first time
+# classifier() asks for them, so a run using one architecture doesn't pay to
+# load the other two (VGG16 alone is ~500 MB of weights).
+model_builders = {'resnet': models.resnet18, 'alexnet': models.alexnet,
+                  'vgg': models.vgg16}
 
-# obtain ImageNet labels
-with open('imagenet1000_clsid_to_human.txt') as imagenet_classes_file:
-    imagenet_classes_dict = ast.literal_eval(imagenet_classes_file.read())
+# Cache of models that have already been built, key = model name
+loaded_models = dict()
 
-def classifier(img_path, model_name):
+# Local weights directory (see weight_store.py) the pretrained weights are
+# loaded from instead of being downloaded, None downloads them as before
+weights_dir = os.environ.get(weight_store.WEIGHTS_DIR_ENV) or None
+
+# Precision the models run at (see quantize.py) & the folder of images the
+# static int8 quantization is calibrated on
+precision = 'fp32'
+calibration_dir = 'pet_images/'
+
+# Cache of quantized models, key = (model name, precision, vocabulary)
+quantized_models = dict()
+
+# Backend the models run on (see graph_cache.py) & the folder of the graph
+# files of the 'torchscript' backend
+backend = 'eager'
+graph_dir = graph_cache.DEFAULT_GRAPH_DIR
+
+# Cache of models loaded from graph files, key = (model name, precision,
+# vocabulary)
+compiled_models = dict()
+
+# Restricted vocabulary (see restricted_head.py): the label file, the name
+# identifying its classes & their class ids (None predicts all 1000 classes)
+vocabulary_file = None
+vocabulary = None
+vocabulary_ids = None
+
+# Cache of models restricted to the vocabulary, key = (model name, 
+# vocabulary)
+restricted_models = dict()
+
+# Profiler the forward passes run under (see layer_profiler.py), None runs
+# them without profiling
+profiler = None
+
+# Number of images the static int8 quantization is calibrated on, and how
+# many of them are run through the model at once
+CALIBRATION_IMAGES = 32
+CALIBRATION_BATCH_SIZE = 8
+
+# obtain ImageNet labels - from the precompiled label index, which is only
+# re-parsed when the labels file changes (see label_index.py)
+label_index = load_label_index(IMAGENET_LABELS_FILE)
+imagenet_classes_dict = dict(enumerate(label_index.labels))
+
+# mean & standard deviation of each color channel of the ImageNet images
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+
+# define transforms - the same preprocessing is used by all three models
+# crop resizes & crops an image to the 224x224 size expected by the models
+# and normalize converts the cropped image to a normalized tensor
+crop = transforms.Compose([
+    transforms.Resize(256),
+    transforms.CenterCrop(224)
+])
+normalize = transforms.Compose([
+    transforms.ToTensor(),
+    transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+])
+preprocess = transforms.Compose([crop, normalize])
+
+# mean & standard deviation shaped to normalize a whole batch at once
+batch_mean = torch.tensor(IMAGENET_MEAN).view(1, 3, 1, 1)
+batch_std = torch.tensor(IMAGENET_STD).view(1, 3, 1, 1)
+
+# Describes the preprocessing above - stored with cached predictions so that
+# a change to the preprocessing doesn't reuse predictions made with the old one
+PREPROCESS_CONFIG = 'resize256-centercrop224-imagenetnorm'
+
+# Smallest size (in pixels) of the short side of an image that the fast 
+# decode mode asks the JPEG decoder for - matches the Resize(256) above
+FAST_DECODE_SIZE = 256
+
+# Default number of images classified together in one forward pass by 
+# classify_batch()
+DEFAULT_BATCH_SIZE = 32
+
+# Number of batches the decode threads may read ahead of the batch that is
+# being classified (see classify_batch_ids_multi())
+PREFETCH_BATCHES = 2
+
+def get_model(model_name):
+    """
+    Returns the pretrained CNN model for model_name on the backend that is
+    set (see set_backend()): the model itself, or its compiled graph loaded
+    from the graph file - which is exported the first time it's needed.
+    Later calls return the same cached model.
+    Parameters:
+     model_name - pretrained CNN whose architecture is indicated by this 
+                  parameter, values must be: resnet alexnet vgg (string)
+    Returns:
+     model - pretrained CNN model in evaluation mode
+    """
+    if backend == 'eager':
+        return get_eager_model(model_name)
+
+    # Loads the graph only if it hasn't been loaded by an earlier call
+    key = (model_name, precision, vocabulary)
+    if key not in compiled_models:
+        graph_path = get_graph_path(model_name)
+        if not os.path.exists(graph_path):
+            graph_cache.export_graph(get_eager_model(model_name), graph_path)
+        compiled_models[key] = graph_cache.load_graph(graph_path)
+    return compiled_models[key]
+
+
+def get_eager_model(model_name):
+    """
+    Returns the pretrained CNN model for model_name, building it and loading
+    its pretrained weights the first time it's requested (from weights_dir if
+    set, otherwise downloaded by torchvision). Later calls return the same 
+    cached model (already in evaluation mode). When a vocabulary is set (see
+    set_vocabulary()) the model restricted to it is returned, and when a 
+    precision other than 'fp32' is set (see set_precision()) the quantized 
+    model - each made the first time it's requested.
+    Parameters:
+     model_name - pretrained CNN whose architecture is indicated by this 
+                  parameter, values must be: resnet alexnet vgg (string)
+    Returns:
+     model - pretrained CNN model in evaluation mode
+    """
+    # Builds the model only if it hasn't been loaded by an earlier call
+    if model_name not in loaded_models:
+        if weights_dir is not None:
+            model = weight_store.load_model(model_name, 
+                                            model_builders[model_name],
+                                            weights_dir)
+        else:
+            model = model_builders[model_name](pretrained=True)
+
+        # puts model in evaluation mode
+        # instead of (default)training mode
+        loaded_models[model_name] = model.eval()
+
+    # Restricts the final layer to the vocabulary (sharing the other layers)
+    model = loaded_models[model_name]
+    if vocabulary is not None:
+        if (model_name, vocabulary) not in restricted_models:
+            restricted_models[(model_name, vocabulary)] = (
+                restricted_head.restrict_model(model, vocabulary_ids.numpy()))
+        model = restricted_models[(model_name, vocabulary)]
+
+    if precision == 'fp32':
+        return model
+
+    # Quantizes the model only if it hasn't been quantized by an earlier call
+    key = (model_name, precision, vocabulary)
+    if key not in quantized_models:
+        calibration_batches = (get_calibration_batches() if precision == 'int8'
+                               else ())
+        quantized_models[key] = quantize_model(model, precision,
+                                               calibration_batches)
+    return quantized_models[key]
+
+
+def set_weights_dir(path):
+    """
+    Sets the local weights directory (see weight_store.py) that models built
+    from now on load their pretrained weights from.
+    Parameters:
+     path - path to the weights directory, None downloads the weights (string)
+    Returns:
+     None
+    """
+    global weights_dir
+    weights_dir = path
+
+
+def set_backend(new_backend, new_graph_dir=None):
+    """
+    Sets the backend the models run on from now on (see graph_cache.py).
+    Parameters:
+     new_backend - eager torchscript (string)
+     new_graph_dir - optional folder of the graph files (string)
+    Returns:
+     None
+    """
+    global backend, graph_dir
+    if new_backend not in BACKENDS:
+        raise ValueError("Unknown backend '{0}' - must be one of: "
+                         "{1}".format(new_backend, ', '.join(BACKENDS)))
+    backend = new_backend
+    if new_graph_dir:
+        graph_dir = new_graph_dir
+
+
+def get_graph_path(model_name, graph_folder=None):
+    """
+    Returns the path of the graph file of model_name at the precision (and
+    restricted to the vocabulary) that is set, in graph_folder (graph_dir 
+    by default).
+    """
+    return graph_cache.get_graph_path(graph_folder or graph_dir, model_name,
+                                      weight_store.get_weights_version(
+                                          model_name, weights_dir),
+                                      precision, vocabulary)
+
+
+def get_model_settings():
+    """
+    Returns the settings that decide which models get_model() returns, e.g.
+    to pass them on to worker processes (see set_model_settings()).
+    Returns:
+     settings - Dictionary with key as setting name (dict)
+    """
+    return {'weights_dir': weights_dir, 'precision': precision,
+            'calibration_dir': calibration_dir, 'backend': backend,
+            'graph_dir': graph_dir, 'vocabulary_file': vocabulary_file}
+
+
+def set_model_settings(settings):
+    """
+    Applies settings returned by get_model_settings().
+    """
+    set_weights_dir(settings['weights_dir'])
+    set_precision(settings['precision'], settings['calibration_dir'])
+    set_backend(settings['backend'], settings['graph_dir'])
+    set_vocabulary(settings['vocabulary_file'])
+
+
+def check_models(model_names):
+    """
+    Checks that the models of model_names can be built with the settings
+    that are set - that they're known, that their weights are in the weight
+    store (if one is set) & that there are images to calibrate the int8
+    quantization on - without building them, e.g. before starting worker
+    processes that would each fail to.
+    Parameters:
+     model_names - models to check (list)
+    Returns:
+     None - raises ValueError or FileNotFoundError if a model can't be built
+    """
+    for model_name in model_names:
+        if model_name not in model_builders:
+            raise ValueError("Unknown model '{0}' - must be one of: "
+                             "{1}".format(model_name, ', '.join(model_builders)))
+        if weights_dir is not None:
+            weight_store.get_weights_path(model_name, weights_dir)
+    if precision == 'int8' and next(walk_image_files(calibration_dir,
+                                                     threads=0), None) is None:
+        raise ValueError("No images to calibrate the int8 quantization on "
+                         "in " + calibration_dir)
+
+
+def set_vocabulary(label_file=None):
+    """
+    Restricts the predictions of the models from now on to the ImageNet 
+    classes listed in label_file (see restricted_head.py).
+    Parameters:
+     label_file - text file with one label per line, like dognames.txt, 
+                  None predicts all 1000 classes again (string)
+    Returns:
+     None
+    """
+    global vocabulary_file, vocabulary, vocabulary_ids
+    if label_file is None:
+        vocabulary_file = vocabulary = vocabulary_ids = None
+        return
+    vocabulary, class_ids = restricted_head.load_vocabulary(label_file)
+    vocabulary_file = label_file
+    vocabulary_ids = torch.as_tensor(class_ids, dtype=torch.long)
+
+
+def set_profiler(new_profiler):
+    """
+    Sets the LayerProfiler (see layer_profiler.py) the forward passes run 
+    under from now on, None stops profiling them.
+    """
+    global profiler
+    profiler = new_profiler
+
+
+def forward(model_name, model, batch):
+    """
+    Runs the forward pass of model (the model of model_name) over batch - 
+    under the profiler if one is set (see set_profiler()).
+    """
+    if profiler is None:
+        return model(batch)
+    return profiler.forward(model_name, model, batch)
+
+
+def to_class_ids(pred_idxs):
+    """
+    Converts the indexes of the outputs of a model (a tensor) into ImageNet
+    class ids - they're the same unless a vocabulary is set.
+    """
+    if vocabulary_ids is None:
+        return pred_idxs
+    return vocabulary_ids[pred_idxs]
+
+
+def set_precision(new_precision, new_calibration_dir=None):
+    """
+    Sets the precision the models run at from now on (see quantize.py).
+    Parameters:
+     new_precision - fp32 int8 int8-dynamic (string)
+     new_calibration_dir - optional folder of images to calibrate the static
+                           int8 quantization on (string)
+    Returns:
+     None
+    """
+    global precision, calibration_dir
+    if new_precision not in PRECISIONS:
+        raise ValueError("Unknown precision '{0}' - must be one of: "
+                         "{1}".format(new_precision, ', '.join(PRECISIONS)))
+    precision = new_precision
+    if new_calibration_dir:
+        calibration_dir = new_calibration_dir
+
+
+def get_calibration_batches():
+    """
+    Returns the batches of preprocessed images the static int8 quantization
+    is calibrated on - CALIBRATION_IMAGES images spread evenly over the 
+    (sorted) images of calibration_dir, so every run picks the same ones.
+    Returns:
+     calibration_batches - List of N x 3 x 224 x 224 tensors (list)
+    """
+    img_paths = sorted(walk_image_files(calibration_dir))
+    if not img_paths:
+        raise ValueError("No images to calibrate the int8 quantization on "
+                         "in " + calibration_dir)
+    step = max(1, len(img_paths) // CALIBRATION_IMAGES)
+    img_paths = img_paths[::step][:CALIBRATION_IMAGES]
+    return [torch.stack([process_image(os.path.join(calibration_dir, img_path))
+                         for img_path in img_paths[start:start + CALIBRATION_BATCH_SIZE]])
+            for start in range(0, len(img_paths), CALIBRATION_BATCH_SIZE)]
+
+
+def get_preprocess_config(fast_decode=False, model_name=None):
+    """
+    Returns the string describing the preprocessing (and the precision of
+    the models, if not fp32, their vocabulary, if restricted, & the version
+    of model_name's weights, if given) used, which is stored with cached 
+    predictions.
+    Parameters:
+     fast_decode - True when images are decoded at reduced resolution (bool)
+     model_name - resnet alexnet vgg, the model the predictions are made 
+                  by (string)
+    Returns:
+     preprocess_config - description of the preprocessing (string)
+    """
+    preprocess_config = PREPROCESS_CONFIG
+    if fast_decode:
+        preprocess_config += '-fastdecode' + str(FAST_DECODE_SIZE)
+
+    # quantized models can predict differently, so they're cached apart
+    if precision != 'fp32':
+        preprocess_config += '-' + precision
+
+    # restricted models only predict the classes of their vocabulary
+    if vocabulary is not None:
+        preprocess_config += '-vocab-' + vocabulary
+
+    # other weights (e.g. another checkpoint in the weight store) predict 
+    # differently
+    if model_name is not None:
+        preprocess_config += '-weights-' + weight_store.get_weights_version(
+            model_name, weights_dir)
+    return preprocess_config
+
+
+def load_image(img_path, fast_decode=False):
+    """
+    Opens and decodes the image at img_path.
+    Parameters:
+     img_path - path to the image file to be loaded (string)
+     fast_decode - True asks the JPEG decoder for the smallest scale (1/2, 
+                   1/4 or 1/8) whose short side is still at least 
+                   FAST_DECODE_SIZE pixels, rather than decoding every pixel 
+                   of a large image only to resize it down (bool)
+    Returns:
+     img_pil - the decoded image (PIL Image)
+    """
     # load the image
     img_pil = Image.open(img_path)
 
-    # define transforms
-    preprocess = transforms.Compose([
-        transforms.Resize(256),
-        transforms.CenterCrop(224),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-    ])
-    
+    # draft() only configures the JPEG decoder (no effect for other formats)
+    # and never goes below the requested size in either dimension
+    if fast_decode:
+        img_pil.draft('RGB', (FAST_DECODE_SIZE, FAST_DECODE_SIZE))
+
+    # decodes the pixels now (PIL otherwise waits until they're first used)
+    img_pil.load()
+    return img_pil
+
+
+def process_image(img_path, fast_decode=False):
+    """
+    Loads the image at img_path and applies the preprocessing transforms
+    (resize, center crop, convert to tensor & normalize) expected by the
+    pretrained models.
+    Parameters:
+     img_path - path to the image file to be loaded (string)
+     fast_decode - True decodes JPEGs at reduced resolution (see 
+                   load_image()) (bool)
+    Returns:
+     img_tensor - preprocessed image as a 3x224x224 tensor
+    """
     # preprocess the image
+    return preprocess(load_image(img_path, fast_decode))
+
+
+def decode_image(img_path, fast_decode=False):
+    """
+    Loads & preprocesses one image, timing both steps - run by the decode 
+    threads of classify_batch_ids_multi().
+    Parameters:
+     img_path - path to the image file (string)
+     fast_decode - True decodes JPEGs at reduced resolution (bool)
+    Returns:
+     img_tensor - the preprocessed image (tensor)
+     decode_time - seconds spent loading & decoding the image (float)
+     preprocess_time - seconds spent preprocessing the image (float)
+    """
+    decode_start = perf_counter()
+    img_pil = load_image(img_path, fast_decode)
+    preprocess_start = perf_counter()
     img_tensor = preprocess(img_pil)
+    return (img_tensor, preprocess_start - decode_start,
+            perf_counter() - preprocess_start)
+
+
+def load_crop(img_path, fast_decode=False):
+    """
+    Loads an image and resizes & crops it to 224x224 (without normalizing it),
+    as stored in packed image files & shared memory batches.
+    Parameters:
+     img_path - path to the image file (string)
+     fast_decode - True decodes JPEGs at reduced resolution (bool)
+    Returns:
+     crop - 224 x 224 x 3 uint8 array of the cropped RGB image (numpy array)
+    """
+    return np.asarray(crop(load_image(img_path, fast_decode)).convert('RGB'),
+                      dtype=np.uint8)
+
+
+def crops_to_batch(crops):
+    """
+    Converts already cropped images into a normalized batch tensor - the same
+    result as applying the normalize transforms to each image and stacking
+    them.
+    Parameters:
+     crops - N x 224 x 224 x 3 uint8 array of cropped RGB images, e.g. a view
+             of a packed image file (see pack_images.py) (numpy array)
+    Returns:
+     batch - normalized N x 3 x 224 x 224 float tensor
+    """
+    # torch.from_numpy() shares the memory of crops (no copy) - it only warns
+    # that read-only (memory-mapped) arrays can't be written through it
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        crops_tensor = torch.from_numpy(crops)
+
+    # converting to float makes the only copy, the rest works in place
+    batch = crops_tensor.permute(0, 3, 1, 2).float().div_(255)
+    return batch.sub_(batch_mean).div_(batch_std)
+
+
+def predict_batch(model_name, batch, timer=None):
+    """
+    Runs a forward pass of the model over a batch tensor.
+    Parameters:
+     model_name - pretrained CNN whose architecture is indicated by this 
+                  parameter, values must be: resnet alexnet vgg (string)
+     batch - N x 3 x 224 x 224 batch of preprocessed images (tensor)
+     timer - optional StageTimer the forward pass time is added to 
+             (StageTimer)
+    Returns:
+     pred_idxs - List of the predicted class index of each image (list)
+     forward_time - time taken by the forward pass in seconds (float)
+    """
+    model = get_model(model_name)
+    forward_start = perf_counter()
+    with torch.no_grad():
+        pred_idxs = to_class_ids(forward(model_name, model, 
+                                         batch).argmax(dim=1)).tolist()
+    forward_time = perf_counter() - forward_start
+    if timer is not None:
+        timer.add('forward pass', forward_time)
+    return pred_idxs, forward_time
+
+
+def predict_batch_confidence(model_name, batch, timer=None):
+    """
+    Same as predict_batch() but also returns how confident the model is of
+    each prediction - the softmax probability of the predicted class.
+    Returns:
+     pred_idxs - List of the predicted class index of each image (list)
+     confidences - List of the confidence (0 to 1) of each prediction (list)
+     forward_time - time taken by the forward pass in seconds (float)
+    """
+    model = get_model(model_name)
+    forward_start = perf_counter()
+    with torch.no_grad():
+        confidences, pred_idxs = torch.softmax(forward(model_name, model, batch),
+                                               dim=1).max(dim=1)
+    forward_time = perf_counter() - forward_start
+    if timer is not None:
+        timer.add('forward pass', forward_time)
+    return (to_class_ids(pred_idxs).tolist(), confidences.tolist(),
+            forward_time)
+
+
+def predict_batch_topk(model_name, batch, k, timer=None):
+    """
+    Same as predict_batch() but returns the k most likely classes of each 
+    image (of the vocabulary, if one is set) & their softmax probabilities.
+    Returns:
+     topk_idxs - List of the k class ids of each image, most likely first
+                 (list)
+     topk_probs - List of the k probabilities of each image (list)
+     forward_time - time taken by the forward pass in seconds (float)
+    """
+    model = get_model(model_name)
+    forward_start = perf_counter()
+    with torch.no_grad():
+        output = forward(model_name, model, batch)
+        probs, idxs = torch.softmax(output, dim=1).topk(min(k, output.shape[1]),
+                                                        dim=1)
+    forward_time = perf_counter() - forward_start
+    if timer is not None:
+        timer.add('forward pass', forward_time)
+    return to_class_ids(idxs).tolist(), probs.tolist(), forward_time
+
+
+def classify_batch_topk(img_paths, model_name, k, 
+                        batch_size=DEFAULT_BATCH_SIZE, fast_decode=False,
+                        timer=None):
+    """
+    Classifies a list of images in batches like classify_batch(), returning
+    the k most likely labels of each image with their probabilities.
+    Parameters:
+     img_paths - list of paths to the image files to be classified (list)
+     model_name - resnet alexnet vgg (string)
+     k - number of labels returned for each image (int)
+     batch_size, fast_decode, timer - see classify_batch()
+    Returns:
+     top_k - List of the (label, probability) tuples of each image, most
+             likely first, in the same order as img_paths (list)
+    """
+    top_k = list()
+    for start in range(0, len(img_paths), batch_size):
+        batch = torch.stack([process_image(img_path, fast_decode) for img_path
+                             in img_paths[start:start + batch_size]])
+        topk_idxs, topk_probs, _ = predict_batch_topk(model_name, batch, k,
+                                                      timer)
+        top_k.extend([list(zip([label_index.labels[class_id] 
+                                for class_id in class_ids], probs))
+                      for class_ids, probs in zip(topk_idxs, topk_probs)])
+    return top_k
+
+
+def ids_to_labels(class_ids_dic):
+    """
+    Converts the predicted class ids of each model into ImageNet labels.
+    Parameters:
+     class_ids_dic - Dictionary with key as model name and value as a List of
+                     class ids (dict)
+    Returns:
+     labels_dic - Dictionary with key as model name and value as the List of
+                  the labels of those class ids (dict)
+    """
+    return {model_name: [label_index.labels[class_id] for class_id in class_ids]
+            for model_name, class_ids in class_ids_dic.items()}
+
+
+def classify_packed_multi(packed, model_names, batch_size=DEFAULT_BATCH_SIZE,
+                          timer=None):
+    """
+    Same as classify_packed_ids_multi() but returns the ImageNet labels 
+    instead of the class ids.
+    """
+    return ids_to_labels(classify_packed_ids_multi(packed, model_names,
+                                                   batch_size, timer))
+
+
+def classify_packed_ids_multi(packed, model_names, 
+                              batch_size=DEFAULT_BATCH_SIZE, timer=None):
+    """
+    Classifies the already cropped images of a packed image file (see 
+    pack_images.py) with several pretrained CNN models. The crops are read 
+    straight from the memory-mapped file, so no image is decoded.
+    Parameters:
+     packed - the packed images (PackedImages)
+     model_names - list of pretrained CNN architectures to classify the 
+                   images with, values must be: resnet alexnet vgg (list)
+     batch_size - maximum number of images per forward pass (int)
+     timer - optional StageTimer (see classify_batch_multi()) (StageTimer)
+    Returns:
+     class_ids_dic - Dictionary with key as model name and value as the List
+                     of predicted ImageNet class ids for that model, one for
+                     each packed image and in the same order as 
+                     packed.filenames
+    """
+    class_ids_dic = {model_name: list() for model_name in model_names}
+    if timer is None:
+        timer = StageTimer()
+
+    # Processes the images batch_size images at a time
+    for start in range(0, len(packed), batch_size):
+        with timer.stage('preprocessing'):
+            batch = crops_to_batch(packed.crops[start:start + batch_size])
+        n_images = batch.shape[0]
+        latencies = [0.0] * n_images
+
+        for model_name in model_names:
+            pred_idxs, forward_time = predict_batch(model_name, batch, timer)
+            latencies = [latency + forward_time / n_images 
+                         for latency in latencies]
+            class_ids_dic[model_name].extend(pred_idxs)
+        timer.add_image_latencies(latencies)
+
+    return class_ids_dic
+
+
+def classify_batch(img_paths, model_name, batch_size=DEFAULT_BATCH_SIZE,
+                   cache=None, fast_decode=False, timer=None, decode_threads=0):
+    """
+    Classifies a list of images with the pretrained CNN model, stacking up to 
+    batch_size preprocessed images into each forward pass of the model 
+    instead of running the model once per image like classifier() does.
+    Parameters:
+     img_paths - list of paths to the image files to be classified (list)
+     model_name - pretrained CNN whose architecture is indicated by this 
+                  parameter, values must be: resnet alexnet vgg (string)
+     batch_size - maximum number of images per forward pass (int)
+     cache - optional PredictionCache consulted before running the model and
+             updated with any new predictions (PredictionCache)
+     fast_decode - True decodes JPEGs at reduced resolution (see 
+                   load_image()) (bool)
+     timer - optional StageTimer that records the time spent decoding, 
+             preprocessing & classifying the images (StageTimer)
+     decode_threads - number of threads decoding images ahead of the forward
+                      pass, 0 decodes them on this thread (int)
+    Returns:
+     labels - List of classifier labels (ImageNet label strings), one for 
+              each image in img_paths and in the same order
+    """
+    return classify_batch_multi(img_paths, [model_name], batch_size, 
+                                cache, fast_decode, timer,
+                                decode_threads)[model_name]
+
+
+def classify_batch_multi(img_paths, model_names, batch_size=DEFAULT_BATCH_SIZE,
+                         cache=None, fast_decode=False, timer=None,
+                         decode_threads=0):
+    """
+    Same as classify_batch_ids_multi() but returns the ImageNet labels 
+    instead of the class ids.
+    Returns:
+     labels_dic - Dictionary with key as model name and value as the List of
+                  classifier labels for that model, one for each image in 
+                  img_paths and in the same order
+    """
+    return ids_to_labels(classify_batch_ids_multi(img_paths, model_names,
+                                                  batch_size, cache,
+                                                  fast_decode, timer,
+                                                  decode_threads))
+
+
+def classify_batch_ids_multi(img_paths, model_names, 
+                             batch_size=DEFAULT_BATCH_SIZE, cache=None, 
+                             fast_decode=False, timer=None, decode_threads=0):
+    """
+    Classifies a list of images with several pretrained CNN models. Each image
+    is loaded & preprocessed only once and the same batch tensor is then fed 
+    to every model in model_names.
+    Parameters:
+     img_paths - list of paths to the image files to be classified (list)
+     model_names - list of pretrained CNN architectures to classify the 
+                   images with, values must be: resnet alexnet vgg (list)
+     batch_size - maximum number of images per forward pass (int)
+     cache - optional PredictionCache consulted before running the models,
+             only images without a cached prediction are loaded & classified
+             (PredictionCache)
+     fast_decode - True decodes JPEGs at reduced resolution (see 
+                   load_image()) (bool)
+     timer - optional StageTimer that records the time spent in each stage 
+             and each image's latency, where the time of a forward pass is 
+             shared equally by the images in the batch (StageTimer)
+     decode_threads - number of threads that load & preprocess the images of
+                      the next PREFETCH_BATCHES batches while the current 
+                      batch is classified, 0 (default) loads each batch's 
+                      images on this thread just before classifying it (int)
+    Returns:
+     class_ids_dic - Dictionary with key as model name and value as the List
+                     of predicted ImageNet class ids for that model, one for 
+                     each image in img_paths and in the same order
+    """
+    class_ids_dic = {model_name: list() for model_name in model_names}
+    path_batches = (img_paths[start:start + batch_size]
+                    for start in range(0, len(img_paths), batch_size))
+    for pred_idxs_dic in iter_batch_ids_multi(path_batches, model_names, 
+                                              cache, fast_decode, timer,
+                                              decode_threads):
+        for model_name in model_names:
+            class_ids_dic[model_name].extend(pred_idxs_dic[model_name])
+    return class_ids_dic
+
+
+def iter_batch_ids_multi(path_batches, model_names, cache=None, 
+                         fast_decode=False, timer=None, decode_threads=0):
+    """
+    Same as classify_batch_ids_multi() but classifies a stream of batches,
+    e.g. as they're listed (see stream_pipeline.py). The decode threads are
+    shared by the whole stream, so they read ahead PREFETCH_BATCHES batches
+    of it while the current batch is classified.
+    Parameters:
+     path_batches - iterable of lists of paths to the image files, one list
+                    per forward pass
+     model_names, cache, fast_decode, timer, decode_threads - see
+                    classify_batch_ids_multi()
+    Returns:
+     generator of Dictionaries, one per batch, with key as model name and 
+     value as the List of predicted ImageNet class ids of the batch's images
+    """
+    preprocess_configs = {model_name: get_preprocess_config(fast_decode, 
+                                                            model_name)
+                          for model_name in model_names}
+    if timer is None:
+        timer = StageTimer()
+
+    # Batches whose cached predictions have been looked up & whose images 
+    # are being decoded, oldest first
+    pending = deque()
+    path_batches = iter(path_batches)
+
+    def start_next_batch(pool):
+        # Looks up the cached predictions of the next batch and starts 
+        # decoding its images on the decode threads (if there are any)
+        batch_paths = next(path_batches, None)
+        if batch_paths is None:
+            return
+
+        # Time spent on each image of the batch
+        latencies = [0.0] * len(batch_paths)
+
+        # Looks up each image's cached predictions (by content hash)
+        img_hashes = None
+        if cache is not None:
+            lookup_start = perf_counter()
+            img_hashes = [cache.hash_file(img_path) 
+                          for img_path in batch_paths]
+            pred_idxs_dic = {model_name: cache.get_many(
+                                 img_hashes, model_name,
+                                 preprocess_configs[model_name])
+                             for model_name in model_names}
+            lookup_time = perf_counter() - lookup_start
+            timer.add('cache lookup', lookup_time)
+            latencies = [lookup_time / len(batch_paths)] * len(batch_paths)
+        else:
+            pred_idxs_dic = {model_name: [None] * len(batch_paths)
+                             for model_name in model_names}
+
+        # Positions of the images that at least one model still needs
+        # to classify - these are the only images that get loaded
+        todo = [pos for pos in range(len(batch_paths)) 
+                if any(pred_idxs_dic[model_name][pos] is None
+                       for model_name in model_names)]
+        decoding = None
+        if pool is not None:
+            decoding = [pool.submit(decode_image, batch_paths[pos], fast_decode)
+                        for pos in todo]
+        pending.append((batch_paths, img_hashes, pred_idxs_dic, todo,
+                        decoding, latencies))
+
+    # pretrained models are only used for inference - so no gradients are 
+    # tracked during the forward pass
+    pool = ThreadPoolExecutor(decode_threads) if decode_threads > 0 else None
+    with torch.no_grad(), (pool or nullcontext()):
+
+        # Reads ahead PREFETCH_BATCHES batches when decoding on threads
+        for _ in range(1 + (PREFETCH_BATCHES if pool is not None else 0)):
+            start_next_batch(pool)
+
+        # Processes the images batch_size images at a time
+        while pending:
+            (batch_paths, img_hashes, pred_idxs_dic, todo, decoding,
+             latencies) = pending.popleft()
+            start_next_batch(pool)
+
+            if todo:
+                # decodes & preprocesses each image (or waits for the decode
+                # threads to finish them), timing both stages
+                if decoding is None:
+                    decoded = [decode_image(batch_paths[pos], fast_decode)
+                               for pos in todo]
+                else:
+                    decoded = [future.result() for future in decoding]
+                img_tensors = list()
+                for pos, (img_tensor, decode_time, preprocess_time) in zip(todo, decoded):
+                    img_tensors.append(img_tensor)
+                    timer.add('image decode', decode_time)
+                    timer.add('preprocessing', preprocess_time)
+                    latencies[pos] += decode_time + preprocess_time
+
+                # stacks the preprocessed images into a single batch tensor
+                batch = torch.stack(img_tensors)
+
+                # finds index corresponding to predicted class of each image
+                # for every model using the same batch tensor
+                for model_name in model_names:
+                    pred_idxs = pred_idxs_dic[model_name]
+                    rows = [row for row, pos in enumerate(todo)
+                            if pred_idxs[pos] is None]
+                    if not rows:
+                        continue
+
+                    # only runs the model on the images it hasn't cached
+                    model_input = batch if len(rows) == len(todo) else batch[rows]
+                    new_idxs, forward_time = predict_batch(model_name, 
+                                                           model_input, timer)
+                    for row, pred_idx in zip(rows, new_idxs):
+                        pred_idxs[todo[row]] = pred_idx
+                        latencies[todo[row]] += forward_time / len(rows)
+
+                    # saves the new predictions for the next run
+                    if cache is not None:
+                        cache.put_many([img_hashes[todo[row]] for row in rows],
+                                       model_name, 
+                                       preprocess_configs[model_name], 
+                                       new_idxs)
+
+            timer.add_image_latencies(latencies)
+            yield pred_idxs_dic
+
+
+def classifier(img_path, model_name, cache=None, fast_decode=False,
+               return_class_id=False):
+    # uses the cached prediction if there is one for this image & model
+    preprocess_config = get_preprocess_config(fast_decode, model_name)
+    if cache is not None:
+        img_hash = cache.hash_file(img_path)
+        pred_idx = cache.get_many([img_hash], model_name, preprocess_config)[0]
+        if pred_idx is not None:
+            if return_class_id:
+                return imagenet_classes_dict[pred_idx], pred_idx
+            return imagenet_classes_dict[pred_idx]
+
+    # load & preprocess the image
+    img_tensor = process_image(img_path, fast_decode)
     
     # resize the tensor (add dimension for batch)
     img_tensor.unsqueeze_(0)
@@ -51,12 +897,8 @@ def classifier(img_path, model_name):
         # wrap input in variable
         data = Variable(img_tensor, volatile = True) 
 
-    # apply model to input
-    model = models[model_name]
-
-    # puts model in evaluation mode
-    # instead of (default)training mode
-    model = model.eval()
+    # apply model to input - built & put in evaluation mode on first use
+    model = get_model(model_name)
     
     # apply data to model - adjusted based upon version to account for 
     # operating on a Tensor for version 0.4 & higher.
@@ -69,6 +911,13 @@ def classifier(img_path, model_name):
         output = model(data)
 
     # return index corresponding to predicted class
-    pred_idx = output.data.numpy().argmax()
+    pred_idx = int(to_class_ids(output.data.argmax()))
+
+    # saves the prediction for the next run
+    if cache is not None:
+        cache.put_many([img_hash], model_name, preprocess_config, [pred_idx])
 
+    # returns the class id too if requested - as (label, class id)
+    if return_class_id:
+        return imagenet_classes_dict[pred_idx], pred_idx
     return imagenet_classes_dict[pred_idx]
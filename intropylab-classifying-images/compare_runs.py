@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/compare_runs.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Runs the classification pipeline of check_images_solution.py on the
+#          same images with the current (baseline) settings and with a faster
+#          alternative, then prints the results statistics of both side by
+#          side together with their runtimes. This shows how much accuracy
+#          (pct_match, pct_correct_dogs, ...) a speed optimization costs.
+#          The int8 comparisons run the baseline with the fp32 models and the
+#          compared run with quantized models (see quantize.py).
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python compare_runs.py --dir <directory with images> --arch <model>
+#             --dogfile <file that contains dognames> --compare <comparison>
+#   Example call:
+#    python compare_runs.py --dir pet_images/ --arch all --compare fast-decode
+#    python compare_runs.py --dir pet_images/ --arch all --compare int8
+##
+
+# Imports python modules
+import argparse
+from time import time
+
+# Imports functions for loading the models before timing the runs
+from classifier import get_model, set_precision, DEFAULT_BATCH_SIZE
+
+# Imports the pipeline functions of the solution
+from check_images_solution import (get_pet_labels, get_archs,
+                                   classify_images_multi,
+                                   adjust_results4_isadog,
+                                   calculates_results_stats)
+
+# Keyword arguments passed to classify_images_multi() for the baseline run and
+# for the run being compared with it, key = name of the comparison - except
+# 'precision', which sets the precision of the models (see set_precision())
+COMPARISONS = {'fast-decode': ({'fast_decode': False}, {'fast_decode': True}),
+               'int8': ({'precision': 'fp32'}, {'precision': 'int8'}),
+               'int8-dynamic': ({'precision': 'fp32'},
+                                {'precision': 'int8-dynamic'})}
+
+
+# Main program function defined below
+def main():
+    # Creates & retrieves Command Line Arugments
+    in_arg = get_input_args()
+    archs = get_archs(in_arg.arch)
+    baseline_options, compared_options = COMPARISONS[in_arg.compare]
+
+    # Loads (& quantizes) every model up front so that neither run is 
+    # charged for it
+    for options in (baseline_options, compared_options):
+        set_precision(options.get('precision', 'fp32'), in_arg.dir)
+        for arch in archs:
+            get_model(arch)
+
+    # Runs the pipeline with both settings
+    baseline = run_pipeline(in_arg.dir, in_arg.dogfile, archs,
+                            in_arg.batch_size, baseline_options)
+    compared = run_pipeline(in_arg.dir, in_arg.dogfile, archs,
+                            in_arg.batch_size, compared_options)
+
+    # Prints the statistics of both runs for each model
+    for arch in archs:
+        print_comparison(arch, in_arg.compare, baseline, compared)
+
+    n_images = len(baseline[0][archs[0]])
+    print("\n** Elapsed Runtime: baseline %.2f s  %s %.2f s  (speedup %.2fx)"
+          % (baseline[2], in_arg.compare, compared[2],
+             baseline[2] / compared[2]))
+    print("** Throughput: baseline %.1f img/s  %s %.1f img/s"
+          % (n_images / baseline[2], in_arg.compare, n_images / compared[2]))
+
+
+# Functions defined below
+def get_input_args():
+    """
+    Retrieves and parses the command line arguments created and defined using
+    the argparse module. This function returns these arguments as an
+    ArgumentParser object.
+    Parameters:
+     None - simply using argparse module to create & store command line arguments
+    Returns:
+     parse_args() -data structure that stores the command line arguments object
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dir', type=str, default='pet_images/',
+                        help='path to folder of images')
+    parser.add_argument('--arch', type=str, default='all',
+                        help='chosen model(s), separated by commas or all')
+    parser.add_argument('--dogfile', type=str, default='dognames.txt',
+                        help='text file that has dognames')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='number of images classified per forward pass')
+    parser.add_argument('--compare', type=str, default='fast-decode',
+                        choices=sorted(COMPARISONS),
+                        help='setting to compare against the baseline')
+    return parser.parse_args()
+
+
+def run_pipeline(image_dir, dogfile, archs, batch_size, options):
+    """
+    Runs the check_images_solution.py pipeline (without the lab check prints)
+    for the models in archs.
+    Parameters:
+     image_dir - The (full) path to the folder of images (string)
+     dogfile - text file that contains the dognames (string)
+     archs - List of model architectures to run (list)
+     batch_size - number of images classified per forward pass (int)
+     options - extra keyword arguments for classify_images_multi() and the
+               precision of the models (dict)
+    Returns:
+     result_dics - Dictionary with key as model architecture and value as the
+                   results_dic of that model
+     results_stats_dics - Dictionary with key as model architecture and value
+                          as the results_stats of that model
+     tot_time - runtime of the pipeline in seconds (float)
+    """
+    options = dict(options)
+    set_precision(options.pop('precision', 'fp32'))
+    start_time = time()
+    answers_dic = get_pet_labels(image_dir)
+    result_dics = classify_images_multi(image_dir, answers_dic, archs,
+                                        batch_size, **options)
+    results_stats_dics = dict()
+    for arch in archs:
+        adjust_results4_isadog(result_dics[arch], dogfile)
+        results_stats_dics[arch] = calculates_results_stats(result_dics[arch])
+    return result_dics, results_stats_dics, time() - start_time
+
+
+def print_comparison(arch, name, baseline, compared):
+    """
+    Prints the percentage statistics of the baseline & compared runs for one
+    model side by side, followed by how many images got the same classifier
+    label in both runs.
+    Parameters:
+     arch - model architecture to print (string)
+     name - name of the comparison (string)
+     baseline - result of run_pipeline() with the baseline settings (tuple)
+     compared - result of run_pipeline() with the compared settings (tuple)
+    Returns:
+     None - simply printing results.
+    """
+    baseline_results, baseline_stats = baseline[0][arch], baseline[1][arch]
+    compared_results, compared_stats = compared[0][arch], compared[1][arch]
+
+    print("\n\n*** Comparison for CNN Model Architecture", arch.upper(), "***")
+    print("%20s  %8s  %11s  %6s" % ('', 'baseline', name, 'delta'))
+    for key in baseline_stats:
+        if key[0] == "p":
+            print("%20s: %8.1f  %11.1f  %+6.1f"
+                  % (key, baseline_stats[key], compared_stats[key],
+                     compared_stats[key] - baseline_stats[key]))
+
+    # Counts the images whose classifier label didn't change
+    n_same = sum(1 for key in baseline_results
+                 if baseline_results[key][1] == compared_results[key][1])
+    print("%20s: %3d of %3d images" % ('Same Classifier', n_same,
+                                       len(baseline_results)))
+
+
+# Call to main function to run the program
+if __name__ == "__main__":
+    main()
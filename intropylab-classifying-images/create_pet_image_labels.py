@@ -4,26 +4,31 @@
 #                                                                             
 # PROGRAMMER: Jennifer S.                                                   
 # DATE CREATED: 02/16/2018                                  
-# REVISED DATE:             <=(Date Revised - if any)                         
+# REVISED DATE: October 18, 2026 - lists the images with image_walker.py
+#                and compares the label with its compiled label parser
 # PURPOSE: Creating Pet Image Labels code example from AIPND 
 #
 #   Example call:
 #    python create_pet_image_labels.py 
 ##
 
-# Imports only listdir function from OS module 
-from os import listdir  
+# Imports python modules
+from itertools import islice
+
+# Imports the lazy walker of image folders & the pet label parser
+from image_walker import walk_image_files, load_label_parser
 
 
 # Main program function defined below
 def main():
-    # USES OS module
-    # Retrieve the filenames from folder pet_images/
-    filename_list = listdir("pet_images/")
+    # USES image_walker (os.scandir)
+    # Retrieve the first 10 image filenames from folder pet_images/ - the 
+    # walk stops as soon as they have been found
+    filename_list = list(islice(walk_image_files("pet_images/"), 10))
     
     # Print 10 of the filenames from folder pet_images/
     print("\nPrints 10 filenames from folder pet_images/")
-    for idx in range(0, 10, 1):
+    for idx in range(0, len(filename_list), 1):
         print("%2d file: %-25s" % (idx + 1, filename_list[idx]))
 
     # USES Dictionary
@@ -74,6 +79,12 @@ def main():
     
     # Prints resulting pet_name
     print("\nFilename=", pet_image, "   Label=", pet_name)
+
+    # USES the compiled label parser that get_pet_labels() uses, which gives
+    # the same label in one call
+    parser_label = load_label_parser().parse(pet_image)
+    print("Label parser=", parser_label, "   Same label:", 
+          parser_label == pet_name)
         
         
 # Call to main function to run the program
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/dog_table.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Compiles the dog names file (dognames.txt) once into a lookup table
+#          of which ImageNet class ids are dogs (a numpy bool array indexed by
+#          class id) plus a frozenset of the dog names for the pet image
+#          labels. The 'is a dog' flags of a whole set of results are then
+#          computed with one array indexing operation instead of re-reading
+#          the file & comparing strings for every result.
+#          Two ways of matching a label are supported:
+#           whole label - the label must be a line of the file, as in
+#                         check_images_solution.py
+#           terms - the label & the lines are split on commas and any term
+#                   found is a match, as in check_images.py
+#
+#   Example usage:
+#    table = load_dog_table('dognames.txt')
+#    table.classes_are_dogs([207, 1])   -> array([ True, False])
+#    table.pet_labels_are_dogs(['beagle', 'cat'])   -> array([ True, False])
+##
+
+# Imports python modules
+import os
+
+import numpy as np
+
+# Imports the precompiled ImageNet label index
+from label_index import load_label_index, IMAGENET_LABELS_FILE
+
+# Compiled tables, key = (dogfile, split_terms, labels file) - the file's size
+# & modification time are kept with each table so that edits are picked up
+loaded_tables = dict()
+
+
+def read_dog_names(dogfile, split_terms=False):
+    """
+    Reads the dog names from dogfile (one dog per line).
+    Parameters:
+     dogfile - text file that contains the dognames (string)
+     split_terms - True splits each line on commas into separate names (bool)
+    Returns:
+     dog_names - the dog names (frozenset of string)
+    """
+    dog_names = set()
+    with open(dogfile) as infile:
+        for line in infile:
+            if split_terms:
+                dog_names.update(name.strip() for name in line.split(','))
+            else:
+                line = line.rstrip()
+                if line in dog_names:
+                    print("**Warning: Duplicate dognames", line)
+                dog_names.add(line)
+    return frozenset(dog_names)
+
+
+class DogTable:
+    """
+    The dog names of a dog names file compiled against the ImageNet labels:
+     dog_names - the dog names (frozenset of string)
+     is_dog - True for each ImageNet class id whose label is a dog (numpy
+              bool array indexed by class id)
+     split_terms - True if labels are matched term by term (bool)
+    """
+
+    def __init__(self, dog_names, index, split_terms=False):
+        """
+        Builds the table from the dog names & the LabelIndex of the ImageNet
+        labels.
+        """
+        self.dog_names = dog_names
+        self.split_terms = split_terms
+        self.index = index
+        if split_terms:
+            self.is_dog = np.array([any(term in dog_names for term in terms)
+                                    for terms in index.terms], dtype=bool)
+        else:
+            self.is_dog = np.array([label in dog_names
+                                    for label in index.normalized], dtype=bool)
+
+    def is_dog_label(self, label):
+        """
+        Returns True if the (lowercase & stripped) classifier label is a dog.
+        """
+        if self.split_terms:
+            return any(term.strip() in self.dog_names
+                       for term in label.split(','))
+        return label in self.dog_names
+
+    def pet_labels_are_dogs(self, labels):
+        """
+        Returns whether each pet image label is one of the dog names.
+        Parameters:
+         labels - lowercase pet image labels (list of string)
+        Returns:
+         flags - True for each label that is a dog (numpy bool array)
+        """
+        dog_names = self.dog_names
+        return np.fromiter((label in dog_names for label in labels),
+                           dtype=bool, count=len(labels))
+
+    def classes_are_dogs(self, class_ids):
+        """
+        Returns whether each ImageNet class id is a dog.
+        Parameters:
+         class_ids - predicted class ids (list or numpy array of int)
+        Returns:
+         flags - True for each class id that is a dog (numpy bool array)
+        """
+        return self.is_dog[np.asarray(class_ids, dtype=np.intp)]
+
+    def classifier_labels_are_dogs(self, labels):
+        """
+        Same as classes_are_dogs() but for classifier labels, which are mapped
+        to their class ids through the label index. Labels that aren't
+        ImageNet labels (e.g. made up for a test) are looked up by name.
+        Parameters:
+         labels - lowercase & stripped classifier labels (list of string)
+        Returns:
+         flags - True for each label that is a dog (numpy bool array)
+        """
+        class_ids = np.fromiter((self.index.class_ids.get(label, -1)
+                                 for label in labels), dtype=np.intp,
+                                count=len(labels))
+        flags = self.is_dog[class_ids]
+        for pos in np.flatnonzero(class_ids < 0):
+            flags[pos] = self.is_dog_label(labels[pos])
+        return flags
+
+
+def load_dog_table(dogfile, split_terms=False,
+                   labels_path=IMAGENET_LABELS_FILE):
+    """
+    Returns the DogTable of dogfile, compiling it on the first call (or when
+    the file has changed since) and reusing it afterwards.
+    Parameters:
+     dogfile - text file that contains the dognames (string)
+     split_terms - True matches labels term by term (see DogTable) (bool)
+     labels_path - path to the ImageNet labels file (string)
+    Returns:
+     table - the compiled dog table (DogTable)
+    """
+    dog_stat = os.stat(dogfile)
+    key = (os.path.abspath(dogfile), split_terms, os.path.abspath(labels_path))
+    version = (dog_stat.st_size, dog_stat.st_mtime_ns)
+
+    if key not in loaded_tables or loaded_tables[key][0] != version:
+        table = DogTable(read_dog_names(dogfile, split_terms),
+                         load_label_index(labels_path), split_terms)
+        loaded_tables[key] = (version, table)
+    return loaded_tables[key][1]
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/graph_cache.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: On-disk cache of compiled (TorchScript) models, used by
+#          classifier.py with the 'torchscript' backend
+#          (check_images_solution.py --backend torchscript). Each model is
+#          traced once, frozen (its weights become constants, batch norms
+#          are folded into the convolutions) and saved as a graph file. Later
+#          runs load the graph file directly - without building the
+#          torchvision model, loading its weights or calibrating its int8
+#          quantization - and apply PyTorch's inference optimizations
+#          (operator fusion) to it as it's loaded, so the forward passes no
+#          longer go through the Python module hierarchy.
+#          A graph file is named after everything it depends on - the model,
+#          the version of its weights, its precision and the PyTorch version
+#          - so a change to any of them exports a new one. The static int8
+#          graphs keep the calibration they were exported with: delete them
+#          (or use another --graph-dir) to calibrate on other images.
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python graph_cache.py --arch <model> --precision <precision>
+#             --dir <graph folder>
+#   Example calls:
+#    python graph_cache.py --arch all                  (exports the graphs)
+#    python check_images_solution.py --arch all --backend torchscript
+##
+
+# Imports python modules
+import argparse
+import os
+import warnings
+
+import torch
+from torch import __version__
+
+# Imports the names of the precisions
+from quantize import PRECISIONS
+
+# Names of the backends the models can run on
+BACKENDS = ('eager', 'torchscript')
+
+# Default folder of the graph files
+DEFAULT_GRAPH_DIR = 'compiled_models/'
+
+# Shape of the example batch the models are traced with - the traced graphs
+# take batches of any size
+TRACE_SHAPE = (1, 3, 224, 224)
+
+
+def get_graph_path(graph_dir, model_name, weights_version, precision,
+                   vocabulary=None):
+    """
+    Returns the path of the graph file of a model.
+    Parameters:
+     graph_dir - folder of the graph files (string)
+     model_name - resnet alexnet vgg (string)
+     weights_version - version of the model's pretrained weights (string)
+     precision - precision of the model (see quantize.py) (string)
+     vocabulary - name of the vocabulary the model is restricted to (see
+                  restricted_head.py), None for all classes (string)
+    Returns:
+     graph_path - path of the graph file (string)
+    """
+    torch_version = __version__.split('+')[0]
+    if vocabulary is not None:
+        precision += '-vocab-' + vocabulary
+    return os.path.join(graph_dir, '{0}-{1}-{2}-torch{3}.pt'.format(
+                            model_name, weights_version, precision,
+                            torch_version))
+
+
+def export_graph(model, graph_path):
+    """
+    Traces & freezes model and saves the graph to graph_path.
+    Parameters:
+     model - model in evaluation mode (eager or quantized)
+     graph_path - path of the graph file to write (string)
+    Returns:
+     None
+    """
+    # Writes to a temporary file first so that a run started at the same time
+    # never loads a half-written graph
+    os.makedirs(os.path.dirname(graph_path) or '.', exist_ok=True)
+    temp_path = '{0}.{1}.tmp'.format(graph_path, os.getpid())
+
+    # Tracing warns about the constants it bakes in, and TorchScript about
+    # its own deprecation
+    with warnings.catch_warnings(), torch.no_grad():
+        warnings.simplefilter('ignore')
+        graph = torch.jit.freeze(torch.jit.trace(model, torch.zeros(TRACE_SHAPE)))
+        torch.jit.save(graph, temp_path)
+    os.replace(temp_path, graph_path)
+
+
+def load_graph(graph_path):
+    """
+    Loads a graph file and applies the inference optimizations (operator
+    fusion). These can't be saved in the file, so they're applied on every
+    load.
+    Parameters:
+     graph_path - path of the graph file (string)
+    Returns:
+     graph - the optimized model (torch.jit.ScriptModule)
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        graph = torch.jit.load(graph_path, map_location='cpu')
+        return torch.jit.optimize_for_inference(graph)
+
+
+# Main program function defined below
+def main():
+    # Creates & retrieves Command Line Arugments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--arch', type=str, default='all',
+                        help='model(s) to export, separated by commas or all')
+    parser.add_argument('--precision', type=str, default='fp32',
+                        choices=PRECISIONS,
+                        help='precision of the exported models (see '
+                             'quantize.py)')
+    parser.add_argument('--calibration-dir', type=str, default='',
+                        help='folder of images the int8 quantization is '
+                             'calibrated on (default: pet_images/)')
+    parser.add_argument('--weights', type=str, default='',
+                        help='local weights directory to load the pretrained '
+                             'weights from (see weight_store.py)')
+    parser.add_argument('--dir', type=str, default=DEFAULT_GRAPH_DIR,
+                        help='folder the graph files are saved to')
+    in_arg = parser.parse_args()
+
+    # Imported here as classifier.py imports this module
+    import classifier
+    if in_arg.weights:
+        classifier.set_weights_dir(in_arg.weights)
+    classifier.set_precision(in_arg.precision, in_arg.calibration_dir)
+    archs = (list(classifier.model_builders) if in_arg.arch == 'all' else
+             [name.strip() for name in in_arg.arch.split(',')])
+
+    # Exports each model again, even if its graph file already exists
+    for arch in archs:
+        graph_path = classifier.get_graph_path(arch, in_arg.dir)
+        export_graph(classifier.get_eager_model(arch), graph_path)
+        print("Saved", graph_path)
+
+
+# Call to main function to run the program
+if __name__ == "__main__":
+    main()
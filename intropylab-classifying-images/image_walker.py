@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/image_walker.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Finds the pet images to classify and parses their pet labels, for
+#          all the get_pet_labels() functions. The image folder is walked
+#          with os.scandir - recursively, with several directories (and the
+#          magic byte checks) handled at once by a pool of threads - and the
+#          (path, pet label) of each image is yielded as soon as its chunk of
+#          the directory has been read, so a huge tree can start being
+#          classified before it has been listed in full (see
+#          stream_pipeline.py). By default the walk is ordered - the files of
+#          each directory sorted by name, then each subdirectory's tree in
+#          turn (sorted by name) - so identical runs list the images in the
+#          same order; an unordered walk hands on the images of the
+#          directories being read at the same time as they come, which is
+#          faster but differs from run to run. Images are recognized by their
+#          extension, or optionally by the magic bytes at the start of the
+#          file.
+#          Pet labels are parsed from the filenames with one compiled
+#          parser per labelling rule:
+#           'alpha' - the words of the filename (separated by '_') made of
+#                     letters only, lowercase ('Boston_terrier_02259.jpg' ->
+#                     'boston terrier') (check_images_solution.py)
+#           'prefix' - everything before the last '_', lowercase with the
+#                      '_' replaced by spaces (check_images.py)
+#
+#   Example usage:
+#    for path, pet_label in walk_images('pet_images/'):
+#        print(path, pet_label)       -> Basenji_00963.jpg basenji
+#    load_label_parser().parse('Boston_terrier_02259.jpg') -> 'boston terrier'
+##
+
+# Imports python modules
+import os
+import queue
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Names of the labelling rules
+LABEL_RULES = ('alpha', 'prefix')
+
+# Extensions (lowercase) of the image files the classifier can read
+IMAGE_EXTENSIONS = frozenset(('.jpg', '.jpeg', '.png', '.gif', '.bmp',
+                              '.tif', '.tiff', '.webp'))
+
+# Magic bytes at the start of those image files - (offset, bytes)
+IMAGE_SIGNATURES = ((0, b'\xff\xd8\xff'),                  # JPEG
+                    (0, b'\x89PNG\r\n\x1a\n'),             # PNG
+                    (0, b'GIF87a'), (0, b'GIF89a'),        # GIF
+                    (0, b'BM'),                            # BMP
+                    (0, b'II*\x00'), (0, b'MM\x00*'),      # TIFF
+                    (8, b'WEBP'))                          # WebP (RIFF)
+
+# Number of bytes read to check the magic bytes
+SIGNATURE_SIZE = 12
+
+# Number of threads walking the directories & number of paths read from a
+# directory before they're handed on
+DEFAULT_SCAN_THREADS = 4
+DEFAULT_CHUNK_SIZE = 256
+
+# Marks the end of the walk in the queue of chunks
+END_OF_SCAN = object()
+
+# Label parsers created so far by load_label_parser(), by rule
+loaded_parsers = dict()
+
+
+class LabelParser:
+    """
+    Parses the pet image label from an image filename (or path) with one
+    compiled regular expression:
+     rule - the labelling rule, 'alpha' or 'prefix' (string)
+    """
+    # Words between '_'s (or the ends) made of letters - the isalpha() check
+    # in parse() drops the few non-letters (like '½') that [^\W\d_] lets in
+    ALPHA_WORDS = re.compile(r'(?<![^_])[^\W\d_]+(?![^_])')
+
+    # Everything before the last '_'
+    PREFIX = re.compile(r'(.*)_', re.DOTALL)
+
+    def __init__(self, rule='alpha'):
+        if rule not in LABEL_RULES:
+            raise ValueError("Unknown labelling rule '{0}' - must be one of: "
+                             "{1}".format(rule, ', '.join(LABEL_RULES)))
+        self.rule = rule
+        self.parse = self.parse_alpha if rule == 'alpha' else self.parse_prefix
+
+    def parse_alpha(self, path):
+        """
+        Returns the pet label of path with the 'alpha' rule.
+        """
+        words = self.ALPHA_WORDS.findall(path.rpartition(os.sep)[2])
+        return ' '.join([word for word in words if word.isalpha()]).lower()
+
+    def parse_prefix(self, path):
+        """
+        Returns the pet label of path with the 'prefix' rule.
+        """
+        prefix = self.PREFIX.match(path.rpartition(os.sep)[2].lower())
+        if prefix is None:
+            return ''
+        return prefix.group(1).replace('_', ' ').strip()
+
+
+def load_label_parser(rule='alpha'):
+    """
+    Returns the LabelParser for rule, shared by every caller.
+    Parameters:
+     rule - labelling rule, 'alpha' or 'prefix' (see LabelParser) (string)
+    Returns:
+     parser - the label parser (LabelParser)
+    """
+    if rule not in loaded_parsers:
+        loaded_parsers[rule] = LabelParser(rule)
+    return loaded_parsers[rule]
+
+
+def has_image_extension(filename):
+    """
+    Returns True if filename has one of the IMAGE_EXTENSIONS.
+    """
+    return filename[filename.rfind('.'):].lower() in IMAGE_EXTENSIONS
+
+
+def has_image_signature(path):
+    """
+    Returns True if the file at path starts with the magic bytes of one of
+    the image formats (False if it can't be read).
+    """
+    try:
+        with open(path, 'rb') as infile:
+            head = infile.read(SIGNATURE_SIZE)
+    except OSError:
+        return False
+    return any(head.startswith(signature, offset)
+               for offset, signature in IMAGE_SIGNATURES)
+
+
+def scan_directory(image_dir, rel_dir, sniff, chunk_size, subdirs=None):
+    """
+    Reads one directory of the walk, skipping hidden files & directories
+    (like .DS_Store of Mac OSX).
+    Parameters:
+     image_dir - The (full) path to the folder being walked (string)
+     rel_dir - path of the directory to read, relative to image_dir (string)
+     sniff - True keeps every file for the magic bytes check, False only
+             the files with an image extension (bool)
+     chunk_size - number of paths per chunk (int)
+     subdirs - List the subdirectories (relative to image_dir) are added
+               to, None to skip them (list)
+    Returns:
+     generator of Lists of image paths relative to image_dir
+    """
+    chunk = list()
+    prefix = rel_dir + os.sep if rel_dir else ''
+    with os.scandir(os.path.join(image_dir, rel_dir)) as entries:
+        for entry in entries:
+            name = entry.name
+            if name[0] == '.':
+                continue
+            # Symbolic links to directories aren't followed, as in os.walk()
+            if entry.is_dir(follow_symlinks=False):
+                if subdirs is not None:
+                    subdirs.append(prefix + name)
+            elif sniff or has_image_extension(name):
+                chunk.append(prefix + name)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = list()
+    if chunk:
+        yield chunk
+
+
+def sniff_chunk(image_dir, chunk):
+    """
+    Returns the paths of chunk (relative to image_dir) whose files start
+    with image magic bytes.
+    """
+    return [path for path in chunk
+            if has_image_signature(os.path.join(image_dir, path))]
+
+
+def read_directory(image_dir, rel_dir, sniff, recursive):
+    """
+    Reads one directory of an ordered walk in full.
+    Parameters:
+     see scan_directory() & walk_image_files()
+    Returns:
+     paths - sorted image paths of the directory, relative to image_dir 
+             (list)
+     subdirs - sorted subdirectories, relative to image_dir (list)
+    """
+    paths = list()
+    subdirs = list() if recursive else None
+    for chunk in scan_directory(image_dir, rel_dir, sniff, DEFAULT_CHUNK_SIZE,
+                                subdirs):
+        paths.extend(sniff_chunk(image_dir, chunk) if sniff else chunk)
+    return sorted(paths), sorted(subdirs or ())
+
+
+def walk_ordered(image_dir, recursive=True, sniff=False,
+                 threads=DEFAULT_SCAN_THREADS):
+    """
+    Walks image_dir in a fixed order (see walk_image_files()) - with threads
+    the next directories of the walk are read ahead at the same time.
+    Returns:
+     generator of image paths relative to image_dir (string)
+    """
+    if threads <= 0:
+        pending = ['']
+        while pending:
+            paths, subdirs = read_directory(image_dir, pending.pop(), sniff,
+                                            recursive)
+            yield from paths
+            pending.extend(reversed(subdirs))
+        return
+
+    # Directories still to walk, the next one last - each with the future of
+    # its read once it's been started
+    pending = [['', None]]
+    read_ahead = threads * 4
+    pool = ThreadPoolExecutor(threads)
+    try:
+        while pending:
+            # Starts reading the next directories of the walk
+            for entry in pending[-read_ahead:]:
+                if entry[1] is None:
+                    entry[1] = pool.submit(read_directory, image_dir, entry[0],
+                                           sniff, recursive)
+            paths, subdirs = pending.pop()[1].result()
+            pending.extend([subdir, None] for subdir in reversed(subdirs))
+            yield from paths
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def walk_image_files(image_dir, recursive=True, sniff=False,
+                     threads=DEFAULT_SCAN_THREADS,
+                     chunk_size=DEFAULT_CHUNK_SIZE, ordered=True):
+    """
+    Walks image_dir lazily, yielding the path of each image file relative to
+    image_dir (for the images directly in image_dir, just the filename).
+    Ordered walks list the files of each directory sorted by name, followed
+    by the trees of its subdirectories in name order, so every run lists the
+    images in the same order; each directory is read in full before its
+    images are handed on. Otherwise the images of each directory come in
+    the order os.scandir() lists them, chunk by chunk, and with threads the
+    directories of a tree are read at the same time, so their images are
+    interleaved differently on every run.
+    Parameters:
+     image_dir - The (full) path to the folder of images (string)
+     recursive - True also walks the subdirectories of image_dir (bool)
+     sniff - True recognizes images by their magic bytes instead of by
+             their extension (bool)
+     threads - number of threads reading directories (and checking magic
+               bytes), 0 walks on the calling thread (int)
+     chunk_size - number of paths read from a directory before they're
+                  handed on, in an unordered walk (int)
+     ordered - True walks the tree in a fixed order (bool)
+    Returns:
+     generator of image paths relative to image_dir (string)
+    """
+    if ordered:
+        yield from walk_ordered(image_dir, recursive, sniff, threads)
+        return
+
+    if threads <= 0:
+        pending = ['']
+        while pending:
+            subdirs = list() if recursive else None
+            for chunk in scan_directory(image_dir, pending.pop(), sniff,
+                                        chunk_size, subdirs):
+                yield from sniff_chunk(image_dir, chunk) if sniff else chunk
+            pending.extend(reversed(subdirs or ()))
+        return
+
+    # Chunks of paths (or futures of sniffed chunks, in directory order) in
+    # the order they're read - bounded so the walk can't get far ahead of
+    # the consumer
+    chunks = queue.Queue(threads * 4)
+    stop = threading.Event()
+    lock = threading.Lock()
+    n_running = [0]
+    scan_pool = ThreadPoolExecutor(threads)
+    # The magic byte checks have their own threads, as the scanning threads
+    # can be waiting for the consumer to take a checked chunk
+    sniff_pool = ThreadPoolExecutor(threads) if sniff else None
+
+    def put(item):
+        # Gives up if the consumer stopped early
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def submit_scan(rel_dir):
+        with lock:
+            n_running[0] += 1
+        scan_pool.submit(scan, rel_dir)
+
+    def scan(rel_dir):
+        try:
+            subdirs = list() if recursive else None
+            for chunk in scan_directory(image_dir, rel_dir, sniff, chunk_size,
+                                        subdirs):
+                if sniff:
+                    chunk = sniff_pool.submit(sniff_chunk, image_dir, chunk)
+                if not put(chunk):
+                    return
+            for subdir in subdirs or ():
+                submit_scan(subdir)
+        except BaseException as error:
+            put(error)
+        finally:
+            # The last directory to finish ends the walk
+            with lock:
+                n_running[0] -= 1
+                finished = n_running[0] == 0
+            if finished:
+                put(END_OF_SCAN)
+
+    submit_scan('')
+    try:
+        while True:
+            item = chunks.get()
+            if item is END_OF_SCAN:
+                return
+            if isinstance(item, Future):
+                item = item.result()
+            # Re-raises an error of a scanning thread in the consumer
+            if isinstance(item, BaseException):
+                raise item
+            yield from item
+    finally:
+        stop.set()
+        scan_pool.shutdown(wait=False, cancel_futures=True)
+        if sniff_pool is not None:
+            sniff_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def walk_images(image_dir, rule='alpha', recursive=True, sniff=False,
+                threads=DEFAULT_SCAN_THREADS, chunk_size=DEFAULT_CHUNK_SIZE,
+                ordered=True):
+    """
+    Walks image_dir lazily (see walk_image_files()), yielding the path of
+    each image relative to image_dir and its pet label.
+    Parameters:
+     rule - labelling rule, 'alpha' or 'prefix' (see LabelParser) (string)
+     see walk_image_files() for the others
+    Returns:
+     generator of (path, pet label) tuples
+    """
+    parse = load_label_parser(rule).parse
+    for path in walk_image_files(image_dir, recursive, sniff, threads,
+                                 chunk_size, ordered):
+        yield path, parse(path)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/inference_client.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Thin client of the local inference server (inference_server.py).
+#          classifier(img_path, model_name) has the same signature & returns
+#          the same label as classifier() in classifier.py, but the image is
+#          classified by the server - which keeps the models loaded and
+#          batches the requests of all its clients together - so a tool
+#          calling it neither loads torch nor a model. It only needs the
+#          Python standard library.
+#          The server's address is taken from the AIPND_CLASSIFIER_SERVER
+#          environment variable: the path of a Unix socket or host:port of a
+#          TCP socket (default: aipnd_classifier.sock in the temp folder).
+#          The requests & responses are lines of JSON:
+#           {"id": 1, "path": "/abs/Beagle_01141.jpg", "model": "vgg",
+#            "fast_decode": false}
+#           {"id": 1, "label": "beagle", "class_id": 162}
+#
+#   Example usage:
+#    from inference_client import classifier
+#    label = classifier('pet_images/Beagle_01141.jpg', 'vgg')
+##
+
+# Imports python modules
+import builtins
+import itertools
+import json
+import os
+import socket
+import tempfile
+import threading
+
+# Environment variable with the address of the inference server
+SERVER_ENV = 'AIPND_CLASSIFIER_SERVER'
+
+# Address of the server when SERVER_ENV isn't set - a Unix socket
+DEFAULT_ADDRESS = os.path.join(tempfile.gettempdir(), 'aipnd_classifier.sock')
+
+# Connection of each thread to the server, used by classifier()
+thread_clients = threading.local()
+
+
+def get_server_address(address=None):
+    """
+    Returns the address of the inference server: address if given, otherwise
+    the SERVER_ENV environment variable or DEFAULT_ADDRESS.
+    """
+    return address or os.environ.get(SERVER_ENV) or DEFAULT_ADDRESS
+
+
+def parse_address(address):
+    """
+    Splits a server address into its kind & location.
+    Parameters:
+     address - Unix socket path, or host:port for a TCP socket (string)
+    Returns:
+     tcp_address - (host, port) tuple, or None for a Unix socket (tuple)
+     socket_path - the Unix socket path, or None for TCP (string)
+    """
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and os.sep not in address:
+        return (host or 'localhost', int(port)), None
+    return None, address
+
+
+def raise_error(response):
+    """
+    Raises the error a server response reports - as the same built-in
+    exception (e.g. FileNotFoundError) the image would have raised locally,
+    otherwise as a RuntimeError.
+    """
+    error_type = getattr(builtins, response.get('error_type', ''), None)
+    if not (isinstance(error_type, type) and issubclass(error_type, Exception)):
+        error_type = RuntimeError
+    raise error_type(response['error'])
+
+
+class InferenceClient:
+    """
+    Connection to the inference server. One request is sent at a time by
+    classify(), while classify_many() sends all of its requests before
+    reading the responses so the server can batch them.
+    """
+
+    def __init__(self, address=None):
+        """
+        Connects to the server at address (see get_server_address()).
+        """
+        self.address = get_server_address(address)
+        tcp_address, socket_path = parse_address(self.address)
+        try:
+            if tcp_address is not None:
+                self.sock = socket.create_connection(tcp_address)
+            else:
+                self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.sock.connect(socket_path)
+        except OSError as error:
+            raise ConnectionError("Can't connect to the inference server at "
+                                  "{0} ({1}) - start it with: python "
+                                  "inference_server.py".format(self.address,
+                                                               error)) from None
+        self.stream = self.sock.makefile('rwb')
+        self.request_ids = itertools.count(1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Closes the connection.
+        """
+        self.stream.close()
+        self.sock.close()
+
+    def send(self, message):
+        """
+        Sends one request (without waiting for the response) & returns its id.
+        """
+        message['id'] = next(self.request_ids)
+        self.stream.write(json.dumps(message).encode('utf-8') + b'\n')
+        return message['id']
+
+    def receive(self):
+        """
+        Reads the next response (dict).
+        """
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError('The inference server closed the connection')
+        return json.loads(line)
+
+    def classify_many(self, img_paths, model_name, fast_decode=False,
+                      return_class_id=False):
+        """
+        Classifies several images - every request is sent before the first
+        response is read.
+        Parameters:
+         img_paths - paths to the image files (list)
+         model_name - resnet alexnet vgg (string)
+         fast_decode - True decodes JPEGs at reduced resolution (bool)
+         return_class_id - True returns (label, class id) tuples (bool)
+        Returns:
+         labels - the ImageNet label of each image, in order (list)
+        """
+        labels = [None] * len(img_paths)
+        first_error = None
+        try:
+            # Paths are sent absolute as the server may run in another folder
+            positions = dict()
+            for pos, img_path in enumerate(img_paths):
+                request_id = self.send({'path': os.path.abspath(img_path),
+                                        'model': model_name,
+                                        'fast_decode': fast_decode})
+                positions[request_id] = pos
+            self.stream.flush()
+
+            # The responses come back as each batch finishes, not in order.
+            # All of them are read before an error is raised, so none are
+            # left on the connection for the next call to read
+            for _ in range(len(img_paths)):
+                response = self.receive()
+                if 'error' in response:
+                    first_error = first_error or response
+                    continue
+                labels[positions[response['id']]] = (
+                    (response['label'], response['class_id'])
+                    if return_class_id else response['label'])
+        except Exception:
+            # The connection is out of step with the server - it's closed so
+            # get_client() connects again
+            self.close()
+            raise
+        if first_error is not None:
+            raise_error(first_error)
+        return labels
+
+    def classify(self, img_path, model_name, fast_decode=False,
+                 return_class_id=False):
+        """
+        Classifies one image (see classify_many()).
+        """
+        return self.classify_many([img_path], model_name, fast_decode,
+                                  return_class_id)[0]
+
+    def stats(self):
+        """
+        Returns the server's counts of requests & batches (dict).
+        """
+        self.send({'op': 'stats'})
+        self.stream.flush()
+        return self.receive()
+
+
+def get_client(address=None):
+    """
+    Returns this thread's connection to the server, connecting on first use
+    (and again if the connection was closed).
+    """
+    address = get_server_address(address)
+    clients = getattr(thread_clients, 'clients', None)
+    if clients is None:
+        clients = thread_clients.clients = dict()
+    if address not in clients or clients[address].stream.closed:
+        clients[address] = InferenceClient(address)
+    return clients[address]
+
+
+def classifier(img_path, model_name, fast_decode=False, return_class_id=False):
+    """
+    Classifies an image with the inference server - a drop-in replacement
+    for classifier() in classifier.py.
+    Parameters:
+     img_path - path to the image file (string)
+     model_name - resnet alexnet vgg (string)
+     fast_decode - True decodes JPEGs at reduced resolution (bool)
+     return_class_id - True returns (label, class id) (bool)
+    Returns:
+     label - ImageNet label of the image (string)
+    """
+    return get_client().classify(img_path, model_name, fast_decode,
+                                 return_class_id)
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/inference_server.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Long-running local inference server. Keeps the models loaded and
+#          classifies the images its clients ask for (see inference_client.py)
+#          over a Unix socket or a localhost TCP socket. Requests for the
+#          same model that arrive close together are classified together:
+#          a micro-batch is started by the first request and classified once
+#          it has --max-batch-size images or --max-wait-ms have passed. Each
+#          image starts being decoded (on the decode threads) as soon as its
+#          request arrives, and the forward passes run on one inference
+#          thread, so the asyncio event loop only waits - thousands of
+#          requests in flight are just as many coroutines, not threads.
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python inference_server.py --arch <models to keep loaded>
+#             --socket <Unix socket path> | --port <localhost TCP port>
+#             --max-batch-size <images> --max-wait-ms <milliseconds>
+#   Example calls:
+#    python inference_server.py --arch all
+#    python inference_server.py --arch vgg --port 8765 --max-wait-ms 10
+#    AIPND_CLASSIFIER_SERVER=localhost:8765 python my_tool.py
+##
+
+# Imports python modules
+import argparse
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+# Imports the image decoding & batch inference of the classifier
+import classifier
+from classifier import (decode_image, predict_batch, imagenet_classes_dict,
+                        model_builders)
+
+# Imports the control of torch's thread pools
+from thread_tuning import set_threads
+
+# Imports the server address handling of the client
+from inference_client import get_server_address, parse_address
+
+# Default largest number of images in a micro-batch & longest time the first
+# request of a micro-batch waits for more requests
+DEFAULT_MAX_BATCH_SIZE = 16
+DEFAULT_MAX_WAIT_MS = 5.0
+
+# Default number of threads decoding images
+DEFAULT_DECODE_THREADS = 4
+
+
+class MicroBatcher:
+    """
+    Collects the requests for one model (& decode mode) into micro-batches
+    and classifies them. Its run() coroutine must be running on the event
+    loop for classify() to return.
+    """
+
+    def __init__(self, model_name, fast_decode, max_batch_size, max_wait,
+                 decode_pool, inference_pool):
+        """
+        Parameters:
+         model_name - resnet alexnet vgg (string)
+         fast_decode - True decodes JPEGs at reduced resolution (bool)
+         max_batch_size - largest number of images in a micro-batch (int)
+         max_wait - seconds the first request of a micro-batch waits for
+                    more requests (float)
+         decode_pool - threads decoding the images (ThreadPoolExecutor)
+         inference_pool - the thread running the forward passes
+                          (ThreadPoolExecutor)
+        """
+        self.model_name = model_name
+        self.fast_decode = fast_decode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.decode_pool = decode_pool
+        self.inference_pool = inference_pool
+        self.pending = asyncio.Queue()
+        self.n_images = 0
+        self.n_batches = 0
+
+    async def classify(self, img_path):
+        """
+        Classifies one image with the next micro-batch.
+        Parameters:
+         img_path - path to the image file (string)
+        Returns:
+         class_id - predicted ImageNet class id (int)
+        """
+        loop = asyncio.get_running_loop()
+        # Starts decoding the image while the micro-batch fills up
+        decoded = loop.run_in_executor(self.decode_pool, decode_image,
+                                       img_path, self.fast_decode)
+        result = loop.create_future()
+        await self.pending.put((decoded, result))
+        return await result
+
+    async def next_batch(self):
+        """
+        Waits for the first request and collects more requests until the
+        micro-batch is full or max_wait has passed since the first one.
+        Returns:
+         batch - List of (decoded image future, result future) tuples (list)
+        """
+        loop = asyncio.get_running_loop()
+        batch = [await self.pending.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Requests that are already waiting are taken straight away
+            if not self.pending.empty():
+                batch.append(self.pending.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.pending.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        """
+        Classifies micro-batches for as long as the server runs.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.next_batch()
+
+            # Images that couldn't be decoded fail on their own
+            decoded = await asyncio.gather(*(item[0] for item in batch),
+                                           return_exceptions=True)
+            tensors, results = list(), list()
+            for (_, result), image in zip(batch, decoded):
+                if isinstance(image, BaseException):
+                    if not result.done():
+                        result.set_exception(image)
+                else:
+                    tensors.append(image[0])
+                    results.append(result)
+            if not tensors:
+                continue
+
+            # Requests arriving during the forward pass fill the next batch
+            try:
+                pred_idxs, _ = await loop.run_in_executor(
+                                   self.inference_pool, predict_batch,
+                                   self.model_name, torch.stack(tensors))
+            except Exception as error:
+                for result in results:
+                    if not result.done():
+                        result.set_exception(error)
+                continue
+            self.n_images += len(results)
+            self.n_batches += 1
+            for result, pred_idx in zip(results, pred_idxs):
+                # The client may have gone away in the meantime
+                if not result.done():
+                    result.set_result(pred_idx)
+
+
+class InferenceServer:
+    """
+    Answers the requests of the clients, passing each image to the
+    MicroBatcher of its model & decode mode.
+    """
+
+    def __init__(self, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 decode_threads=DEFAULT_DECODE_THREADS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.decode_pool = ThreadPoolExecutor(decode_threads)
+        # One inference thread - the forward passes use torch's own threads
+        self.inference_pool = ThreadPoolExecutor(1)
+        self.batchers = dict()
+        self.batcher_tasks = list()
+        self.n_requests = 0
+        self.n_connections = 0
+
+    async def warm_up(self, model_names):
+        """
+        Loads the models (on the inference thread) before serving.
+        """
+        loop = asyncio.get_running_loop()
+        for model_name in model_names:
+            await loop.run_in_executor(self.inference_pool, classifier.get_model,
+                                       model_name)
+
+    def get_batcher(self, model_name, fast_decode):
+        """
+        Returns the MicroBatcher of model_name & fast_decode, starting it on
+        first use.
+        """
+        key = (model_name, fast_decode)
+        if key not in self.batchers:
+            if model_name not in model_builders:
+                raise ValueError("Unknown model architecture '{0}', values "
+                                 "must be: {1}".format(model_name,
+                                                       ' '.join(model_builders)))
+            self.batchers[key] = MicroBatcher(model_name, fast_decode,
+                                              self.max_batch_size,
+                                              self.max_wait, self.decode_pool,
+                                              self.inference_pool)
+            self.batcher_tasks.append(asyncio.create_task(self.batchers[key].run()))
+        return self.batchers[key]
+
+    def stats(self):
+        """
+        Returns the counts of connections, requests, images & batches (dict).
+        """
+        n_images = sum(batcher.n_images for batcher in self.batchers.values())
+        n_batches = sum(batcher.n_batches for batcher in self.batchers.values())
+        return {'n_connections': self.n_connections,
+                'n_requests': self.n_requests, 'n_images': n_images,
+                'n_batches': n_batches,
+                'mean_batch_size': n_images / n_batches if n_batches else 0.0}
+
+    async def answer(self, request):
+        """
+        Returns the response (dict) to one request (dict).
+        """
+        response = {'id': request.get('id')}
+        try:
+            if request.get('op') == 'stats':
+                response.update(self.stats())
+                return response
+            self.n_requests += 1
+            batcher = self.get_batcher(request['model'],
+                                       bool(request.get('fast_decode', False)))
+            class_id = await batcher.classify(request['path'])
+            response['label'] = imagenet_classes_dict[class_id]
+            response['class_id'] = class_id
+        except Exception as error:
+            response['error'] = str(error)
+            response['error_type'] = type(error).__name__
+        return response
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves one client - its requests are answered concurrently, each
+        response being written as soon as it's ready.
+        """
+        self.n_connections += 1
+        answering = set()
+
+        async def answer_request(line):
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('A request must be a JSON object')
+            except ValueError as error:
+                response = {'id': None,
+                            'error': 'Malformed request: {0}'.format(error),
+                            'error_type': 'ValueError'}
+            else:
+                response = await self.answer(request)
+            writer.write(json.dumps(response).encode('utf-8') + b'\n')
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(answer_request(line))
+                answering.add(task)
+                task.add_done_callback(answering.discard)
+            if answering:
+                await asyncio.wait(answering)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address, model_names=()):
+        """
+        Loads the models and serves at address until cancelled.
+        Parameters:
+         address - Unix socket path, or host:port (string)
+         model_names - models to load before serving (list)
+        """
+        await self.warm_up(model_names)
+        tcp_address, socket_path = parse_address(address)
+        if tcp_address is not None:
+            server = await asyncio.start_server(self.handle_connection,
+                                                *tcp_address)
+        else:
+            # Removes the socket file of a server that didn't shut down
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = await asyncio.start_unix_server(self.handle_connection,
+                                                     socket_path)
+        print("Inference server listening at", address, "- models loaded:",
+              ', '.join(model_names) or 'none', flush=True)
+
+        # Stops serving on SIGTERM too (e.g. from a service manager), where
+        # the event loop supports signal handlers
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, AttributeError):
+            pass
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in self.batcher_tasks:
+                task.cancel()
+            if socket_path is not None and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+# Main program function defined below
+def main():
+    # Creates & retrieves Command Line Arugments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--arch', type=str, default='all',
+                        help='models to load before serving, separated by '
+                             'commas, or all (others are loaded on first use)')
+    parser.add_argument('--socket', type=str, default='',
+                        help='Unix socket path to listen at (default: '
+                             '$AIPND_CLASSIFIER_SERVER or aipnd_classifier.sock '
+                             'in the temp folder)')
+    parser.add_argument('--port', type=int, default=0,
+                        help='listen at this localhost TCP port instead of a '
+                             'Unix socket')
+    parser.add_argument('--max-batch-size', type=int,
+                        default=DEFAULT_MAX_BATCH_SIZE,
+                        help='largest number of images in a micro-batch')
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help='milliseconds the first request of a micro-batch '
+                             'waits for more requests')
+    parser.add_argument('--decode-threads', type=int,
+                        default=DEFAULT_DECODE_THREADS,
+                        help='number of threads decoding images')
+    parser.add_argument('--weights', type=str, default='',
+                        help='local weights directory to load the pretrained '
+                             'weights from (see weight_store.py)')
+    parser.add_argument('--precision', type=str, default='fp32',
+                        choices=classifier.PRECISIONS,
+                        help='precision the models run at (see quantize.py)')
+    parser.add_argument('--calibration-dir', type=str, default='',
+                        help='folder of images the int8 quantization is '
+                             'calibrated on (default: pet_images/)')
+    parser.add_argument('--backend', type=str, default='eager',
+                        choices=classifier.BACKENDS,
+                        help='torchscript runs the models as compiled graphs '
+                             '(see graph_cache.py)')
+    parser.add_argument('--threads', type=int, default=0,
+                        help='number of threads torch uses within an '
+                             'operation (0 = PyTorch default, all the cores)')
+    parser.add_argument('--interop-threads', type=int, default=0,
+                        help='number of threads torch runs independent '
+                             'operations on (0 = PyTorch default)')
+    in_arg = parser.parse_args()
+
+    if in_arg.weights:
+        classifier.set_weights_dir(in_arg.weights)
+    classifier.set_precision(in_arg.precision, in_arg.calibration_dir)
+    classifier.set_backend(in_arg.backend)
+    set_threads(in_arg.threads, in_arg.interop_threads)
+    model_names = (list(model_builders) if in_arg.arch == 'all' else
+                   [name.strip() for name in in_arg.arch.split(',')])
+    address = ('localhost:{0}'.format(in_arg.port) if in_arg.port else
+               get_server_address(in_arg.socket))
+
+    server = InferenceServer(in_arg.max_batch_size, in_arg.max_wait_ms,
+                             in_arg.decode_threads)
+    try:
+        asyncio.run(server.serve(address, model_names))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    print("Inference server stopped -", server.stats())
+
+
+# Call to main function to run the program
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/label_index.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Precompiled index of the 1000 ImageNet labels. The labels file
+#          (imagenet1000_clsid_to_human.txt) is parsed with ast.literal_eval
+#          only when it changes - the parsed index is cached in a compact
+#          binary (pickle) file next to it. Besides the original label of
+#          each class id, the index holds the normalized (lowercase,
+#          stripped) label and its separate synonym terms, so that code
+#          comparing labels can work with class ids instead of re-processing
+#          label strings for every image.
+#
+#   Example usage:
+#    index = load_label_index('imagenet1000_clsid_to_human.txt')
+#    index.labels[207]       -> 'golden retriever'
+#    index.terms[1]          -> ('goldfish', 'carassius auratus')
+#    index.class_ids['goldfish, carassius auratus'] -> 1
+##
+
+# Imports python modules
+import ast
+import os
+import pickle
+
+# Default ImageNet labels file used by classifier.py
+IMAGENET_LABELS_FILE = 'imagenet1000_clsid_to_human.txt'
+
+# Bumped whenever the contents of LabelIndex change so old cache files are
+# rebuilt instead of being loaded
+INDEX_FORMAT_VERSION = 1
+
+
+def normalize_label(label):
+    """
+    Normalizes a label the same way the classifier labels are processed
+    before they're compared with the pet labels (lowercase & stripped).
+    """
+    return label.lower().strip()
+
+
+class LabelIndex:
+    """
+    The ImageNet labels indexed by class id:
+     labels - original label of each class id (list of string)
+     normalized - normalized label of each class id (list of string)
+     terms - normalized synonym terms (the label split on commas) of each
+             class id (list of tuple of string)
+     class_ids - Dictionary with key as normalized label and value as its
+                 (first) class id (dict)
+    """
+
+    def __init__(self, classes_dict):
+        """
+        Builds the index from the class id -> label dictionary of the labels
+        file.
+        """
+        self.labels = [classes_dict[class_id] for class_id in range(len(classes_dict))]
+        self.normalized = [normalize_label(label) for label in self.labels]
+        self.terms = [tuple(term.strip() for term in label.split(','))
+                      for label in self.normalized]
+        self.class_ids = dict()
+        for class_id, label in enumerate(self.normalized):
+            self.class_ids.setdefault(label, class_id)
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def get_index_path(labels_path):
+    """
+    Returns the path of the cached index of the labels file labels_path.
+    """
+    return os.path.splitext(labels_path)[0] + '.idx'
+
+
+def load_label_index(labels_path=IMAGENET_LABELS_FILE):
+    """
+    Returns the LabelIndex of the labels file labels_path, loading it from
+    the cached index file when that is up to date and otherwise parsing the
+    labels file & (re)writing the cache.
+    Parameters:
+     labels_path - path to the ImageNet labels file (string)
+    Returns:
+     index - the label index (LabelIndex)
+    """
+    index_path = get_index_path(labels_path)
+    labels_stat = os.stat(labels_path)
+    source_key = (INDEX_FORMAT_VERSION, labels_stat.st_size,
+                  labels_stat.st_mtime_ns)
+
+    # Uses the cached index if it was built from this version of the file
+    try:
+        with open(index_path, 'rb') as infile:
+            cached_key, index = pickle.load(infile)
+        if cached_key == source_key:
+            return index
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+            ValueError, TypeError):
+        pass
+
+    # obtain ImageNet labels
+    with open(labels_path) as imagenet_classes_file:
+        index = LabelIndex(ast.literal_eval(imagenet_classes_file.read()))
+
+    # Caching is only an optimization - a read-only folder is not an error
+    try:
+        with open(index_path, 'wb') as outfile:
+            pickle.dump((source_key, index), outfile, pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return index
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/label_matcher.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Decides whether a pet image label matches a classifier label, for
+#          all the classify_images() functions. Every ImageNet label is
+#          tokenized only once (the first time its class id is matched) into
+#          the set of pet labels it can match, so a match is a set lookup
+#          instead of find() calls & word boundary checks, and the answer for
+#          each (pet label, class id) pair is remembered.
+#          Two matching rules are supported:
+#           'find' - the pet label must be found in the classifier label as
+#                    whole words: its first occurrence must start the label
+#                    or follow a space and must end the label or be followed
+#                    by a space or comma (check_images_solution.py,
+#                    check_images.py)
+#           'terms' - the pet label must be one of the classifier label's
+#                     terms (separated by ', ') or one of the words of a term
+#                     (alternative-to-classify_images.py)
+#
+#   Example usage:
+#    matcher = load_label_matcher()
+#    matcher.matches('golden retriever', 207)      -> True
+#    matcher.match_labels(['cat', 'beagle'], ['tabby, tabby cat', 'beagle'])
+#                                                  -> array([1, 1], dtype=int8)
+##
+
+# Imports python modules
+import numpy as np
+
+# Imports the precompiled ImageNet label index
+from label_index import load_label_index, IMAGENET_LABELS_FILE
+
+# Names of the matching rules
+MATCH_RULES = ('find', 'terms')
+
+# Characters that may follow a pet label found by the 'find' rule
+END_DELIMITERS = (' ', ',')
+
+# Compiled matchers, key = (rule, labels file)
+loaded_matchers = dict()
+
+
+def find_match(pet_label, classifier_label):
+    """
+    The 'find' rule applied directly to the two labels (the original
+    find() & word boundary checks).
+    Parameters:
+     pet_label - pet image label (string)
+     classifier_label - lowercase & stripped classifier label (string)
+    Returns:
+     match - True if the labels match (bool)
+    """
+    found = classifier_label.find(pet_label)
+    if found < 0:
+        return False
+    end = found + len(pet_label)
+    return ((found == 0 or classifier_label[found - 1] == ' ') and
+            (end == len(classifier_label) or
+             classifier_label[end] in END_DELIMITERS))
+
+
+def terms_match(pet_label, classifier_label):
+    """
+    The 'terms' rule applied directly to the two labels.
+    Parameters:
+     pet_label - pet image label (string)
+     classifier_label - lowercase & stripped classifier label (string)
+    Returns:
+     match - True if the labels match (bool)
+    """
+    terms = classifier_label.split(', ')
+    return pet_label in terms or any(pet_label in term.split(' ')
+                                     for term in terms)
+
+
+def find_patterns(classifier_label):
+    """
+    Returns every pet label that the 'find' rule matches with
+    classifier_label: the substrings starting at a word start & ending at a
+    word end whose first occurrence in the label is at that position.
+    Parameters:
+     classifier_label - lowercase & stripped classifier label (string)
+    Returns:
+     patterns - the matching pet labels (frozenset of string)
+    """
+    starts = [0] + [pos + 1 for pos, char in enumerate(classifier_label)
+                    if char == ' ']
+    ends = [pos for pos, char in enumerate(classifier_label)
+            if char in END_DELIMITERS] + [len(classifier_label)]
+
+    patterns = set()
+    for start in starts:
+        for end in ends:
+            if end >= start:
+                pattern = classifier_label[start:end]
+                # find() would stop at an earlier (unaligned) occurrence
+                if classifier_label.find(pattern) == start:
+                    patterns.add(pattern)
+    return frozenset(patterns)
+
+
+def terms_patterns(classifier_label):
+    """
+    Returns every pet label that the 'terms' rule matches with
+    classifier_label: its terms and the words of its terms.
+    Parameters:
+     classifier_label - lowercase & stripped classifier label (string)
+    Returns:
+     patterns - the matching pet labels (frozenset of string)
+    """
+    terms = classifier_label.split(', ')
+    return frozenset(terms).union(*(term.split(' ') for term in terms))
+
+
+class LabelMatcher:
+    """
+    Matches pet image labels with the ImageNet labels by class id:
+     rule - the matching rule, 'find' or 'terms' (string)
+     patterns - Dictionary with key as class id and value as the pet labels
+                that match that class (frozenset), filled in on first use
+     memo - Dictionary with key as (pet label, class id) and value as
+            whether they match (bool)
+    """
+
+    def __init__(self, index, rule='find'):
+        """
+        Creates the matcher for the LabelIndex index and the matching rule.
+        """
+        if rule not in MATCH_RULES:
+            raise ValueError("Unknown matching rule '{0}' - must be one of: "
+                             "{1}".format(rule, ', '.join(MATCH_RULES)))
+        self.index = index
+        self.rule = rule
+        self.label_match = find_match if rule == 'find' else terms_match
+        self.label_patterns = (find_patterns if rule == 'find'
+                               else terms_patterns)
+        self.patterns = dict()
+        self.memo = dict()
+
+    def matches(self, pet_label, class_id):
+        """
+        Returns True if pet_label matches the label of ImageNet class class_id.
+        """
+        key = (pet_label, class_id)
+        match = self.memo.get(key)
+        if match is None:
+            patterns = self.patterns.get(class_id)
+            if patterns is None:
+                patterns = self.patterns[class_id] = self.label_patterns(
+                                                 self.index.normalized[class_id])
+            match = self.memo[key] = pet_label in patterns
+        return match
+
+    def matches_label(self, pet_label, classifier_label):
+        """
+        Returns True if pet_label matches the (lowercase & stripped)
+        classifier label. ImageNet labels are matched by class id, other
+        labels (e.g. made up for a test) directly.
+        """
+        class_id = self.index.class_ids.get(classifier_label)
+        if class_id is None:
+            return self.label_match(pet_label, classifier_label)
+        return self.matches(pet_label, class_id)
+
+    def match_ids(self, pet_labels, class_ids):
+        """
+        Matches each pet label with the class id in the same position.
+        Parameters:
+         pet_labels - pet image labels (list of string)
+         class_ids - predicted ImageNet class ids (list or numpy array of int)
+        Returns:
+         matches - 1 where the labels match and 0 where they don't (numpy
+                   int8 array)
+        """
+        matches = self.matches
+        return np.fromiter((matches(pet_label, class_id) for pet_label, class_id
+                            in zip(pet_labels, np.asarray(class_ids).tolist())),
+                           dtype=np.int8, count=len(pet_labels))
+
+    def match_labels(self, pet_labels, classifier_labels):
+        """
+        Same as match_ids() but with (lowercase & stripped) classifier labels
+        instead of class ids (see matches_label()).
+        """
+        matches_label = self.matches_label
+        return np.fromiter((matches_label(pet_label, classifier_label)
+                            for pet_label, classifier_label
+                            in zip(pet_labels, classifier_labels)),
+                           dtype=np.int8, count=len(pet_labels))
+
+
+def load_label_matcher(rule='find', labels_path=IMAGENET_LABELS_FILE):
+    """
+    Returns the LabelMatcher for rule, creating it on the first call so that
+    the tokenized labels & remembered matches are shared by every caller.
+    Parameters:
+     rule - matching rule, 'find' or 'terms' (see LabelMatcher) (string)
+     labels_path - path to the ImageNet labels file (string)
+    Returns:
+     matcher - the label matcher (LabelMatcher)
+    """
+    key = (rule, labels_path)
+    if key not in loaded_matchers:
+        loaded_matchers[key] = LabelMatcher(load_label_index(labels_path), rule)
+    return loaded_matchers[key]
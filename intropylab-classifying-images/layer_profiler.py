@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/layer_profiler.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Layer level profiling of the models (check_images_solution.py
+#          --profile), to find the layers of resnet18, alexnet & vgg16 that
+#          dominate CPU time & memory on our images. Every forward pass runs
+#          under the PyTorch profiler, with each layer of the model (e.g.
+#          vgg.features.0) marked by record_function() from forward hooks,
+#          so the profile shows which operators ran in which layer. Across
+#          the run it adds up, for every layer and every operator:
+#           calls - number of times it ran
+#           self ms - time spent in it, not counting the operators it called
+#           total ms - time spent in it, including the operators it called
+#           GFLOPs - floating point operations of its convolutions & matrix
+#                    multiplications (quantized operators aren't counted)
+#           peak MB - the most memory allocated by one call of it
+#          The table is printed at the end of the run and saved with the
+#          Chrome traces (open in chrome://tracing or ui.perfetto.dev) of the
+#          slowest forward passes in the profile folder. Models run on the
+#          torchscript backend are compiled graphs without layers, so only
+#          their operators are listed.
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python check_images_solution.py --dir <directory with images>
+#             --arch <model> --profile <profile folder>
+#   Example calls:
+#    python check_images_solution.py --dir pet_images/ --arch all --profile
+#    python check_images_solution.py --arch vgg --batch-size 8 --profile vgg_profile/
+##
+
+# Imports python modules
+import glob
+import heapq
+import itertools
+import json
+import os
+from time import perf_counter
+
+import torch
+from torch.profiler import profile, record_function, ProfilerActivity
+
+# Default folder the profile table & traces are saved to
+DEFAULT_PROFILE_DIR = 'profile/'
+
+# Default number of slowest forward passes whose traces are saved
+DEFAULT_SLOWEST_BATCHES = 3
+
+# Number of operators listed in the table (slowest first)
+TOP_OPERATORS = 20
+
+# Columns of the table - calls, self & total microseconds, FLOPs & the peak
+# bytes allocated by one call
+CALLS, SELF_US, TOTAL_US, FLOPS, PEAK_BYTES = range(5)
+
+
+class LayerProfiler:
+    """
+    Profiles forward passes (see forward()) and adds up the time, FLOPs &
+    memory of every layer & operator across them, keeping the profiles of
+    the n_slowest slowest passes for their traces.
+    """
+
+    def __init__(self, n_slowest=DEFAULT_SLOWEST_BATCHES):
+        self.n_slowest = n_slowest
+        # Totals of each layer & operator, key = (kind, name), kind is
+        # 'layer' or 'operator'
+        self.rows = dict()
+        # Min-heap of (seconds, pass number, model name, images, profile) of
+        # the slowest passes so far
+        self.slowest = list()
+        self.n_passes = 0
+        self.n_images = 0
+        self.forward_seconds = 0.0
+        # record_function ranges of the layers that are running
+        self.open_ranges = list()
+        self.pass_numbers = itertools.count(1)
+
+    def add_layer_hooks(self, model_name, model):
+        """
+        Marks each layer (module without submodules) of model with a
+        record_function range named after it, e.g. 'vgg.features.0 (Conv2d)'.
+        Compiled (TorchScript) models have no hooks, so they're skipped.
+        Returns:
+         handles - handles of the hooks, to remove them (list)
+        """
+        handles = list()
+        if not isinstance(model, torch.jit.ScriptModule):
+            for name, module in model.named_modules():
+                if not name or next(module.children(), None) is not None:
+                    continue
+                label = '{0}.{1} ({2})'.format(model_name, name,
+                                                type(module).__name__)
+                handles.append(module.register_forward_pre_hook(
+                    lambda module, inputs, label=label: self.open_range(label)))
+                handles.append(module.register_forward_hook(
+                    lambda module, inputs, output: self.close_range()))
+        return handles
+
+    def open_range(self, label):
+        """
+        Starts the range of a layer (forward pre-hook).
+        """
+        layer_range = record_function(label)
+        layer_range.__enter__()
+        self.open_ranges.append(layer_range)
+
+    def close_range(self):
+        """
+        Ends the range of the layer that is running (forward hook).
+        """
+        self.open_ranges.pop().__exit__(None, None, None)
+
+    def forward(self, model_name, model, batch):
+        """
+        Runs the forward pass of model over batch under the profiler. The
+        layer hooks are only on the model during the pass - they're removed
+        (and the ranges of any layers left running ended) even if it fails.
+        Parameters:
+         model_name - resnet alexnet vgg (string)
+         model - the model of model_name
+         batch - N x 3 x 224 x 224 batch of preprocessed images (tensor)
+        Returns:
+         output - the output of the model (tensor)
+        """
+        handles = self.add_layer_hooks(model_name, model)
+        try:
+            with profile(activities=[ProfilerActivity.CPU], record_shapes=True,
+                         profile_memory=True, with_flops=True) as prof:
+                start = perf_counter()
+                output = model(batch)
+                seconds = perf_counter() - start
+        finally:
+            for handle in handles:
+                handle.remove()
+            while self.open_ranges:
+                self.close_range()
+
+        self.n_passes += 1
+        self.n_images += len(batch)
+        self.forward_seconds += seconds
+        self.add_events(prof.events(), model_name)
+
+        # Keeps the profile if it's one of the n_slowest slowest passes
+        entry = (seconds, next(self.pass_numbers), model_name, len(batch),
+                 prof)
+        if len(self.slowest) < self.n_slowest:
+            heapq.heappush(self.slowest, entry)
+        elif self.slowest and seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+        return output
+
+    def add_events(self, events, model_name):
+        """
+        Adds the events of one profiled forward pass to the totals.
+        """
+        # FLOPs & bytes allocated by each event including the events it
+        # called (its subtree), key = id of the event
+        subtree = dict()
+
+        def get_subtree(event):
+            if id(event) not in subtree:
+                flops = event.flops or 0
+                allocated = max(0, event.self_cpu_memory_usage)
+                for child in event.cpu_children:
+                    child_flops, child_allocated = get_subtree(child)
+                    flops += child_flops
+                    allocated += child_allocated
+                subtree[id(event)] = (flops, allocated)
+            return subtree[id(event)]
+
+        for event in events:
+            # Frees of memory aren't events of any layer or operator
+            if event.name == '[memory]':
+                continue
+            is_layer = event.name.startswith(model_name + '.')
+            flops, allocated = get_subtree(event)
+            row = self.rows.setdefault(('layer' if is_layer else 'operator',
+                                        event.name), [0, 0.0, 0.0, 0, 0])
+            row[CALLS] += 1
+            row[SELF_US] += event.self_cpu_time_total
+            row[TOTAL_US] += event.cpu_time_total
+            # The operators' own FLOPs, so the nested ones aren't added twice
+            row[FLOPS] += flops if is_layer else (event.flops or 0)
+            row[PEAK_BYTES] = max(row[PEAK_BYTES], allocated)
+
+    def get_rows(self, kind):
+        """
+        Returns the (name, totals) of the layers or operators (kind), the
+        layers in order of total time & the operators of self time.
+        """
+        rows = [(name, totals) for (row_kind, name), totals in self.rows.items()
+                if row_kind == kind]
+        order = TOTAL_US if kind == 'layer' else SELF_US
+        return sorted(rows, key=lambda row: row[1][order], reverse=True)
+
+    def format_table(self):
+        """
+        Returns the table of the layers & the TOP_OPERATORS slowest operators
+        (string).
+        """
+        total_us = self.forward_seconds * 1e6 or 1.0
+        lines = ["\n*** Layer profile of %d forward passes (%d images, "
+                 "%.1f s) ***" % (self.n_passes, self.n_images,
+                                  self.forward_seconds)]
+        for kind, rows in (('Layer', self.get_rows('layer')),
+                           ('Operator', self.get_rows('operator')[:TOP_OPERATORS])):
+            lines.append("%-44s %7s %10s %10s %6s %9s %8s" % (
+                kind, 'calls', 'self ms', 'total ms', '% run', 'GFLOPs',
+                'peak MB'))
+            if not rows:
+                lines.append("  (none - the torchscript backend runs compiled "
+                             "graphs without layers)")
+            for name, row in rows:
+                lines.append("%-44s %7d %10.1f %10.1f %6.1f %9.2f %8.1f" % (
+                    name[:44], row[CALLS], row[SELF_US] / 1000.0,
+                    row[TOTAL_US] / 1000.0,
+                    row[TOTAL_US if kind == 'Layer' else SELF_US] * 100.0
+                    / total_us, row[FLOPS] / 1e9,
+                    row[PEAK_BYTES] / float(1 << 20)))
+            lines.append('')
+        return '\n'.join(lines)
+
+    def save(self, profile_dir=DEFAULT_PROFILE_DIR):
+        """
+        Saves the table (as text & JSON) & the Chrome traces of the slowest
+        forward passes to profile_dir, replacing the traces of earlier runs.
+        Returns:
+         paths - paths of the files written (list)
+        """
+        os.makedirs(profile_dir, exist_ok=True)
+        paths = [os.path.join(profile_dir, 'layers.txt'),
+                 os.path.join(profile_dir, 'layers.json')]
+        with open(paths[0], 'w') as outfile:
+            outfile.write(self.format_table().lstrip('\n'))
+        with open(paths[1], 'w') as outfile:
+            json.dump({'n_passes': self.n_passes, 'n_images': self.n_images,
+                       'forward_seconds': self.forward_seconds,
+                       'rows': [{'kind': kind, 'name': name, 'calls': row[CALLS],
+                                 'self_ms': row[SELF_US] / 1000.0,
+                                 'total_ms': row[TOTAL_US] / 1000.0,
+                                 'flops': row[FLOPS],
+                                 'peak_bytes': row[PEAK_BYTES]}
+                                for (kind, name), row in sorted(self.rows.items())]},
+                      outfile, indent=2)
+
+        # Removes the traces of an earlier run, so the folder only has this
+        # run's slowest passes
+        for trace_path in glob.glob(os.path.join(profile_dir, 'trace_*.json')):
+            os.remove(trace_path)
+
+        # Slowest pass first
+        for rank, (seconds, pass_number, model_name, n_images, prof) in \
+                enumerate(sorted(self.slowest, reverse=True), 1):
+            paths.append(os.path.join(profile_dir, 'trace_%d_%s_pass%d.json'
+                                      % (rank, model_name, pass_number)))
+            prof.export_chrome_trace(paths[-1])
+        return paths
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/model_cascade.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Cascade of models (check_images_solution.py --cascade). Every
+#          image is classified by the cheapest model first (alexnet, then
+#          resnet, then vgg) and only the images that model is unsure of -
+#          whose top-1 softmax confidence is below the model's threshold -
+#          are passed on to the next, more expensive model. The last model
+#          answers whatever reaches it. Easy images therefore only pay for
+#          the cheapest model.
+#          Run on its own, this program calibrates the thresholds on a
+#          folder of labelled images: every model classifies every image
+#          once, then each combination of thresholds (0, 0.05 ... 1) is
+#          replayed on those predictions. The cheapest combination whose
+#          match, dog, breed & not-dog percentages are all within --max-drop
+#          points of the last model on its own is saved to cascade.json,
+#          which --cascade reads. If no combination is cheaper than the last
+#          model on its own, that model alone is saved instead. The thresholds depend on the precision,
+#          backend, vocabulary & weights the models ran with, so calibrate
+#          with the same options - --cascade refuses a cascade calibrated
+#          with other ones.
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python model_cascade.py --dir <directory with labelled images>
+#             --arch <models> --dogfile <file that contains dognames>
+#             --max-drop <percentage points> --output <cascade file>
+#   Example calls:
+#    python model_cascade.py --dir pet_images/ --arch all
+#    python check_images_solution.py --dir pet_images/ --cascade
+##
+
+# Imports python modules
+import argparse
+import itertools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+import torch
+
+# Imports the image decoding & forward passes of the classifier
+import classifier
+from classifier import (decode_image, predict_batch_confidence,
+                        DEFAULT_BATCH_SIZE)
+
+# Imports the stages of check_images_solution.py the results are made with
+from check_images_solution import (get_pet_labels, get_archs, compare_labels,
+                                   adjust_results4_isadog)
+
+# Imports the mergeable counts behind the results statistics
+from partial_stats import PartialStats
+
+# Imports the timer that records how long each stage takes
+from stage_timer import StageTimer
+
+# Imports the versions of the models' pretrained weights
+from weight_store import get_weights_version
+
+# Models from cheapest to most expensive - the order they're tried in
+CASCADE_ORDER = ('alexnet', 'resnet', 'vgg')
+
+# Default file the calibrated cascade is saved to & read from
+DEFAULT_CASCADE_FILE = 'cascade.json'
+
+# Thresholds tried by the calibration: 0, 1/THRESHOLD_STEPS ... 1
+THRESHOLD_STEPS = 20
+
+# Results statistics the cascade must keep close to the last model's & the
+# default largest drop (in percentage points) allowed in each
+CALIBRATION_METRICS = ('pct_match', 'pct_correct_dogs', 'pct_correct_breed',
+                       'pct_correct_notdogs')
+DEFAULT_MAX_DROP = 1.0
+
+
+def order_models(model_names):
+    """
+    Returns model_names in cascade order, cheapest model first (models not
+    in CASCADE_ORDER last).
+    """
+    return sorted(model_names, key=lambda name: CASCADE_ORDER.index(name)
+                  if name in CASCADE_ORDER else len(CASCADE_ORDER))
+
+
+def is_unsure(confidence, threshold):
+    """
+    Returns True where a model is unsure of its prediction - its confidence
+    is below threshold. A threshold of 1 passes every image on.
+    """
+    return (confidence < threshold) | (threshold >= 1.0)
+
+
+def run_cascade(img_paths, model_names, thresholds,
+                batch_size=DEFAULT_BATCH_SIZE, fast_decode=False, timer=None,
+                decode_threads=0):
+    """
+    Classifies the images with the cascade of model_names. Each image is
+    decoded once; the images of a batch that a model is unsure of are
+    stacked into a smaller batch for the next model.
+    Parameters:
+     img_paths - list of paths to the image files to be classified (list)
+     model_names - models in the order they're tried (list)
+     thresholds - confidence below which each model (but the last) passes
+                  an image on, one per model but the last (list)
+     batch_size - maximum number of images per forward pass (int)
+     fast_decode - True decodes JPEGs at reduced resolution (bool)
+     timer - optional StageTimer that records the time spent in each stage
+             & each image's latency (StageTimer)
+     decode_threads - number of threads decoding the images of a batch, 0
+                      decodes them on this thread (int)
+    Returns:
+     class_ids - M x N array of the class id predicted by each of the M
+                 models for each image, -1 where the model didn't run
+                 (numpy array)
+     confidences - M x N array of the confidence of those predictions, 0
+                   where the model didn't run (numpy array)
+     forward_times - seconds spent in the forward passes of each model (list)
+    """
+    if timer is None:
+        timer = StageTimer()
+    n_models = len(model_names)
+    class_ids = np.full((n_models, len(img_paths)), -1, dtype=np.int64)
+    confidences = np.zeros((n_models, len(img_paths)), dtype=np.float32)
+    forward_times = [0.0] * n_models
+
+    pool = ThreadPoolExecutor(decode_threads) if decode_threads > 0 else None
+    with torch.no_grad(), (pool or nullcontext()):
+        for start in range(0, len(img_paths), batch_size):
+            batch_paths = img_paths[start:start + batch_size]
+            if pool is not None:
+                decoded = list(pool.map(decode_image, batch_paths,
+                                        [fast_decode] * len(batch_paths)))
+            else:
+                decoded = [decode_image(img_path, fast_decode)
+                           for img_path in batch_paths]
+            latencies = list()
+            for _, decode_time, preprocess_time in decoded:
+                timer.add('image decode', decode_time)
+                timer.add('preprocessing', preprocess_time)
+                latencies.append(decode_time + preprocess_time)
+            batch = torch.stack([img_tensor for img_tensor, _, _ in decoded])
+
+            # Rows of the batch still to be answered, all of them at first
+            rows = np.arange(len(batch_paths))
+            for stage, model_name in enumerate(model_names):
+                model_input = batch if len(rows) == len(batch) else batch[rows]
+                pred_idxs, confs, forward_time = predict_batch_confidence(
+                    model_name, model_input, timer)
+                forward_times[stage] += forward_time
+                class_ids[stage, start + rows] = pred_idxs
+                confidences[stage, start + rows] = confs
+                for row in rows.tolist():
+                    latencies[row] += forward_time / len(rows)
+
+                # Passes the images the model is unsure of on to the next one
+                if stage == n_models - 1:
+                    break
+                rows = rows[is_unsure(np.asarray(confs), thresholds[stage])]
+                if not len(rows):
+                    break
+            timer.add_image_latencies(latencies)
+
+    return class_ids, confidences, forward_times
+
+
+def get_answering_stages(confidences, thresholds):
+    """
+    Returns the stage (index of the model) of the cascade that answers each
+    image, given the confidence of every model in every image.
+    Parameters:
+     confidences - M x N array of confidences (see run_cascade())
+     thresholds - confidence thresholds of the first M - 1 models (list)
+    Returns:
+     stages - array of the answering stage of each image (numpy array)
+    """
+    n_models, n_images = confidences.shape
+    stages = np.full(n_images, n_models - 1)
+    undecided = np.ones(n_images, dtype=bool)
+    for stage, threshold in enumerate(thresholds):
+        answered = undecided & ~is_unsure(confidences[stage], threshold)
+        stages[answered] = stage
+        undecided &= ~answered
+    return stages
+
+
+def get_cascade_settings(model_names):
+    """
+    Returns the settings of the classifier that the confidences of
+    model_names depend on - the precision, backend & vocabulary that are set
+    in classifier.py and the version of each model's weights.
+    Returns:
+     settings - Dictionary with key as setting name (dict)
+    """
+    return {'precision': classifier.precision, 'backend': classifier.backend,
+            'vocabulary': classifier.vocabulary,
+            'weights': {model_name: get_weights_version(model_name,
+                                                        classifier.weights_dir)
+                        for model_name in model_names}}
+
+
+def load_cascade(cascade_file=DEFAULT_CASCADE_FILE):
+    """
+    Reads a cascade calibrated by this program, checking that it was
+    calibrated with the settings that are set in classifier.py (see
+    get_cascade_settings()).
+    Parameters:
+     cascade_file - JSON file the cascade was saved to (string)
+    Returns:
+     cascade - Dictionary with the 'models' (cheapest first) & the
+               'thresholds' of all but the last model, and the settings &
+               statistics of the calibration (dict)
+    """
+    try:
+        with open(cascade_file) as infile:
+            cascade = json.load(infile)
+    except FileNotFoundError:
+        raise FileNotFoundError("No calibrated cascade in {0} - calibrate "
+                                "one with: python model_cascade.py --dir "
+                                "<folder of labelled images>".format(
+                                    cascade_file)) from None
+
+    # Thresholds calibrated on the confidences of other settings (e.g. of
+    # fp32 models for int8 ones) would pass on the wrong images
+    settings = get_cascade_settings(cascade['models'])
+    calibrated = cascade.get('settings', dict())
+    different = [name for name in settings
+                 if calibrated.get(name) != settings[name]]
+    if different:
+        raise ValueError("The cascade in {0} was calibrated with other "
+                         "settings than this run's - {1} - calibrate it again "
+                         "with the same options: python model_cascade.py "
+                         "--output {0}".format(cascade_file, ', '.join(
+                             "{0} {1} instead of {2}".format(
+                                 name, json.dumps(calibrated.get(name)),
+                                 json.dumps(settings[name]))
+                             for name in different)))
+    return cascade
+
+
+def classify_images_cascade(images_dir, petlabel_dic, cascade,
+                            batch_size=DEFAULT_BATCH_SIZE, fast_decode=False,
+                            timer=None, decode_threads=0):
+    """
+    Same as classify_images() in check_images_solution.py but classifies the
+    images with a cascade of models, and prints how many images each model
+    answered.
+    Parameters:
+     images_dir - The (full) path to the folder of images (string)
+     petlabel_dic - Dictionary that contains the pet image(true) labels
+                    (see classify_images())
+     cascade - the cascade (see load_cascade()) (dict)
+     batch_size, fast_decode, timer, decode_threads - see run_cascade()
+    Returns:
+     results_dic - ResultsStore of the answers of the cascade (see
+                   compare_labels())
+    """
+    if timer is None:
+        timer = StageTimer()
+    filenames = list(petlabel_dic)
+    model_names = cascade['models']
+    class_ids, confidences, _ = run_cascade(
+        [images_dir + key for key in filenames], model_names,
+        cascade['thresholds'], batch_size, fast_decode, timer, decode_threads)
+
+    # The answer of each image is the prediction of the last model it reached
+    stages = get_answering_stages(confidences, cascade['thresholds'])
+    answers = class_ids[stages, np.arange(len(filenames))]
+    print("\nCascade answers -", ", ".join(
+        "%s: %d" % (model_name, np.count_nonzero(stages == stage))
+        for stage, model_name in enumerate(model_names)))
+
+    with timer.stage('label matching'):
+        return compare_labels(petlabel_dic, filenames, answers.tolist())
+
+
+def calibrate(image_dir, model_names, dogfile, batch_size=DEFAULT_BATCH_SIZE,
+              max_drop=DEFAULT_MAX_DROP):
+    """
+    Calibrates the thresholds of a cascade of model_names on the labelled
+    images of image_dir (see the PURPOSE above).
+    Parameters:
+     image_dir - The (full) path to the folder of labelled images (string)
+     model_names - models in the order they're tried (list)
+     dogfile - text file that has dognames (string)
+     batch_size - maximum number of images per forward pass (int)
+     max_drop - largest drop (in percentage points) of each of the
+                CALIBRATION_METRICS allowed compared with the last model on
+                its own (float)
+    Returns:
+     cascade - the calibrated cascade (see load_cascade()) (dict)
+    """
+    petlabel_dic = get_pet_labels(image_dir)
+    filenames = list(petlabel_dic)
+    n_images = len(filenames)
+    if not n_images:
+        raise ValueError("No images to calibrate the cascade on in " +
+                         image_dir)
+
+    # Every model classifies every image (no model passes any image on)
+    n_models = len(model_names)
+    class_ids, confidences, forward_times = run_cascade(
+        [image_dir + key for key in filenames], model_names,
+        [1.0] * (n_models - 1), batch_size)
+    costs = np.cumsum(forward_times) / n_images
+
+    # Whether each model's label of each image matches & is a dog
+    match = np.zeros((n_models, n_images), dtype=np.int8)
+    classifier_is_dog = np.zeros((n_models, n_images), dtype=np.int8)
+    for stage in range(n_models):
+        results_dic = compare_labels(petlabel_dic, filenames,
+                                     class_ids[stage].tolist())
+        adjust_results4_isadog(results_dic, dogfile)
+        match[stage] = results_dic.match
+        classifier_is_dog[stage] = results_dic.classifier_is_dog
+    pet_is_dog = results_dic.pet_is_dog
+
+    # The last model on its own is what the cascade replaces
+    reference = PartialStats().add_arrays(
+        match[-1], pet_is_dog, classifier_is_dog[-1]).to_results_stats()
+
+    # Replays every combination of thresholds, keeping the cheapest one that
+    # is close enough to the reference
+    candidates = [step / THRESHOLD_STEPS for step in range(THRESHOLD_STEPS + 1)]
+    columns = np.arange(n_images)
+    best = None
+    for thresholds in itertools.product(candidates, repeat=n_models - 1):
+        stages = get_answering_stages(confidences, thresholds)
+        results_stats = PartialStats().add_arrays(
+            match[stages, columns], pet_is_dog,
+            classifier_is_dog[stages, columns]).to_results_stats()
+        if any(results_stats[metric] < reference[metric] - max_drop
+               for metric in CALIBRATION_METRICS):
+            continue
+        cost = float(costs[stages].mean())
+        if best is None or cost < best[0]:
+            best = (cost, list(thresholds), results_stats, stages)
+
+    # Thresholds of 1 always pass (every model runs on every image), so a
+    # cascade is only kept if it's cheaper than the last model on its own -
+    # otherwise the cascade is just the last model
+    cost, thresholds, results_stats, stages = best
+    reference_cost = forward_times[-1] / n_images
+    if cost >= reference_cost:
+        model_names = list(model_names[-1:])
+        cost, thresholds, results_stats = reference_cost, [], reference
+        stages = np.zeros(n_images, dtype=np.int64)
+    return {'models': list(model_names), 'thresholds': thresholds,
+            'image_dir': image_dir, 'n_images': n_images,
+            'settings': get_cascade_settings(model_names),
+            'max_drop': max_drop,
+            'answered': [int(np.count_nonzero(stages == stage))
+                         for stage in range(len(model_names))],
+            'results_stats': results_stats, 'reference_stats': reference,
+            'cost_ms_per_image': cost * 1000.0,
+            'reference_cost_ms_per_image': reference_cost * 1000.0}
+
+
+# Main program function defined below
+def main():
+    # Creates & retrieves Command Line Arugments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dir', type=str, default='pet_images/',
+                        help='path to folder of labelled images')
+    parser.add_argument('--arch', type=str, default='all',
+                        help='models of the cascade, separated by commas or '
+                             'all (tried cheapest first)')
+    parser.add_argument('--dogfile', type=str, default='dognames.txt',
+                        help='text file that has dognames')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='number of images classified per forward pass')
+    parser.add_argument('--max-drop', type=float, default=DEFAULT_MAX_DROP,
+                        help='largest drop (in percentage points) of the '
+                             'match, dog, breed & not-dog percentages '
+                             'allowed compared with the last model')
+    parser.add_argument('--output', type=str, default=DEFAULT_CASCADE_FILE,
+                        help='JSON file the calibrated cascade is saved to')
+    parser.add_argument('--weights', type=str, default='',
+                        help='local weights directory to load the pretrained '
+                             'weights from (see weight_store.py)')
+    parser.add_argument('--precision', type=str, default='fp32',
+                        choices=classifier.PRECISIONS,
+                        help='precision the models run at (see quantize.py)')
+    parser.add_argument('--backend', type=str, default='eager',
+                        choices=classifier.BACKENDS,
+                        help='backend the models run on (see graph_cache.py)')
+    parser.add_argument('--vocabulary', type=str, default='',
+                        help='only predict these classes: dogs (the breeds '
+                             'of --dogfile) or a label file in the same '
+                             'format (see restricted_head.py)')
+    in_arg = parser.parse_args()
+
+    if in_arg.weights:
+        classifier.set_weights_dir(in_arg.weights)
+    classifier.set_precision(in_arg.precision, in_arg.dir)
+    classifier.set_backend(in_arg.backend)
+    if in_arg.vocabulary:
+        classifier.set_vocabulary(in_arg.dogfile if in_arg.vocabulary == 'dogs'
+                                  else in_arg.vocabulary)
+    model_names = order_models(get_archs(in_arg.arch))
+    cascade = calibrate(in_arg.dir, model_names, in_arg.dogfile,
+                        in_arg.batch_size, in_arg.max_drop)
+
+    # Prints the cascade next to the last model on its own
+    if len(cascade['models']) < len(model_names):
+        print("No cascade of %s is cheaper than %s on its own within "
+              "--max-drop %.1f - saving %s alone (try more images or a "
+              "larger --max-drop)" % (', '.join(model_names), model_names[-1],
+                                      in_arg.max_drop, model_names[-1]))
+    print("Cascade:", " -> ".join(
+        ["%s (< %.2f)" % pair for pair in zip(cascade['models'],
+                                              cascade['thresholds'])] +
+        [model_names[-1]]))
+    print("%-20s %10s %10s" % ('', 'cascade', model_names[-1]))
+    for metric in CALIBRATION_METRICS:
+        print("%-20s %10.1f %10.1f" % (metric, cascade['results_stats'][metric],
+                                       cascade['reference_stats'][metric]))
+    print("%-20s %10.1f %10.1f" % ('ms per image',
+                                   cascade['cost_ms_per_image'],
+                                   cascade['reference_cost_ms_per_image']))
+    print("Answered by:", ", ".join("%s %d" % pair for pair in
+                                    zip(cascade['models'], cascade['answered'])))
+
+    with open(in_arg.output, 'w') as outfile:
+        json.dump(cascade, outfile, indent=2, sort_keys=True)
+    print("\nCascade saved to", in_arg.output)
+
+
+# Call to main function to run the program
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/pack_images.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Packs a folder of images (like pet_images/) into a single file of
+#          224x224 RGB uint8 crops - the images after the Resize(256) &
+#          CenterCrop(224) preprocessing that all three models share - plus
+#          an index (a JSON file next to it) with the filename & offset of
+#          each crop. check_images_solution.py --packed reads the crops
+#          through a memory map, so repeated runs skip decoding the JPEGs.
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python pack_images.py --dir <directory with images> --output <file>
+#   Example calls:
+#    python pack_images.py --dir pet_images/ --output pet_images.u8
+#    python check_images_solution.py --packed pet_images.u8 --arch all
+##
+
+# Imports python modules
+import argparse
+import json
+import os
+
+import numpy as np
+
+# Imports the image loading & cropping used by the classifier
+from classifier import load_crop
+
+# Imports the walker of image folders
+from image_walker import walk_image_files
+
+# Shape of each packed crop (height, width, color channels)
+CROP_SHAPE = (224, 224, 3)
+
+# Describes the preprocessing already applied to the packed crops
+PACKED_PREPROCESS = 'resize256-centercrop224'
+
+
+def get_index_path(packed_path):
+    """
+    Returns the path of the index file of the packed file packed_path.
+    """
+    return packed_path + '.json'
+
+
+def pack_images(image_dir, packed_path, fast_decode=False):
+    """
+    Decodes & crops every image in image_dir and writes the crops one after
+    the other to packed_path, along with the index file.
+    Parameters:
+     image_dir - The (full) path to the folder of images (string)
+     packed_path - path of the packed file to write (string)
+     fast_decode - True decodes JPEGs at reduced resolution (bool)
+    Returns:
+     n_images - number of images packed (int)
+    """
+    # Finds the images (also in subfolders) the same way get_pet_labels() does
+    filenames = sorted(walk_image_files(image_dir))
+    crop_size = int(np.prod(CROP_SHAPE))
+
+    with open(packed_path, 'wb') as outfile:
+        for filename in filenames:
+            outfile.write(load_crop(os.path.join(image_dir, filename),
+                                    fast_decode).tobytes())
+
+    # Each crop starts crop_size bytes after the previous one
+    index = {'shape': list(CROP_SHAPE), 'dtype': 'uint8',
+             'preprocess': PACKED_PREPROCESS,
+             'fast_decode': fast_decode,
+             'filenames': filenames,
+             'offsets': [idx * crop_size for idx in range(len(filenames))]}
+    with open(get_index_path(packed_path), 'w') as outfile:
+        json.dump(index, outfile)
+    return len(filenames)
+
+
+class PackedImages:
+    """
+    Read-only, memory-mapped view of a packed file. crops is an
+    N x 224 x 224 x 3 uint8 array whose slices are views into the mapped file
+    (nothing is copied until the pages are used).
+    """
+
+    def __init__(self, packed_path):
+        """
+        Opens the packed file packed_path and its index.
+        Parameters:
+         packed_path - path of the packed file (string)
+        """
+        with open(get_index_path(packed_path)) as infile:
+            index = json.load(infile)
+        self.path = packed_path
+        self.filenames = index['filenames']
+        self.offsets = index['offsets']
+        self.index = {filename: idx for idx, filename in enumerate(self.filenames)}
+
+        # An empty file can't be memory-mapped
+        shape = (len(self.filenames),) + tuple(index['shape'])
+        if self.filenames:
+            self.crops = np.memmap(packed_path, dtype=index['dtype'],
+                                   mode='r', shape=shape)
+        else:
+            self.crops = np.zeros(shape, dtype=index['dtype'])
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def get_crop(self, filename):
+        """
+        Returns the crop of the image filename as a view into the file.
+        """
+        return self.crops[self.index[filename]]
+
+
+# Main program function defined below
+def main():
+    # Creates & retrieves Command Line Arugments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dir', type=str, default='pet_images/',
+                        help='path to folder of images')
+    parser.add_argument('--output', type=str, default='pet_images.u8',
+                        help='packed file to write')
+    parser.add_argument('--fast-decode', action='store_true',
+                        help='decode JPEGs at reduced resolution')
+    in_arg = parser.parse_args()
+
+    n_images = pack_images(in_arg.dir, in_arg.output, in_arg.fast_decode)
+    print("Packed", n_images, "images from", in_arg.dir, "into", in_arg.output)
+
+
+# Call to main function to run the program
+if __name__ == "__main__":
+    main()
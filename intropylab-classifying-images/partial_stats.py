@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/partial_stats.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Counts behind the results statistics of check_images_solution.py
+#          (calculates_results_stats()). The counts of a set of results are
+#          computed with vectorized numpy operations and kept in a
+#          PartialStats, which can be updated as more results arrive and
+#          merged with the PartialStats of other shards of the images - the
+#          results statistics (counts & percentages) are only derived from
+#          the totals at the end, so they're exact without re-scanning any
+#          results.
+#
+#   Example usage:
+#    totals = PartialStats()
+#    for shard_results in shards:
+#        totals.add_results(shard_results)
+#    results_stats = totals.to_results_stats()
+##
+
+# Imports python modules
+import numpy as np
+
+# Names of the counts, in the order they appear in the results statistics
+COUNT_KEYS = ('n_dogs_img', 'n_match', 'n_correct_dogs', 'n_correct_notdogs',
+              'n_correct_breed', 'n_images')
+
+
+class PartialStats:
+    """
+    The counts of the results seen so far (see COUNT_KEYS):
+     n_images - number of images
+     n_dogs_img - number of images whose pet image label is a dog
+     n_match - number of images whose labels match
+     n_correct_dogs - dog images classified as dogs
+     n_correct_notdogs - not-dog images classified as not dogs
+     n_correct_breed - dog images classified as dogs with matching labels
+    """
+
+    def __init__(self, **counts):
+        for key in COUNT_KEYS:
+            setattr(self, key, int(counts.get(key, 0)))
+
+    def add_arrays(self, match, pet_is_dog, classifier_is_dog):
+        """
+        Adds the counts of a set of results given as one value per image.
+        Parameters:
+         match - 1 where the labels match (numpy array or list)
+         pet_is_dog - 1 where the pet image label is a dog (numpy array or
+                      list)
+         classifier_is_dog - 1 where the classifier label is a dog (numpy
+                             array or list)
+        Returns:
+         self - to allow chaining (PartialStats)
+        """
+        match = np.asarray(match) == 1
+        pet_dog = np.asarray(pet_is_dog) == 1
+        classifier_dog = np.asarray(classifier_is_dog) == 1
+        correct_dogs = pet_dog & classifier_dog
+
+        self.n_images += len(match)
+        self.n_dogs_img += int(np.count_nonzero(pet_dog))
+        self.n_match += int(np.count_nonzero(match))
+        self.n_correct_dogs += int(np.count_nonzero(correct_dogs))
+        self.n_correct_notdogs += int(np.count_nonzero(~pet_dog & ~classifier_dog))
+        self.n_correct_breed += int(np.count_nonzero(correct_dogs & match))
+        return self
+
+    def add_results(self, results_dic):
+        """
+        Adds the counts of a results dictionary (after the is-a-dog
+        adjustment) or a ResultsStore.
+        Parameters:
+         results_dic - Dictionary with key as image filename and value as a
+                       List (see calculates_results_stats()), or ResultsStore
+        Returns:
+         self - to allow chaining (PartialStats)
+        """
+        # A ResultsStore already has the columns as arrays
+        if hasattr(results_dic, 'classifier_is_dog'):
+            return self.add_arrays(results_dic.match, results_dic.pet_is_dog,
+                                   results_dic.classifier_is_dog)
+
+        # Gathers the match & is-a-dog values (idx 2, 3 & 4) into arrays
+        columns = np.array([results[2:5] for results in results_dic.values()],
+                           dtype=np.int8).reshape(-1, 3)
+        return self.add_arrays(columns[:, 0], columns[:, 1], columns[:, 2])
+
+    def merge(self, other):
+        """
+        Adds the counts of other (e.g. of another shard) to these counts.
+        Parameters:
+         other - counts to add (PartialStats)
+        Returns:
+         self - to allow chaining (PartialStats)
+        """
+        for key in COUNT_KEYS:
+            setattr(self, key, getattr(self, key) + getattr(other, key))
+        return self
+
+    def __add__(self, other):
+        return PartialStats(**self.to_dict()).merge(other)
+
+    def __eq__(self, other):
+        return isinstance(other, PartialStats) and self.to_dict() == other.to_dict()
+
+    def to_dict(self):
+        """
+        Returns the counts as a dictionary (e.g. to save or send them).
+        """
+        return {key: getattr(self, key) for key in COUNT_KEYS}
+
+    def to_results_stats(self):
+        """
+        Returns the results statistics of the counts - the counts and the
+        percentages, with the same keys in the same order as the results_stats
+        dictionary of calculates_results_stats().
+        Returns:
+         results_stats - Dictionary with key as the statistic's name (starting
+                         with 'pct' for percentage or 'n' for count) and value
+                         as the statistic's value (dict)
+        """
+        results_stats = self.to_dict()
+
+        # calculates number of not-a-dog images using - images & dog images
+        results_stats['n_notdogs_img'] = self.n_images - self.n_dogs_img
+
+        # Calculates the percentages - 0.0 when there's nothing to divide by
+        results_stats['pct_match'] = percentage(self.n_match, self.n_images)
+        results_stats['pct_correct_dogs'] = percentage(self.n_correct_dogs,
+                                                       self.n_dogs_img)
+        results_stats['pct_correct_breed'] = percentage(self.n_correct_breed,
+                                                        self.n_dogs_img)
+        results_stats['pct_correct_notdogs'] = percentage(
+                                                   self.n_correct_notdogs,
+                                                   results_stats['n_notdogs_img'])
+        return results_stats
+
+
+def percentage(count, total):
+    """
+    Returns count as a percentage of total (0.0 if total is 0).
+    """
+    return (count / total) * 100.0 if total > 0 else 0.0
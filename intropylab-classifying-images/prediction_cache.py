@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/prediction_cache.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Persistent on-disk cache of classifier predictions. Predictions are
+#          stored in a SQLite file keyed by the hash of the image file's
+#          contents, the model architecture and the preprocessing used, so an
+#          unchanged image costs one hash & one lookup instead of a forward
+#          pass through the CNN. Renamed or copied images are still found
+#          because the key doesn't depend on the filename.
+#
+#   Example usage:
+#    cache = PredictionCache('pet_images/.prediction_cache.sqlite')
+#    labels = classify_batch(img_paths, 'vgg', cache=cache)
+##
+
+# Imports python modules
+import hashlib
+import sqlite3
+
+# Default cache filename, created inside the image folder
+DEFAULT_CACHE_FILENAME = '.prediction_cache.sqlite'
+
+# Size of the chunks the image files are read in while hashing them
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class PredictionCache:
+    """
+    SQLite backed cache of predicted ImageNet class indices. Each entry is
+    keyed by (image content hash, model architecture, preprocessing config).
+    """
+
+    def __init__(self, path):
+        """
+        Opens (creating if needed) the cache file at path.
+        Parameters:
+         path - path to the SQLite cache file (string)
+        """
+        self.path = path
+        # The connection may be used by another thread than the one that
+        # opened it (e.g. the classifying thread of stream_pipeline.py), but
+        # only by one thread at a time
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " image_hash TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " preprocess TEXT NOT NULL,"
+            " class_idx INTEGER NOT NULL,"
+            " PRIMARY KEY (image_hash, model, preprocess))")
+        self.connection.commit()
+
+    @staticmethod
+    def hash_file(img_path):
+        """
+        Returns the hex SHA-1 digest of the contents of the file img_path.
+        Parameters:
+         img_path - path to the image file (string)
+        Returns:
+         digest - hex digest of the file contents (string)
+        """
+        digest = hashlib.sha1()
+        with open(img_path, 'rb') as img_file:
+            for chunk in iter(lambda: img_file.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_many(self, image_hashes, model, preprocess):
+        """
+        Looks up the cached predictions for several images.
+        Parameters:
+         image_hashes - List of image content hashes (list)
+         model - model architecture the predictions were made with (string)
+         preprocess - preprocessing config the predictions used (string)
+        Returns:
+         class_idxs - List with the cached class index for each hash in
+                      image_hashes, or None where nothing is cached (list)
+        """
+        found = dict()
+        unique_hashes = list(set(image_hashes))
+
+        # Queries in chunks to stay below SQLite's limit on query parameters
+        for start in range(0, len(unique_hashes), 500):
+            chunk = unique_hashes[start:start + 500]
+            rows = self.connection.execute(
+                "SELECT image_hash, class_idx FROM predictions"
+                " WHERE model = ? AND preprocess = ? AND image_hash IN (%s)"
+                % ','.join('?' * len(chunk)), [model, preprocess] + chunk)
+            found.update(rows)
+
+        return [found.get(image_hash) for image_hash in image_hashes]
+
+    def put_many(self, image_hashes, model, preprocess, class_idxs):
+        """
+        Stores predictions for several images, replacing any existing entries.
+        Parameters:
+         image_hashes - List of image content hashes (list)
+         model - model architecture the predictions were made with (string)
+         preprocess - preprocessing config the predictions used (string)
+         class_idxs - List of predicted class indices, one per hash (list)
+        Returns:
+         None
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO predictions"
+                " (image_hash, model, preprocess, class_idx)"
+                " VALUES (?, ?, ?, ?)",
+                [(image_hash, model, preprocess, int(class_idx))
+                 for image_hash, class_idx in zip(image_hashes, class_idxs)])
+
+    def close(self):
+        """
+        Closes the connection to the cache file.
+        """
+        self.connection.close()
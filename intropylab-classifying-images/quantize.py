@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/quantize.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Quantized (int8) versions of the models for faster inference on
+#          CPUs, used by classifier.py when a precision other than 'fp32' is
+#          set (check_images_solution.py --precision). The precisions are:
+#           'fp32' - the pretrained models as they are
+#           'int8' - static quantization of the conv & linear layers (FX
+#                    graph mode): the scale of every activation is
+#                    calibrated by running a sample of images (by default
+#                    from pet_images/) through the model first
+#           'int8-dynamic' - dynamic quantization of the linear layers only
+#                            (the activations are quantized on the fly, so no
+#                            calibration is needed) - most of the weights of
+#                            alexnet & vgg are in their linear layers
+#          Use compare_runs.py --compare int8 to see what a precision costs
+#          in accuracy next to what it gains in speed.
+#
+#   Example usage:
+#    model = quantize_model(get_model('resnet'), 'int8', calibration_batches)
+##
+
+# Imports python modules
+import warnings
+
+import torch
+from torch.ao.quantization import quantize_dynamic, get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+# Names of the precisions
+PRECISIONS = ('fp32', 'int8', 'int8-dynamic')
+
+# Quantized CPU backends in order of preference (x86 & fbgemm for Intel/AMD
+# servers, qnnpack for ARM)
+QUANTIZED_ENGINES = ('x86', 'fbgemm', 'onednn', 'qnnpack')
+
+
+def select_engine():
+    """
+    Selects the best quantized backend the installed PyTorch supports.
+    Returns:
+     engine - name of the backend (string)
+    """
+    supported = torch.backends.quantized.supported_engines
+    for engine in QUANTIZED_ENGINES:
+        if engine in supported:
+            torch.backends.quantized.engine = engine
+            return engine
+    raise RuntimeError("This PyTorch build has no quantized CPU backend - "
+                       "use --precision fp32")
+
+
+def quantize_model(model, precision, calibration_batches=()):
+    """
+    Returns a quantized copy of model (model itself is left unchanged).
+    Parameters:
+     model - pretrained CNN model in evaluation mode
+     precision - one of PRECISIONS (string)
+     calibration_batches - batches of preprocessed images (N x 3 x 224 x 224
+                           tensors) the 'int8' activations are calibrated on
+                           (list)
+    Returns:
+     model - the quantized model in evaluation mode
+    """
+    if precision not in PRECISIONS:
+        raise ValueError("Unknown precision '{0}' - must be one of: "
+                         "{1}".format(precision, ', '.join(PRECISIONS)))
+    if precision == 'fp32':
+        return model
+
+    engine = select_engine()
+    # torch.ao.quantization warns about its own deprecation & future changes
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        if precision == 'int8-dynamic':
+            return quantize_dynamic(model, {torch.nn.Linear},
+                                    dtype=torch.qint8).eval()
+
+        if not calibration_batches:
+            raise ValueError("Static int8 quantization needs calibration "
+                             "images")
+        prepared = prepare_fx(model, get_default_qconfig_mapping(engine),
+                              (calibration_batches[0],))
+        # Records the range of every activation on the calibration images
+        with torch.no_grad():
+            for batch in calibration_batches:
+                prepared(batch)
+        return convert_fx(prepared).eval()
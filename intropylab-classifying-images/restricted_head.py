@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/restricted_head.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Restricted vocabulary mode of the classifier, used by
+#          classifier.py when a vocabulary is set
+#          (check_images_solution.py --vocabulary). The final (1000 class)
+#          layer of each model is replaced by one with only the rows of the
+#          classes of the vocabulary - the dog breeds of dognames.txt, or the
+#          ImageNet labels listed in any label file in the same format - so
+#          the forward pass only computes the logits of those classes and
+#          every prediction (and its top-k) is one of them. The other layers
+#          & their weights are shared with the full model, nothing is copied.
+#          Images of anything else are still given the closest class of the
+#          vocabulary, so use it for breed identification of dog images, not
+#          to tell dogs from other animals.
+#          Run on its own, this program prints the top-k classes of the
+#          vocabulary for each image.
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python restricted_head.py --dir <directory with images> --arch <model>
+#             --vocabulary <label file> --top-k <number of classes>
+#   Example calls:
+#    python restricted_head.py --dir pet_images/ --arch vgg --top-k 3
+#    python check_images_solution.py --dir pet_images/ --arch vgg --vocabulary dogs
+##
+
+# Imports python modules
+import argparse
+import copy
+import hashlib
+import os
+
+import numpy as np
+import torch
+from torch import nn
+
+# Imports the compiled table of the labels listed in a label file
+from dog_table import load_dog_table
+
+
+def load_vocabulary(label_file):
+    """
+    Returns the ImageNet classes whose labels are lines of label_file (in
+    the format of dognames.txt) and a name identifying them.
+    Parameters:
+     label_file - text file with one lowercase label per line (string)
+    Returns:
+     name - the file's name & a digest of its classes, e.g.
+            'dognames-3f2a9c1e', used in cache & graph file keys (string)
+     class_ids - sorted ImageNet class ids of the vocabulary (numpy array)
+    """
+    class_ids = np.flatnonzero(load_dog_table(label_file).is_dog)
+    if not len(class_ids):
+        raise ValueError("None of the labels in {0} are ImageNet "
+                         "labels".format(label_file))
+    digest = hashlib.sha1(class_ids.astype(np.int16).tobytes()).hexdigest()[:8]
+    return ('{0}-{1}'.format(os.path.splitext(os.path.basename(label_file))[0],
+                             digest), class_ids)
+
+
+def get_final_layer_name(model):
+    """
+    Returns the name of the final linear (classifier) layer of model, e.g.
+    'fc' for resnet & 'classifier.6' for alexnet & vgg.
+    """
+    layer_name = None
+    for name, module in model.named_modules():
+        if isinstance(module, nn.Linear):
+            layer_name = name
+    if layer_name is None:
+        raise ValueError("The model has no linear classifier layer")
+    return layer_name
+
+
+def replace_module(model, name, new_module):
+    """
+    Returns a copy of model with its submodule name (dotted, e.g.
+    'classifier.6') replaced by new_module. Only the modules on the way to
+    it are copied, all the other modules & parameters are shared with model.
+    """
+    child_name, _, rest = name.partition('.')
+    model_copy = copy.copy(model)
+    model_copy._modules = copy.copy(model._modules)
+    model_copy._modules[child_name] = (
+        replace_module(model._modules[child_name], rest, new_module) if rest
+        else new_module)
+    return model_copy
+
+
+def restrict_model(model, class_ids):
+    """
+    Returns a copy of model whose final layer only computes the logits of
+    class_ids - logit i of its output is the logit of class class_ids[i].
+    Parameters:
+     model - pretrained CNN model in evaluation mode
+     class_ids - ImageNet class ids to keep (numpy array)
+    Returns:
+     model - the restricted model in evaluation mode
+    """
+    layer_name = get_final_layer_name(model)
+    layer = model.get_submodule(layer_name)
+    rows = torch.as_tensor(class_ids, dtype=torch.long)
+
+    head = nn.Linear(layer.in_features, len(rows), bias=layer.bias is not None)
+    with torch.no_grad():
+        head.weight.copy_(layer.weight[rows])
+        if layer.bias is not None:
+            head.bias.copy_(layer.bias[rows])
+    return replace_module(model, layer_name, head).eval()
+
+
+# Main program function defined below
+def main():
+    # Creates & retrieves Command Line Arugments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dir', type=str, default='pet_images/',
+                        help='path to folder of images')
+    parser.add_argument('--arch', type=str, default='vgg',
+                        help='chosen model')
+    parser.add_argument('--vocabulary', type=str, default='dognames.txt',
+                        help='label file of the classes to choose from')
+    parser.add_argument('--top-k', type=int, default=3,
+                        help='number of classes printed for each image')
+    parser.add_argument('--batch-size', type=int, default=32,
+                        help='number of images classified per forward pass')
+    in_arg = parser.parse_args()
+
+    # Imported here as classifier.py imports this module
+    import classifier
+    classifier.set_vocabulary(in_arg.vocabulary)
+    img_paths = sorted(classifier.walk_image_files(in_arg.dir))
+    top_k = classifier.classify_batch_topk(
+        [os.path.join(in_arg.dir, img_path) for img_path in img_paths],
+        in_arg.arch, in_arg.top_k, in_arg.batch_size)
+    for img_path, predictions in zip(img_paths, top_k):
+        print("%-36s %s" % (img_path, ', '.join(
+            "%s %.2f" % (label, confidence)
+            for label, confidence in predictions)))
+
+
+# Call to main function to run the program
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/results_store.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Columnar container for the classification results of one model.
+#          Instead of a Python list per image ([pet label, classifier label,
+#          match, pet is-a-dog, classifier is-a-dog]) the results are kept
+#          as numpy arrays - one entry per image - and the labels are stored
+#          once each (interned) with every image holding only the number of
+#          its label. A ResultsStore still behaves like the results_dic
+#          dictionary the lab functions expect: results[filename] returns a
+#          ResultRow that can be indexed & sliced like the list it replaces.
+#
+#   Example usage:
+#    results = ResultsStore(filenames, pet_labels, classifier_labels,
+#                           matches, class_ids)
+#    results['Beagle_01141.jpg']      -> ['beagle', 'beagle', 1]
+#    results.set_dog_flags(pet_is_dog, classifier_is_dog)
+#    results.match.sum()              -> number of label matches
+##
+
+# Imports python modules
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+# Value of the is-a-dog flags before adjust_results4_isadog() has set them
+FLAG_UNSET = -1
+
+
+class ResultRow(Sequence):
+    """
+    View of one image's results that reads like the results_dic list:
+     idx 0 = pet image label, idx 1 = classifier label, idx 2 = match (1/0),
+     idx 3 = pet image is-a-dog (1/0), idx 4 = classifier is-a-dog (1/0)
+    idx 3 & 4 only exist once the is-a-dog flags have been set.
+    """
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __len__(self):
+        return 5 if self.store.pet_is_dog[self.row] != FLAG_UNSET else 3
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[pos] for pos in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('result index out of range')
+        store, row = self.store, self.row
+        if idx == 0:
+            return store.strings[store.pet_label_codes[row]]
+        if idx == 1:
+            return store.strings[store.classifier_label_codes[row]]
+        column = (store.match, store.pet_is_dog, store.classifier_is_dog)[idx - 2]
+        return int(column[row])
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def extend(self, flags):
+        """
+        Sets the (pet image is-a-dog, classifier is-a-dog) flags of this image
+        - what adjust_results4_isadog() does to a results_dic list.
+        """
+        pet_is_dog, classifier_is_dog = flags
+        self.store.pet_is_dog[self.row] = pet_is_dog
+        self.store.classifier_is_dog[self.row] = classifier_is_dog
+
+
+class ResultsStore(Mapping):
+    """
+    The results of one model for a set of images, one entry per image in the
+    order of filenames:
+     filenames - image filenames, the keys of the dictionary view (list)
+     strings - the distinct labels (list of string)
+     pet_label_codes - position in strings of each pet image label (int32)
+     classifier_label_codes - position in strings of each classifier label
+                              (int32)
+     class_ids - predicted ImageNet class id, -1 if unknown (int16)
+     match - 1 if the labels match otherwise 0 (int8)
+     pet_is_dog, classifier_is_dog - 1 if the pet image / classifier label is
+                                     a dog, 0 if not & -1 until set (int8)
+    """
+
+    def __init__(self, filenames, pet_labels, classifier_labels, matches,
+                 class_ids=None):
+        """
+        Creates the results from one value per image for each column.
+        Parameters:
+         filenames - image filenames (list)
+         pet_labels - pet image labels (list of string)
+         classifier_labels - lowercase & stripped classifier labels (list of
+                             string)
+         matches - 1/0 match between the labels (list or numpy array)
+         class_ids - optional predicted ImageNet class ids (list or numpy
+                     array)
+        """
+        n_images = len(filenames)
+        self.filenames = list(filenames)
+        self.strings = list()
+        self.string_codes = dict()
+        self.pet_label_codes = self.intern(pet_labels)
+        self.classifier_label_codes = self.intern(classifier_labels)
+        self.match = np.asarray(matches, dtype=np.int8).reshape(n_images)
+        if class_ids is None:
+            self.class_ids = np.full(n_images, -1, dtype=np.int16)
+        else:
+            self.class_ids = np.asarray(class_ids, dtype=np.int16).reshape(n_images)
+        self.pet_is_dog = np.full(n_images, FLAG_UNSET, dtype=np.int8)
+        self.classifier_is_dog = np.full(n_images, FLAG_UNSET, dtype=np.int8)
+        self._rows = None
+
+    def intern(self, labels):
+        """
+        Adds the labels to strings (each distinct label only once).
+        Parameters:
+         labels - labels to add (list of string)
+        Returns:
+         codes - position of each label in strings (numpy int32 array)
+        """
+        strings, string_codes = self.strings, self.string_codes
+        codes = np.empty(len(labels), dtype=np.int32)
+        for pos, label in enumerate(labels):
+            code = string_codes.get(label)
+            if code is None:
+                code = string_codes[label] = len(strings)
+                strings.append(label)
+            codes[pos] = code
+        return codes
+
+    def pet_labels(self):
+        """
+        Returns the pet image label of each image (list of string).
+        """
+        strings = self.strings
+        return [strings[code] for code in self.pet_label_codes.tolist()]
+
+    def classifier_labels(self):
+        """
+        Returns the classifier label of each image (list of string).
+        """
+        strings = self.strings
+        return [strings[code] for code in self.classifier_label_codes.tolist()]
+
+    def has_dog_flags(self):
+        """
+        Returns True once the is-a-dog flags of every image have been set.
+        """
+        return len(self.filenames) == 0 or bool((self.pet_is_dog != FLAG_UNSET).all())
+
+    def set_dog_flags(self, pet_is_dog, classifier_is_dog):
+        """
+        Sets the is-a-dog flags of all the images at once.
+        Parameters:
+         pet_is_dog - 1/True where the pet image label is a dog (numpy array)
+         classifier_is_dog - 1/True where the classifier label is a dog
+                             (numpy array)
+        Returns:
+         None
+        """
+        self.pet_is_dog[:] = pet_is_dog
+        self.classifier_is_dog[:] = classifier_is_dog
+
+    def row_of(self, filename):
+        """
+        Returns the position of image filename in the columns.
+        """
+        # The filename -> row dictionary is only built when first needed
+        if self._rows is None:
+            self._rows = {name: row for row, name in enumerate(self.filenames)}
+        return self._rows[filename]
+
+    # Dictionary view - results[filename] is that image's ResultRow
+    def __getitem__(self, filename):
+        return ResultRow(self, self.row_of(filename))
+
+    def __iter__(self):
+        return iter(self.filenames)
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def __contains__(self, filename):
+        try:
+            self.row_of(filename)
+        except KeyError:
+            return False
+        return True
+
+    def rows(self, mask=None):
+        """
+        Returns the (filename, ResultRow) of each image, or only of the images
+        where mask is True.
+        Parameters:
+         mask - optional numpy bool array with one value per image
+        Returns:
+         rows - List of (filename, ResultRow) tuples (list)
+        """
+        positions = range(len(self.filenames)) if mask is None else \
+                    np.flatnonzero(mask).tolist()
+        return [(self.filenames[row], ResultRow(self, row)) for row in positions]
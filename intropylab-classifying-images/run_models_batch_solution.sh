@@ -6,6 +6,12 @@
 # REVISED DATE: 02/27/2018 - reduce scope of program
 # PURPOSE: Runs all three models to test which provides 'best' solution.
 #          Please note output from each run has been piped into a text file.
+#          To run all three models in a single process instead (each image is
+#          only read in once) use:
+#            python check_images_solution.py --dir pet_images/ --arch all --dogfile dognames.txt > all_solution.txt
+#          When the three runs are started side by side instead, give each
+#          one its share of the cores (e.g. --threads 2 on a 6 core host) so
+#          they don't oversubscribe them.
 #
 # Usage: sh run_models_batch_solution.sh  -- will run program from commandline
 #  
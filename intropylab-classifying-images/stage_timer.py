@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/stage_timer.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Records how long each stage of the image classification pipeline
+#          takes (label parsing, image decode, preprocessing, forward pass,
+#          label matching, dog adjustment and stats) along with the time
+#          spent on each individual image, so that the per-image latency
+#          percentiles (p50/p95/p99) can be reported.
+#
+#   Example usage:
+#    timer = StageTimer()
+#    with timer.stage('label parsing'):
+#        answers_dic = get_pet_labels(in_arg.dir)
+#    timer.print_summary()
+##
+
+# Imports python modules
+import json
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+# Percentiles of the per-image latency that are reported
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, pct):
+    """
+    Returns the pct-th percentile of values, linearly interpolating between
+    the two closest ranks (the same as numpy's default).
+    Parameters:
+     values - sequence of numbers (list)
+     pct - percentile to return, from 0 to 100 (float)
+    Returns:
+     value - the percentile, or 0.0 when values is empty (float)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class StageTimer:
+    """
+    Accumulates the total time & number of calls for each named stage of the
+    pipeline (in the order the stages are first seen) and the latency of each
+    classified image. Times can be added from several threads at once (e.g.
+    the stages of the streaming pipeline, see stream_pipeline.py).
+    """
+
+    def __init__(self):
+        self.stage_times = dict()
+        self.stage_calls = dict()
+        self.image_latencies = list()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Context manager that adds the time spent in its block to stage name.
+        Parameters:
+         name - name of the pipeline stage (string)
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def add(self, name, seconds, calls=1):
+        """
+        Adds seconds spent (over calls calls) to stage name.
+        Parameters:
+         name - name of the pipeline stage (string)
+         seconds - time spent in the stage (float)
+         calls - number of times the stage ran in that time (int)
+        Returns:
+         None
+        """
+        with self.lock:
+            self.stage_times[name] = self.stage_times.get(name, 0.0) + seconds
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + calls
+
+    def add_image_latencies(self, latencies):
+        """
+        Records the time spent classifying each image of a batch.
+        Parameters:
+         latencies - List of per-image times in seconds (list)
+        Returns:
+         None
+        """
+        with self.lock:
+            self.image_latencies.extend(latencies)
+
+    def latency_percentiles(self):
+        """
+        Returns the per-image latency percentiles in LATENCY_PERCENTILES.
+        Returns:
+         percentiles - Dictionary with key as 'p50', 'p95' ... and value as
+                       the latency in seconds (dict)
+        """
+        return {'p' + str(pct): percentile(self.image_latencies, pct)
+                for pct in LATENCY_PERCENTILES}
+
+    def to_dict(self):
+        """
+        Returns the recorded timings as a dictionary that can be saved as JSON.
+        """
+        return {'stages': {name: {'seconds': self.stage_times[name],
+                                  'calls': self.stage_calls[name]}
+                           for name in self.stage_times},
+                'n_images': len(self.image_latencies),
+                'image_latency': self.latency_percentiles()}
+
+    def save(self, path):
+        """
+        Writes the recorded timings (see to_dict()) to the JSON file path.
+        Parameters:
+         path - path of the JSON file to write (string)
+        Returns:
+         None
+        """
+        with open(path, 'w') as outfile:
+            json.dump(self.to_dict(), outfile, indent=2)
+
+    def print_summary(self):
+        """
+        Prints the time spent in each stage (with its share of the total) and
+        the per-image latency percentiles.
+        """
+        total = sum(self.stage_times.values())
+        print("\n*** Stage Timings ***")
+        for name, seconds in self.stage_times.items():
+            print("%20s: %8.3f s  %5.1f%%" % (name, seconds,
+                  (seconds / total * 100.0) if total > 0 else 0.0))
+
+        if self.image_latencies:
+            print("\nPer-Image Latency (%d images):" % len(self.image_latencies))
+            for key, seconds in self.latency_percentiles().items():
+                print("%20s: %8.2f ms" % (key, seconds * 1000.0))
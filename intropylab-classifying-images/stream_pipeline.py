@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/stream_pipeline.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Streaming mode of check_images_solution.py (--stream). Instead of
+#          running each stage over all the images before the next stage
+#          starts, the images flow through the stages a batch at a time:
+#           listing & pet labels -> decode & inference -> label matching &
+#           dog adjustment -> stats & printing
+#          Each stage is a generator and the stages are connected by bounded
+#          queues - the listing and the classifying stages run in their own
+#          threads - so the results of each batch are printed as soon as
+#          it's classified and only a few batches are held in memory at a
+#          time, however many images the folder has. The stats are added up
+#          with PartialStats, so the totals are exact.
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python check_images_solution.py --stream --dir <directory with images>
+#             --arch <model> --dogfile <file that contains dognames>
+#   Example call:
+#    python check_images_solution.py --stream --dir pet_images/ --arch all
+##
+
+# Imports python modules
+import os
+import queue
+import threading
+from collections import deque
+
+# Imports the batch classifier & the stages of check_images_solution.py
+from classifier import iter_batch_ids_multi
+from check_images_solution import (compare_labels, adjust_results4_isadog,
+                                   print_results)
+from image_walker import walk_images
+from partial_stats import PartialStats
+from stage_timer import StageTimer
+
+# Number of batches each queue between two stages can hold
+DEFAULT_QUEUE_SIZE = 2
+
+# Marks the end of a stage's output in its queue
+END_OF_STREAM = object()
+
+
+def iter_pet_labels(image_dir):
+    """
+    Walks image_dir (and its subfolders) lazily, yielding the filename (path
+    relative to image_dir) & pet label of each image as soon as it's found
+    (see walk_images() in image_walker.py).
+    Parameters:
+     image_dir - The (full) path to the folder of images (string)
+    Returns:
+     generator of (filename, pet label) tuples
+    """
+    return walk_images(image_dir)
+
+
+def iter_batches(labelled_files, batch_size):
+    """
+    Groups (filename, pet label) tuples into batches.
+    Parameters:
+     labelled_files - iterable of (filename, pet label) tuples
+     batch_size - number of images per batch (int)
+    Returns:
+     generator of (filenames, pet labels) tuples of lists
+    """
+    filenames, pet_labels = list(), list()
+    for filename, pet_label in labelled_files:
+        filenames.append(filename)
+        pet_labels.append(pet_label)
+        if len(filenames) == batch_size:
+            yield filenames, pet_labels
+            filenames, pet_labels = list(), list()
+    if filenames:
+        yield filenames, pet_labels
+
+
+def iter_classified(batches, image_dir, models, batch_size, cache=None,
+                    fast_decode=False, timer=None, decode_threads=0):
+    """
+    Decodes & classifies each batch of images with every model. The decode
+    threads work through the whole stream, decoding the next batches while
+    the current one is classified.
+    Parameters:
+     batches - iterable of (filenames, pet labels) tuples
+     image_dir - The (full) path to the folder of images (string)
+     models - List of model architectures (list)
+     batch_size - number of images per forward pass (int)
+     cache - optional PredictionCache (PredictionCache)
+     fast_decode - True decodes JPEGs at reduced resolution (bool)
+     timer - optional StageTimer (StageTimer)
+     decode_threads - number of threads decoding the images (int)
+    Returns:
+     generator of (filenames, pet labels, class ids dictionary) tuples, the
+     dictionary with key as model and value as the List of class ids
+    """
+    # Filenames & pet labels of the batches read (ahead) by the classifier
+    # that haven't been yielded yet, oldest first
+    read = deque()
+
+    def iter_paths():
+        for filenames, pet_labels in batches:
+            read.append((filenames, pet_labels))
+            yield [os.path.join(image_dir, filename) for filename in filenames]
+
+    for class_ids_dic in iter_batch_ids_multi(iter_paths(), models, cache,
+                                              fast_decode, timer,
+                                              decode_threads):
+        filenames, pet_labels = read.popleft()
+        yield filenames, pet_labels, class_ids_dic
+
+
+def iter_results(classified, models, dogfile, timer):
+    """
+    Matches the labels of each classified batch & adjusts its results for
+    dogs.
+    Parameters:
+     classified - iterable of (filenames, pet labels, class ids dictionary)
+                  tuples (see iter_classified())
+     models - List of model architectures (list)
+     dogfile - text file that contains the dognames (string)
+     timer - StageTimer (StageTimer)
+    Returns:
+     generator of Dictionaries with key as model and value as the batch's
+     ResultsStore
+    """
+    for filenames, pet_labels, class_ids_dic in classified:
+        petlabel_dic = dict(zip(filenames, pet_labels))
+        results_dics = dict()
+        for model in models:
+            with timer.stage('label matching'):
+                results_dics[model] = compare_labels(petlabel_dic, filenames,
+                                                     class_ids_dic[model])
+            with timer.stage('dog adjustment'):
+                adjust_results4_isadog(results_dics[model], dogfile)
+        yield results_dics
+
+
+def bounded(stage, maxsize=DEFAULT_QUEUE_SIZE):
+    """
+    Runs the generator stage in its own thread, which can only get maxsize
+    items ahead of the consumer before it has to wait.
+    Parameters:
+     stage - generator to run (generator)
+     maxsize - number of items the queue holds (int)
+    Returns:
+     generator of the items of stage, in order
+    """
+    items = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in stage:
+                # Gives up if the consumer stopped early
+                while not stop.is_set():
+                    try:
+                        items.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if stop.is_set():
+                    return
+            items.put(END_OF_STREAM)
+        except BaseException as error:
+            items.put(error)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is END_OF_STREAM:
+                return
+            # Re-raises an error of the stage in the consumer
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def stream_results(image_dir, models, dogfile, batch_size, cache=None,
+                   fast_decode=False, timer=None, decode_threads=0,
+                   queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Connects the stages of the streaming pipeline.
+    Parameters:
+     see iter_classified() & iter_results()
+     queue_size - number of batches each queue between stages holds (int)
+    Returns:
+     generator of Dictionaries with key as model and value as the batch's
+     ResultsStore (see iter_results())
+    """
+    if timer is None:
+        timer = StageTimer()
+    batches = bounded(iter_batches(iter_pet_labels(image_dir), batch_size),
+                      queue_size)
+    classified = bounded(iter_classified(batches, image_dir, models,
+                                         batch_size, cache, fast_decode,
+                                         timer, decode_threads), queue_size)
+    return iter_results(classified, models, dogfile, timer)
+
+
+def print_batch_results(results, model):
+    """
+    Prints the incorrectly classified dogs & dog breeds of one batch.
+    Parameters:
+     results - the batch's results for model (ResultsStore)
+     model - model architecture (string)
+    Returns:
+     None - simply printing results.
+    """
+    wrong_dogs = results.pet_is_dog != results.classifier_is_dog
+    wrong_breeds = ((results.pet_is_dog == 1) &
+                    (results.classifier_is_dog == 1) & (results.match == 0))
+    for key, result in results.rows(wrong_dogs):
+        print("%-8s INCORRECT Dog/NOT Dog: Real: %-26s   Classifier: %-30s"
+              % (model, result[0], result[1]))
+    for key, result in results.rows(wrong_breeds):
+        print("%-8s INCORRECT Breed:       Real: %-26s   Classifier: %-30s"
+              % (model, result[0], result[1]))
+
+
+def run_stream(image_dir, models, dogfile, batch_size, cache=None,
+               fast_decode=False, timer=None, decode_threads=0):
+    """
+    Streams the images of image_dir through the pipeline, printing the
+    incorrect classifications of each batch as it finishes and the results
+    summary of each model at the end.
+    Parameters:
+     see stream_results()
+    Returns:
+     results_stats_dics - Dictionary with key as model and value as its
+                          results_stats (see calculates_results_stats())
+    """
+    if timer is None:
+        timer = StageTimer()
+    totals = {model: PartialStats() for model in models}
+    for results_dics in stream_results(image_dir, models, dogfile, batch_size,
+                                       cache, fast_decode, timer,
+                                       decode_threads):
+        for model in models:
+            with timer.stage('stats'):
+                totals[model].add_results(results_dics[model])
+            print_batch_results(results_dics[model], model)
+
+    # Summaries from the totals - the results themselves are already gone
+    results_stats_dics = dict()
+    for model in models:
+        results_stats_dics[model] = totals[model].to_results_stats()
+        print_results(dict(), results_stats_dics[model], model)
+    return results_stats_dics
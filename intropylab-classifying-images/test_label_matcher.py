@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/test_label_matcher.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Checks that label_matcher.py decides matches exactly like the
+#          find() & word boundary code it replaced (and like the 'in' based
+#          code of alternative-to-classify_images.py), for every ImageNet
+#          label. Needs no model weights, so it runs in a second or so.
+#
+# Usage: python test_label_matcher.py    -- will run program from commandline
+#        python -m pytest test_label_matcher.py
+##
+
+# Imports the label index & the matcher being checked
+from label_index import load_label_index
+from label_matcher import (LabelMatcher, load_label_matcher, find_match,
+                           terms_match)
+
+
+def original_find_match(pet_label, classifier_label):
+    # The matching code of classify_images() before label_matcher.py
+    found_index = classifier_label.find(pet_label)
+    if found_index >= 0:
+        if found_index == 0 and len(pet_label) == len(classifier_label):
+            return True
+        elif (found_index == 0 or classifier_label[found_index-1] == " ") and ((found_index+len(pet_label) == len(classifier_label)) or ((classifier_label[found_index+len(pet_label):found_index+len(pet_label)+1]) in (' ', ','))):
+            return True
+    return False
+
+
+def original_terms_match(pet_label, classifier_label):
+    # The matching code of alternative-to-classify_images.py
+    model_label_list = classifier_label.split(", ")
+    if pet_label in model_label_list:
+        return True
+    for term in model_label_list:
+        if pet_label in term.split(" "):
+            return True
+    return False
+
+
+def get_pet_labels(classifier_label):
+    # Pet labels worth trying with a classifier label: every run of whole
+    # words, every substring starting or ending at a word boundary & a few
+    # labels that are never found
+    pet_labels = {'', ' ', ',', 'zzz', classifier_label + ' x'}
+    words = classifier_label.replace(',', ' ').split()
+    for start in range(len(words)):
+        for end in range(start + 1, len(words) + 1):
+            pet_labels.add(' '.join(words[start:end]))
+    for pos in range(len(classifier_label) + 1):
+        pet_labels.add(classifier_label[:pos])
+        pet_labels.add(classifier_label[pos:])
+    return pet_labels
+
+
+def test_examples():
+    # Stand-alone terms match, pet labels within another word don't
+    assert find_match('cat', 'tabby, tabby cat')
+    assert find_match('beagle', 'beagle')
+    assert find_match('poodle', 'standard poodle')
+    assert find_match('maltese', 'maltese dog, maltese terrier, maltese')
+    assert not find_match('cat', 'wildcat')
+    assert not find_match('cat', 'tomcat, cat')
+    assert not find_match('dog', 'hotdog, hot dog, red hot')
+    assert not find_match('great dane', 'dane')
+    assert terms_match('poodle', 'standard poodle')
+    assert terms_match('hot dog', 'hotdog, hot dog, red hot')
+    assert not terms_match('cat', 'wildcat')
+
+
+def test_same_as_original():
+    # Every ImageNet label with every pet label worth trying, for both rules
+    index = load_label_index()
+    find_matcher = LabelMatcher(index, 'find')
+    terms_matcher = LabelMatcher(index, 'terms')
+    for class_id, classifier_label in enumerate(index.normalized):
+        for pet_label in get_pet_labels(classifier_label):
+            expected = original_find_match(pet_label, classifier_label)
+            assert find_match(pet_label, classifier_label) == expected
+            assert find_matcher.matches(pet_label, class_id) == expected, \
+                (pet_label, classifier_label)
+            expected = original_terms_match(pet_label, classifier_label)
+            assert terms_match(pet_label, classifier_label) == expected
+            assert terms_matcher.matches(pet_label, class_id) == expected, \
+                (pet_label, classifier_label)
+
+
+def test_batch_matching():
+    # match_ids() & match_labels() agree with matches() position by position
+    matcher = load_label_matcher()
+    index = matcher.index
+    pet_labels = ['golden retriever', 'cat', 'beagle', 'dog', 'beagle']
+    class_ids = [207, 281, 162, 934, 207]
+    expected = [int(matcher.matches(pet_label, class_id))
+                for pet_label, class_id in zip(pet_labels, class_ids)]
+    assert expected == [1, 1, 1, 0, 0]
+    assert matcher.match_ids(pet_labels, class_ids).tolist() == expected
+    assert matcher.match_labels(pet_labels, [index.normalized[class_id]
+                                for class_id in class_ids]).tolist() == expected
+
+    # Labels that aren't ImageNet labels are matched directly
+    assert matcher.match_labels(['cat', 'cat'], ['big cat', 'bobcat']).tolist() == [1, 0]
+    assert matcher.match_ids([], []).tolist() == []
+
+
+# Runs the checks when called from the command line
+if __name__ == "__main__":
+    test_examples()
+    test_same_as_original()
+    test_batch_matching()
+    print("\nResults from test_label_matcher.py: all label matching checks passed")
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/thread_tuning.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Control of PyTorch's thread pools & auto-tuning of the batch size
+#          and thread count (check_images_solution.py --threads,
+#          --interop-threads & --autotune). By default every process uses
+#          all of the cores for its forward passes, so several classifying
+#          processes on one host (e.g. the three runs of
+#          run_models_batch_solution.sh started side by side) oversubscribe
+#          the cores and all of them slow down - give each one its share
+#          with --threads.
+#          The auto-tune mode probes every combination of batch size &
+#          thread count (up to --threads if given, otherwise all the cores)
+#          for the chosen models on this machine, by timing forward passes
+#          over a sample of the images, and keeps the fastest. The result is
+#          cached per host in thread_tuning.json, keyed by everything it
+#          depends on - the models, their precision, backend & vocabulary,
+#          the maximum thread count, the number of cores and the PyTorch
+#          version - so later runs reuse it without probing again.
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python thread_tuning.py --arch <model> --dir <directory with images>
+#             --batch-sizes <sizes> --threads <max thread count>
+#   Example calls:
+#    python thread_tuning.py --arch resnet                 (prints the probes)
+#    python check_images_solution.py --arch vgg --threads 2 --interop-threads 1
+#    python check_images_solution.py --arch all --autotune --threads 4
+##
+
+# Imports python modules
+import argparse
+import json
+import os
+import platform
+from time import perf_counter
+
+import numpy as np
+import torch
+from torch import __version__
+
+# Imports the models & the image preprocessing of the classifier
+import classifier
+
+# Default file the auto-tuned configurations are cached in
+DEFAULT_TUNING_FILE = 'thread_tuning.json'
+
+# Batch sizes the auto-tune mode probes by default
+DEFAULT_BATCH_SIZES = (1, 8, 16, 32)
+
+# Number of images the forward passes of each probe are timed over
+PROBE_IMAGES = 32
+
+# Thread counts of this process set by set_threads(), 0 = PyTorch default
+# (also used by the worker processes of worker_pool.py)
+threads = 0
+interop_threads = 0
+
+
+def set_threads(new_threads=0, new_interop_threads=0):
+    """
+    Sets the number of threads PyTorch uses within an operation (intra-op,
+    e.g. the tiles of a convolution) & to run independent operations at the
+    same time (inter-op). The inter-op count can only be set before the
+    first forward pass.
+    Parameters:
+     new_threads - number of intra-op threads, 0 leaves the default (int)
+     new_interop_threads - number of inter-op threads, 0 leaves the default
+                           (int)
+    Returns:
+     None
+    """
+    global threads, interop_threads
+    if new_threads < 0 or new_interop_threads < 0:
+        raise ValueError("Thread counts can't be negative")
+    if new_threads:
+        torch.set_num_threads(new_threads)
+        threads = new_threads
+    if new_interop_threads and new_interop_threads != interop_threads:
+        try:
+            torch.set_num_interop_threads(new_interop_threads)
+        except RuntimeError:
+            raise RuntimeError("The number of inter-op threads must be set "
+                               "before the models run") from None
+        interop_threads = new_interop_threads
+
+
+def get_thread_counts(max_threads):
+    """
+    Returns the thread counts the auto-tune mode probes: 1, 2, 4 ... up to
+    max_threads, which is always included.
+    """
+    counts = list()
+    count = 1
+    while count < max_threads:
+        counts.append(count)
+        count *= 2
+    counts.append(max_threads)
+    return counts
+
+
+def get_tuning_key(model_names, max_threads):
+    """
+    Returns the key of the cached configuration of model_names, with the
+    precision, backend & vocabulary (which changes the cost of the final
+    layer) that are set in classifier.py.
+    Parameters:
+     model_names - models classified together (list)
+     max_threads - largest thread count probed (int)
+    Returns:
+     key - key of the configuration in the host's cache (string)
+    """
+    return '{0}|{1}|{2}|vocab-{3}|max{4}|cpus{5}|torch{6}'.format(
+        ','.join(model_names), classifier.precision, classifier.backend,
+        classifier.vocabulary or 'all', max_threads, os.cpu_count(),
+        __version__.split('+')[0])
+
+
+def load_tuning(tuning_file):
+    """
+    Returns the cached configurations of this host (dict), key = tuning key.
+    """
+    try:
+        with open(tuning_file) as infile:
+            tuning = json.load(infile)
+    except (OSError, ValueError):
+        return dict()
+    return tuning.get(platform.node(), dict())
+
+
+def save_tuning(tuning_file, key, config):
+    """
+    Adds config to the cached configurations of this host, keeping those of
+    the other hosts that share the file.
+    """
+    try:
+        with open(tuning_file) as infile:
+            tuning = json.load(infile)
+    except (OSError, ValueError):
+        tuning = dict()
+    tuning.setdefault(platform.node(), dict())[key] = config
+
+    # Writes a temporary file first so that a run reading the cache at the
+    # same time never sees half of it
+    temp_path = '{0}.{1}.tmp'.format(tuning_file, os.getpid())
+    with open(temp_path, 'w') as outfile:
+        json.dump(tuning, outfile, indent=2, sort_keys=True)
+    os.replace(temp_path, tuning_file)
+
+
+def get_probe_batch(image_dir):
+    """
+    Returns the images the probes are timed over - the first PROBE_IMAGES
+    images of image_dir (sorted, repeated if there are fewer), preprocessed.
+    Parameters:
+     image_dir - The (full) path to the folder of images (string)
+    Returns:
+     batch - PROBE_IMAGES x 3 x 224 x 224 tensor
+    """
+    img_paths = sorted(classifier.walk_image_files(image_dir))[:PROBE_IMAGES]
+    if not img_paths:
+        raise ValueError("No images to auto-tune on in " + image_dir)
+    crops = [classifier.load_crop(os.path.join(image_dir, img_path))
+             for img_path in img_paths]
+    crops = (crops * PROBE_IMAGES)[:PROBE_IMAGES]
+    return classifier.crops_to_batch(np.stack(crops))
+
+
+def probe(model_names, batch, batch_size, thread_count):
+    """
+    Times the forward passes of every model over batch, batch_size images
+    at a time with thread_count threads.
+    Returns:
+     images_per_sec - images classified by every model per second (float)
+    """
+    torch.set_num_threads(thread_count)
+
+    # Warms up (the first pass at a new size or thread count is slower)
+    for model_name in model_names:
+        classifier.predict_batch(model_name, batch[:batch_size])
+
+    start = perf_counter()
+    for first in range(0, len(batch), batch_size):
+        for model_name in model_names:
+            classifier.predict_batch(model_name,
+                                     batch[first:first + batch_size])
+    return len(batch) / (perf_counter() - start)
+
+
+def autotune(model_names, image_dir, max_threads=0,
+             batch_sizes=DEFAULT_BATCH_SIZES, tuning_file=DEFAULT_TUNING_FILE,
+             retune=False, verbose=False):
+    """
+    Returns the fastest batch size & thread count for classifying with
+    model_names on this host - cached in tuning_file, otherwise probed (and
+    then cached). The thread count isn't set (see set_threads()).
+    Parameters:
+     model_names - models classified together (list)
+     image_dir - The (full) path to the folder of images probed on (string)
+     max_threads - largest thread count probed, 0 = number of cores (int)
+     batch_sizes - batch sizes probed (list)
+     tuning_file - JSON file the configurations are cached in (string)
+     retune - True probes again even if a configuration is cached (bool)
+     verbose - True prints the throughput of every probe (bool)
+    Returns:
+     config - Dictionary with keys 'batch_size', 'threads' &
+              'images_per_sec' (dict)
+    """
+    max_threads = max_threads or os.cpu_count() or 1
+    key = get_tuning_key(model_names, max_threads)
+    if not retune:
+        config = load_tuning(tuning_file).get(key)
+        if config is not None:
+            return config
+
+    # Probes every combination, then restores the thread count
+    batch = get_probe_batch(image_dir)
+    default_threads = torch.get_num_threads()
+    config = None
+    try:
+        for thread_count in get_thread_counts(max_threads):
+            for batch_size in batch_sizes:
+                images_per_sec = probe(model_names, batch, batch_size,
+                                       thread_count)
+                if verbose:
+                    print("batch %3d threads %2d: %7.1f img/s"
+                          % (batch_size, thread_count, images_per_sec))
+                if config is None or images_per_sec > config['images_per_sec']:
+                    config = {'batch_size': batch_size,
+                              'threads': thread_count,
+                              'images_per_sec': images_per_sec}
+    finally:
+        torch.set_num_threads(default_threads)
+
+    save_tuning(tuning_file, key, config)
+    return config
+
+
+# Main program function defined below
+def main():
+    # Creates & retrieves Command Line Arugments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--arch', type=str, default='vgg',
+                        help='model(s) classified together, separated by '
+                             'commas or all')
+    parser.add_argument('--dir', type=str, default='pet_images/',
+                        help='folder of images to probe on')
+    parser.add_argument('--batch-sizes', type=str,
+                        default=','.join(map(str, DEFAULT_BATCH_SIZES)),
+                        help='batch sizes to probe, separated by commas')
+    parser.add_argument('--threads', type=int, default=0,
+                        help='largest thread count to probe (0 = number of '
+                             'cores)')
+    parser.add_argument('--tuning-file', type=str, default=DEFAULT_TUNING_FILE,
+                        help='JSON file the configurations are cached in')
+    in_arg = parser.parse_args()
+
+    archs = (list(classifier.model_builders) if in_arg.arch == 'all' else
+             [name.strip() for name in in_arg.arch.split(',')])
+    batch_sizes = [int(size) for size in in_arg.batch_sizes.split(',')]
+
+    # Always probes again - the cached configuration is replaced
+    config = autotune(archs, in_arg.dir, in_arg.threads, batch_sizes,
+                      in_arg.tuning_file, retune=True, verbose=True)
+    print("\nFastest for %s on %s: batch %d threads %d (%.1f img/s)"
+          % (','.join(archs), platform.node(), config['batch_size'],
+             config['threads'], config['images_per_sec']))
+
+
+# Call to main function to run the program
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/weight_store.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Local, versioned store of the pretrained model weights so that
+#          classifier.py can run without downloading anything (e.g. on
+#          air-gapped machines). The weights of each model are saved once as
+#          a state dict file listed in the store's manifest.json. When the
+#          installed PyTorch supports it (2.1 & higher) the files are
+#          memory-mapped on load instead of being read into memory, which
+#          makes cold starts faster and lets several worker processes on one
+#          machine share the same weight pages in the OS page cache.
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python weight_store.py --export <weights directory> --arch <model>
+#      python weight_store.py --import <checkpoint file> --arch <model>
+#             --dir <weights directory>
+#      python weight_store.py --verify <weights directory>
+#   Example calls:
+#    python weight_store.py --export weights/ --arch all   (needs network)
+#    python weight_store.py --import resnet18-f37072fd.pth --arch resnet --dir weights/
+#    python check_images_solution.py --weights weights/ --arch vgg
+##
+
+# Imports python modules
+import argparse
+import hashlib
+import json
+import os
+
+import torch
+from torch import __version__
+
+# Name of the file that lists the weight files in a store
+MANIFEST_FILENAME = 'manifest.json'
+
+# Environment variable that sets the default weights directory of classifier.py
+WEIGHTS_DIR_ENV = 'AIPND_WEIGHTS_DIR'
+
+# Version of the pretrained weights of each model (named after the torchvision
+# checkpoint files they come from) - stored in the file names so that
+# different versions can live side by side in the same store
+WEIGHTS_VERSIONS = {'resnet': 'resnet18-f37072fd',
+                    'alexnet': 'alexnet-owt-7be5be79',
+                    'vgg': 'vgg16-397923af'}
+
+
+def supports_mmap():
+    """
+    Returns True if the installed PyTorch can memory-map saved tensors and
+    assign them to a model without copying (torch.load(mmap=True) and
+    load_state_dict(assign=True) were added in PyTorch 2.1).
+    """
+    pytorch_ver = __version__.split('.')
+    return (int(pytorch_ver[0]), int(pytorch_ver[1])) >= (2, 1)
+
+
+def read_manifest(weights_dir):
+    """
+    Returns the manifest of the weight store in weights_dir (an empty
+    manifest if the store doesn't exist yet).
+    Parameters:
+     weights_dir - path to the weights directory (string)
+    Returns:
+     manifest - Dictionary with key as model name and value as a Dictionary
+                with the 'file', 'version' & 'sha256' of its weights (dict)
+    """
+    manifest_path = os.path.join(weights_dir, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return dict()
+    with open(manifest_path) as infile:
+        return json.load(infile)
+
+
+def hash_file(path):
+    """
+    Returns the hex SHA-256 digest of the file at path.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_weights(weights_dir, model_name, state_dict, version=None):
+    """
+    Saves a model's state dict to the weight store and adds it to the
+    manifest (replacing an earlier version of the same model).
+    Parameters:
+     weights_dir - path to the weights directory (string)
+     model_name - model architecture, values must be: resnet alexnet vgg
+                  (string)
+     state_dict - the model weights (dict of tensors)
+     version - version of the weights, the torchvision checkpoint name by
+               default (string)
+    Returns:
+     weights_path - path of the saved weights file (string)
+    """
+    version = version or WEIGHTS_VERSIONS[model_name]
+    os.makedirs(weights_dir, exist_ok=True)
+
+    # Saves in PyTorch's zip file format, which can be memory-mapped
+    filename = version + '.pt'
+    weights_path = os.path.join(weights_dir, filename)
+    torch.save(state_dict, weights_path)
+
+    manifest = read_manifest(weights_dir)
+    manifest[model_name] = {'file': filename, 'version': version,
+                            'sha256': hash_file(weights_path)}
+    with open(os.path.join(weights_dir, MANIFEST_FILENAME), 'w') as outfile:
+        json.dump(manifest, outfile, indent=2, sort_keys=True)
+    return weights_path
+
+
+def get_weights_version(model_name, weights_dir=None):
+    """
+    Returns the version of the pretrained weights a model is loaded with -
+    the version in the manifest of weights_dir if given, otherwise the
+    version torchvision downloads.
+    Parameters:
+     model_name - model architecture, values must be: resnet alexnet vgg
+                  (string)
+     weights_dir - optional path to the weights directory (string)
+    Returns:
+     version - version of the weights (string)
+    """
+    if weights_dir is not None:
+        entry = read_manifest(weights_dir).get(model_name)
+        if entry is not None:
+            return entry['version']
+    return WEIGHTS_VERSIONS[model_name]
+
+
+def get_weights_path(model_name, weights_dir):
+    """
+    Returns the path of the weights file of a model in the weight store.
+    Parameters:
+     model_name - model architecture, values must be: resnet alexnet vgg
+                  (string)
+     weights_dir - path to the weights directory (string)
+    Returns:
+     weights_path - path of the weights file (string)
+    """
+    manifest = read_manifest(weights_dir)
+    if model_name not in manifest:
+        raise FileNotFoundError("No weights for model '{0}' in {1} - create "
+                                "them with weight_store.py --export or "
+                                "--import".format(model_name, weights_dir))
+    weights_path = os.path.join(weights_dir, manifest[model_name]['file'])
+    if not os.path.exists(weights_path):
+        raise FileNotFoundError("The weights file {0} of model '{1}' is "
+                                "missing".format(weights_path, model_name))
+    return weights_path
+
+
+def load_model(model_name, model_builder, weights_dir):
+    """
+    Builds the model architecture (without downloading anything) and loads
+    its weights from the weight store, memory-mapping them when supported.
+    Parameters:
+     model_name - model architecture, values must be: resnet alexnet vgg
+                  (string)
+     model_builder - torchvision function that builds the model (function)
+     weights_dir - path to the weights directory (string)
+    Returns:
+     model - the model with its pretrained weights loaded
+    """
+    weights_path = get_weights_path(model_name, weights_dir)
+
+    # Builds the architecture only - the weights come from the store
+    model = model_builder(pretrained=False)
+
+    if supports_mmap():
+        # Tensors stay backed by the (read-only, shared) mapped file pages
+        state_dict = torch.load(weights_path, map_location='cpu', mmap=True,
+                                weights_only=True)
+        model.load_state_dict(state_dict, assign=True)
+    else:
+        model.load_state_dict(torch.load(weights_path, map_location='cpu'))
+    return model
+
+
+# Main program function defined below
+def main():
+    # Creates & retrieves Command Line Arugments
+    in_arg = get_input_args()
+
+    # Imports the model builders here so the import of classifier.py
+    # (which imports this module) isn't circular
+    from classifier import model_builders
+
+    archs = list(model_builders) if in_arg.arch == 'all' else in_arg.arch.split(',')
+
+    # Downloads the pretrained weights & saves them to the store
+    if in_arg.export:
+        for arch in archs:
+            model = model_builders[arch](pretrained=True)
+            print("Saved", save_weights(in_arg.export, arch, model.state_dict()))
+
+    # Adds an existing (e.g. copied) torchvision checkpoint to the store
+    elif in_arg.import_file:
+        state_dict = torch.load(in_arg.import_file, map_location='cpu')
+        version = os.path.splitext(os.path.basename(in_arg.import_file))[0]
+        print("Saved", save_weights(in_arg.dir, archs[0], state_dict, version))
+
+    # Checks the weight files against the hashes in the manifest
+    elif in_arg.verify:
+        for arch, entry in sorted(read_manifest(in_arg.verify).items()):
+            ok = hash_file(os.path.join(in_arg.verify, entry['file'])) == entry['sha256']
+            print("%-8s %-24s %s" % (arch, entry['file'], 'OK' if ok else 'CORRUPT'))
+
+
+def get_input_args():
+    """
+    Retrieves and parses the command line arguments created and defined using
+    the argparse module. This function returns these arguments as an
+    ArgumentParser object.
+    Parameters:
+     None - simply using argparse module to create & store command line arguments
+    Returns:
+     parse_args() -data structure that stores the command line arguments object
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--export', type=str, default='',
+                        help='download the pretrained weights into this '
+                             'weights directory')
+    parser.add_argument('--import', dest='import_file', type=str, default='',
+                        help='add this torchvision checkpoint file to the '
+                             'weights directory given by --dir')
+    parser.add_argument('--verify', type=str, default='',
+                        help='check the files of this weights directory')
+    parser.add_argument('--dir', type=str, default='weights/',
+                        help='weights directory used by --import')
+    parser.add_argument('--arch', type=str, default='all',
+                        help='model(s) separated by commas, or all')
+    return parser.parse_args()
+
+
+# Call to main function to run the program
+if __name__ == "__main__":
+    main()
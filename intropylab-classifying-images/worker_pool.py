@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# */AIPND/intropylab-classifying-images/worker_pool.py
+#
+# PROGRAMMER: Melanie Burns
+# DATE CREATED: October 18, 2026
+# REVISED DATE:             <=(Date Revised - if any)
+# PURPOSE: Classifies images with a pool of worker processes so that a run
+#          can use all the cores of a large machine (check_images_solution.py
+#          --workers N). Each worker loads the models once. The main process
+#          decodes & crops the images straight into a ring of shared memory
+#          slots (one batch of 224x224 RGB uint8 crops per slot) and only
+#          sends the workers the number of the slot to classify - the image
+#          data itself is never pickled. The workers normalize the crops in
+#          place, run the models and send back just the predicted class ids,
+#          which are put back in image order.
+#          Run on its own, this program prints a scaling report: the
+#          throughput with 1, 2, 4 ... N workers.
+#
+# Use argparse Expected Call with <> indicating expected user input:
+#      python worker_pool.py --dir <directory with images> --arch <model>
+#             --workers <max number of workers>
+#   Example calls:
+#    python check_images_solution.py --dir pet_images/ --arch all --workers 8
+#    python worker_pool.py --dir pet_images/ --arch resnet --workers 8 --output scaling.json
+##
+
+# Imports python modules
+import argparse
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from time import perf_counter
+
+import numpy as np
+
+# Imports the image loading & batch classifying of the classifier
+import classifier
+from classifier import load_crop, DEFAULT_BATCH_SIZE
+from pack_images import CROP_SHAPE
+from stage_timer import StageTimer
+
+# Imports the thread counts set for the classifying processes
+import thread_tuning
+
+# Number of shared memory batch slots per worker - while a worker classifies
+# one batch the main process can fill the next
+SLOTS_PER_WORKER = 2
+
+# Set in each worker process by init_worker()
+worker_state = dict()
+
+
+def init_worker(model_names, model_settings, torch_threads, interop_threads,
+                shm_name, ring_shape):
+    """
+    Sets up a worker process: limits its torch threads, loads the models &
+    attaches the shared memory ring of batch slots.
+    Parameters:
+     model_names - models the worker classifies with (list)
+     model_settings - weights, precision & backend of the main process's
+                      models (see get_model_settings() in classifier.py)
+                      (dict)
+     torch_threads - number of threads torch may use in this worker (int)
+     interop_threads - number of inter-op threads of this worker, 0 for
+                       the PyTorch default (int)
+     shm_name - name of the shared memory block of the slots (string)
+     ring_shape - shape of the slots array (tuple)
+    Returns:
+     None
+    """
+    thread_tuning.set_threads(torch_threads, interop_threads)
+    classifier.set_model_settings(model_settings)
+    for model_name in model_names:
+        classifier.get_model(model_name)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    worker_state['shm'] = shm
+    worker_state['ring'] = np.ndarray(ring_shape, dtype=np.uint8, buffer=shm.buf)
+    worker_state['model_names'] = model_names
+
+
+def classify_slot(slot, n_images):
+    """
+    Classifies the first n_images crops of a shared memory slot with every
+    model - runs in a worker process.
+    Parameters:
+     slot - number of the slot (int)
+     n_images - number of crops in the slot (int)
+    Returns:
+     pred_idxs_dic - Dictionary with key as model name and value as the List
+                     of predicted class ids (dict)
+     forward_time - seconds spent in the forward passes (float)
+    """
+    # The batch tensor is made straight from the shared memory (no pickling)
+    batch = classifier.crops_to_batch(worker_state['ring'][slot, :n_images])
+    pred_idxs_dic = dict()
+    forward_time = 0.0
+    for model_name in worker_state['model_names']:
+        pred_idxs_dic[model_name], seconds = classifier.predict_batch(model_name,
+                                                                      batch)
+        forward_time += seconds
+    return pred_idxs_dic, forward_time
+
+
+class WorkerPool:
+    """
+    Pool of worker processes, each holding its own copy of the models, fed
+    with batches of crops through shared memory. Use as a context manager
+    (or call close()) so the processes & shared memory are released.
+    """
+
+    def __init__(self, model_names, workers, batch_size=DEFAULT_BATCH_SIZE,
+                 torch_threads=None):
+        """
+        Starts the worker processes.
+        Parameters:
+         model_names - models to classify with (list)
+         workers - number of worker processes (int)
+         batch_size - number of images per batch (int)
+         torch_threads - torch threads per worker, by default the count set
+                         with set_threads() in thread_tuning.py or else the
+                         cores shared equally by the workers (int)
+        """
+        self.model_names = list(model_names)
+        self.workers = workers
+
+        # Checks the models can be built before starting the workers, which
+        # would otherwise each fail to load them
+        classifier.check_models(self.model_names)
+        self.batch_size = batch_size
+        if torch_threads is None:
+            torch_threads = (thread_tuning.threads or
+                             max(1, (os.cpu_count() or 1) // workers))
+
+        # Ring of batch slots in shared memory
+        n_slots = workers * SLOTS_PER_WORKER
+        ring_shape = (n_slots, batch_size) + CROP_SHAPE
+        self.shm = shared_memory.SharedMemory(create=True,
+                                              size=int(np.prod(ring_shape)))
+        self.ring = np.ndarray(ring_shape, dtype=np.uint8, buffer=self.shm.buf)
+
+        # Workers are spawned (not forked) so that they don't inherit the
+        # torch thread pools of this process. If a worker fails to start
+        # (init_worker() raises) the pool breaks & every pending batch raises
+        # BrokenProcessPool, instead of the failed workers being replaced by
+        # new ones that fail the same way
+        context = multiprocessing.get_context('spawn')
+        self.pool = ProcessPoolExecutor(workers, mp_context=context,
+                                        initializer=init_worker,
+                                        initargs=(self.model_names,
+                                                  classifier.get_model_settings(),
+                                                  torch_threads,
+                                                  thread_tuning.interop_threads,
+                                                  self.shm.name, ring_shape))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Stops the worker processes (once the batches they're classifying are
+        done) & frees the shared memory.
+        """
+        self.pool.shutdown(cancel_futures=True)
+        del self.ring
+        self.shm.close()
+        self.shm.unlink()
+
+    def classify_batches(self, fill_batches, n_images, timer=None):
+        """
+        Classifies n_images images batch by batch, keeping every slot busy.
+        Parameters:
+         fill_batches - function called with (slot array, start, stop) that
+                        writes the crops of images start to stop - 1 into the
+                        slot array & returns the seconds it spent (function)
+         n_images - number of images (int)
+         timer - optional StageTimer (StageTimer)
+        Returns:
+         class_ids_dic - Dictionary with key as model name and value as the
+                         List of class ids, one per image in order (dict)
+        """
+        if timer is None:
+            timer = StageTimer()
+        class_ids_dic = {model_name: list() for model_name in self.model_names}
+        free_slots = deque(range(len(self.ring)))
+        running = deque()
+
+        def collect_oldest():
+            # Waits for the oldest batch (results are kept in image order)
+            # and frees its slot
+            slot, n_batch, fill_time, task = running.popleft()
+            pred_idxs_dic, forward_time = task.result()
+            free_slots.append(slot)
+            timer.add('forward pass', forward_time)
+            timer.add_image_latencies([(fill_time + forward_time) / n_batch] * n_batch)
+            for model_name in self.model_names:
+                class_ids_dic[model_name].extend(pred_idxs_dic[model_name])
+
+        for start in range(0, n_images, self.batch_size):
+            stop = min(start + self.batch_size, n_images)
+            if not free_slots:
+                collect_oldest()
+            slot = free_slots.popleft()
+            fill_time = fill_batches(self.ring[slot], start, stop)
+            task = self.pool.submit(classify_slot, slot, stop - start)
+            running.append((slot, stop - start, fill_time, task))
+        while running:
+            collect_oldest()
+        return class_ids_dic
+
+    def classify(self, img_paths, fast_decode=False, decode_threads=0,
+                 timer=None):
+        """
+        Classifies image files, decoding & cropping them in this process
+        (on decode_threads threads if given) straight into shared memory.
+        Parameters:
+         img_paths - paths to the image files (list)
+         fast_decode - True decodes JPEGs at reduced resolution (bool)
+         decode_threads - number of decoding threads, 0 decodes on this
+                          thread (int)
+         timer - optional StageTimer (StageTimer)
+        Returns:
+         class_ids_dic - see classify_batches()
+        """
+        if timer is None:
+            timer = StageTimer()
+        decoder = ThreadPoolExecutor(decode_threads) if decode_threads > 0 else None
+
+        def fill_images(slot_array, start, stop):
+            fill_start = perf_counter()
+            paths = img_paths[start:stop]
+            crops = (decoder.map(load_crop, paths, [fast_decode] * len(paths))
+                     if decoder is not None else
+                     (load_crop(img_path, fast_decode) for img_path in paths))
+            for row, crop in enumerate(crops):
+                slot_array[row] = crop
+            fill_time = perf_counter() - fill_start
+            timer.add('image decode', fill_time)
+            return fill_time
+
+        try:
+            return self.classify_batches(fill_images, len(img_paths), timer)
+        finally:
+            if decoder is not None:
+                decoder.shutdown()
+
+    def classify_packed(self, packed, timer=None):
+        """
+        Classifies the crops of a packed image file (see pack_images.py).
+        Parameters:
+         packed - the packed images (PackedImages)
+         timer - optional StageTimer (StageTimer)
+        Returns:
+         class_ids_dic - see classify_batches(), in packed.filenames order
+        """
+        if timer is None:
+            timer = StageTimer()
+
+        def fill_packed(slot_array, start, stop):
+            fill_start = perf_counter()
+            slot_array[:stop - start] = packed.crops[start:stop]
+            fill_time = perf_counter() - fill_start
+            timer.add('preprocessing', fill_time)
+            return fill_time
+
+        return self.classify_batches(fill_packed, len(packed), timer)
+
+
+def classify_ids_workers(img_paths, model_names, workers,
+                         batch_size=DEFAULT_BATCH_SIZE, cache=None,
+                         fast_decode=False, timer=None, decode_threads=0):
+    """
+    Same as classify_batch_ids_multi() in classifier.py but classifies with
+    a pool of workers worker processes. Images with cached predictions for
+    every model aren't sent to the workers.
+    Returns:
+     class_ids_dic - Dictionary with key as model name and value as the List
+                     of predicted ImageNet class ids for that model, one for
+                     each image in img_paths and in the same order
+    """
+    if timer is None:
+        timer = StageTimer()
+    preprocess_configs = {model_name: classifier.get_preprocess_config(
+                              fast_decode, model_name)
+                          for model_name in model_names}
+
+    # Looks up each image's cached predictions (by content hash)
+    if cache is not None:
+        with timer.stage('cache lookup'):
+            img_hashes = [cache.hash_file(img_path) for img_path in img_paths]
+            class_ids_dic = {model_name: cache.get_many(
+                                 img_hashes, model_name,
+                                 preprocess_configs[model_name])
+                             for model_name in model_names}
+    else:
+        class_ids_dic = {model_name: [None] * len(img_paths)
+                         for model_name in model_names}
+    todo = [pos for pos in range(len(img_paths))
+            if any(class_ids_dic[model_name][pos] is None
+                   for model_name in model_names)]
+    if not todo:
+        return class_ids_dic
+
+    with WorkerPool(model_names, workers, batch_size) as pool:
+        new_ids_dic = pool.classify([img_paths[pos] for pos in todo],
+                                    fast_decode, decode_threads, timer)
+
+    for model_name in model_names:
+        class_ids = class_ids_dic[model_name]
+        for pos, class_id in zip(todo, new_ids_dic[model_name]):
+            class_ids[pos] = class_id
+
+        # saves the new predictions for the next run
+        if cache is not None:
+            cache.put_many([img_hashes[pos] for pos in todo], model_name,
+                           preprocess_configs[model_name],
+                           new_ids_dic[model_name])
+    return class_ids_dic
+
+
+def classify_packed_ids_workers(packed, model_names, workers,
+                                batch_size=DEFAULT_BATCH_SIZE, timer=None):
+    """
+    Same as classify_packed_ids_multi() in classifier.py but classifies with
+    a pool of workers worker processes.
+    """
+    with WorkerPool(model_names, workers, batch_size) as pool:
+        return pool.classify_packed(packed, timer)
+
+
+def get_worker_counts(max_workers):
+    """
+    Returns the worker counts of the scaling report: 1, 2, 4 ... up to
+    max_workers, which is always included.
+    """
+    counts = list()
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+    return counts
+
+
+# Main program function defined below
+def main():
+    # Creates & retrieves Command Line Arugments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dir', type=str, default='pet_images/',
+                        help='path to folder of images')
+    parser.add_argument('--arch', type=str, default='resnet',
+                        help='chosen model(s), separated by commas')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='largest number of workers to report on')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='number of images classified per forward pass')
+    parser.add_argument('--decode-threads', type=int, default=0,
+                        help='number of threads decoding images')
+    parser.add_argument('--fast-decode', action='store_true',
+                        help='decode JPEGs at reduced resolution')
+    parser.add_argument('--output', type=str, default='',
+                        help='JSON file the scaling report is saved to')
+    in_arg = parser.parse_args()
+
+    model_names = [name.strip() for name in in_arg.arch.split(',')]
+    img_paths = [os.path.join(in_arg.dir, filename)
+                 for filename in sorted(os.listdir(in_arg.dir))
+                 if filename[0] != '.']
+
+    # Times each number of workers, after a warm up batch per worker (so
+    # that starting the workers & loading the models isn't included)
+    report = list()
+    print("%8s %12s %10s %8s %10s" % ('workers', 'startup s', 'img/s',
+                                      'speedup', 'efficiency'))
+    for workers in get_worker_counts(in_arg.workers):
+        start = perf_counter()
+        with WorkerPool(model_names, workers, in_arg.batch_size) as pool:
+            pool.classify(img_paths[:in_arg.batch_size] * workers,
+                          in_arg.fast_decode, in_arg.decode_threads)
+            startup = perf_counter() - start
+            start = perf_counter()
+            pool.classify(img_paths, in_arg.fast_decode, in_arg.decode_threads)
+            images_per_sec = len(img_paths) / (perf_counter() - start)
+
+        speedup = images_per_sec / report[0]['images_per_sec'] if report else 1.0
+        report.append({'workers': workers, 'startup_sec': startup,
+                       'images_per_sec': images_per_sec, 'speedup': speedup,
+                       'efficiency': speedup / workers})
+        print("%8d %12.2f %10.1f %7.2fx %9.0f%%" % (workers, startup,
+              images_per_sec, speedup, speedup / workers * 100.0))
+
+    if in_arg.output:
+        with open(in_arg.output, 'w') as outfile:
+            json.dump({'cpu_count': os.cpu_count(), 'arch': model_names,
+                       'n_images': len(img_paths), 'results': report},
+                      outfile, indent=2)
+
+
+# Call to main function to run the program
+if __name__ == "__main__":
+    main()